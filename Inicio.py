@@ -1,6 +1,8 @@
 import streamlit as st
 import base64
 
+from clima import calentar
+
 # Configuración de la página
 st.set_page_config(
     page_title="Nuevas Tecnologías de Programación",
@@ -137,6 +139,19 @@ with col2:
    
 
 
+# Precalienta en segundo plano el clima de la página de API, una vez por proceso (ver clima.py)
+@st.cache_resource
+def calentar_clima():
+    try:
+        clave = st.secrets["api"]["openweather_key"]
+    except (KeyError, FileNotFoundError):
+        return None
+    if clave == "TU_API_KEY_AQUI":
+        return None
+    return calentar(clave)
+
+calentar_clima()
+
 # Pie de página
 st.markdown("---")
 st.markdown("""
@@ -1,53 +1,491 @@
 # api_analytics.py (Guarda este código en un archivo con este nombre)
-from fastapi import FastAPI
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Literal, Optional
+from urllib.parse import quote
+
+import numpy as np
 import pandas as pd
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-# Inicializar la aplicación FastAPI
-app = FastAPI(title="API de Resultados Analíticos con Pandas")
-
-# Crear un DataFrame de ejemplo
-data = {
-    'Producto': ['Producto A', 'Producto B', 'Producto C', 'Producto D'],
-    'Categoría': ['Electrónica', 'Ropa', 'Alimentos', 'Electrónica'],
-    'Ventas': [100, 150, 200, 80],
-    'Precio': [50.0, 30.0, 20.0, 100.0]
+from cache_lru import CacheLRU
+from datos_ventas import DECIMALES_VENTAS, RUTA_VENTAS, guardar_instantanea, mapear_instantanea
+from ejecucion import Ejecutor, LimiteFlujo, VersionCambiada
+from exportar_ventas import EXTENSIONES, TIPOS_MEDIO, flujo
+from indices_ventas import Igual
+from metricas import Metricas, MiddlewareMetricas, fase
+from motor_analitico import MotorVentas, cargar_motor
+
+# --- API de resultados analíticos sobre el dataset de ventas ---
+# Al arrancar se carga el motor analítico compartido (ver motor_analitico): el
+# dataset con su índice bitmap, su cubo de agregaciones y su tabla Arrow, los
+# mismos que usan las páginas de Streamlit. Las respuestas con filas no pasan
+# por to_dict: to_dict crea un dict de Python por fila y FastAPI lo vuelve a
+# recorrer para codificarlo. En su lugar el encoder JSON en C de pandas escribe
+# el texto directamente desde las columnas y se devuelve tal cual.
+#
+# El dataset no tiene categoría de producto ni precio: la categoría es el
+# género del juego y los "ingresos" son las ventas globales (millones de
+# unidades).
+#
+# /datos y /filtro devuelven una página acotada de filas (limit), opcionalmente
+# con solo algunas columnas (fields) y ordenada por una columna (sort, con "-"
+# delante para descendente). El orden de cada columna se calcula una vez en el
+# índice y se reutiliza entre páginas. La siguiente página se pide con el
+# cursor que llega en la cabecera X-Cursor-Siguiente; el cursor incluye la
+# versión del dataset y la consulta, así que no mezcla páginas de datos o
+# filtros distintos. El cuerpo sigue siendo una lista de registros.
+#
+# Para descargas completas /exportar envía el dataset (o el filtro por
+# categoría) en Arrow IPC o Parquet, por lotes y sin pasar por JSON (ver
+# exportar_ventas). El formato se elige con ?formato= o con la cabecera Accept.
+#
+# Las respuestas agregadas (/estadisticas, /ingresos_por_categoria) se guardan
+# ya serializadas en una LRU con presupuesto de bytes (la misma clase que la
+# caché de figuras), con clave (endpoint, parámetros, versión del dataset).
+# Llevan un ETag fuerte derivado de esa clave: si el cliente lo reenvía en
+# If-None-Match y los datos no cambiaron, se responde 304 sin cuerpo.
+#
+# Recarga en caliente: cada MotorVentas es una instantánea del dataset y de
+# todo lo que se deriva de él, y no se modifica nunca. Cada petición
+# toma la instantánea vigente al empezar y la usa hasta el final. Una recarga
+# (POST /admin/recargar, o el vigilante del archivo si API_VIGILAR_SEGUNDOS > 0)
+# construye la nueva en un hilo aparte y la publica con una sola asignación:
+# las peticiones en curso terminan con la versión anterior y las nuevas ven la
+# nueva, sin reiniciar el servidor.
+#
+# Los endpoints con cálculo son async y delegan el trabajo (ver ejecucion): las
+# agregaciones a un pool de procesos por versión, las páginas de filas a un
+# pool de hilos propio, cada uno con su límite de consultas simultáneas y un
+# plazo. Las descargas también tienen un máximo simultáneo. Así / y
+# /admin/estado responden igual de rápido bajo carga.
+#
+# Los procesos no heredan la instantánea (no se crean con fork): al publicar una
+# versión se escribe su tabla Arrow en disco y cada proceso la mapea en memoria,
+# con la misma versión que el padre. Las filas (columnas numéricas y códigos de
+# las categóricas) se comparten entre todos los procesos; cada proceso sí tiene
+# su propia tabla de textos de cada categórica y construye su propio índice y
+# cubo la primera vez que una consulta los usa. Memoria aproximada: una copia
+# de las filas para todos, más (textos + índice + cubo) por proceso.
+#
+# POST /consulta acepta agregaciones arbitrarias (dimensiones, medidas y
+# filtros) y las responde por el camino más barato que las cubre: el cubo, los
+# índices o un escaneo (ver consultas_ventas). La respuesta indica el camino
+# usado y el tiempo de ejecución.
+#
+# Cada petición se mide (ver metricas): latencia, tamaño, peticiones en curso y
+# el reparto del tiempo entre cola, cálculo con pandas y serialización. GET
+# /metrics lo expone en formato Prometheus junto con el estado de los pools y
+# de la caché de respuestas; API_LENTO_MS activa el log de peticiones lentas.
+
+LIMITE_POR_DEFECTO = 1000
+LIMITE_MAXIMO = 10_000
+PRESUPUESTO_RESPUESTAS_MB = float(os.environ.get("CACHE_RESPUESTAS_MB", "16"))
+RUTA_DATOS = os.environ.get("API_RUTA_VENTAS", RUTA_VENTAS)
+SEGUNDOS_VIGILANCIA = float(os.environ.get("API_VIGILAR_SEGUNDOS", "0"))
+TOKEN_ADMIN = os.environ.get("API_TOKEN_ADMIN") # Sin token, los endpoints de administración no existen (404)
+MAX_DESCARGAS = int(os.environ.get("API_MAX_DESCARGAS", "2"))
+
+# Consultas simultáneas por endpoint (el resto espera turno hasta su plazo)
+LIMITES = {
+    "estadisticas": 2,
+    "ingresos_por_categoria": 2,
+    "datos": 8,
+    "filtro": 8,
+    "consulta": 2,
 }
-df = pd.DataFrame(data)
-df['Ingresos'] = df['Ventas'] * df['Precio']
+
+CACHE_RESPUESTAS = CacheLRU(int(PRESUPUESTO_RESPUESTAS_MB * 1024 * 1024))
+METRICAS = Metricas()
+
+
+_actual: MotorVentas = None
+_lock_recarga = threading.Lock()
+_recarga = {"hilo": None, "error": None, "recargas": 0}
+
+
+def instantanea() -> MotorVentas:
+    return _actual
+
+
+def _inicializar_trabajador(ruta_arrow: str, version: str):
+    # Cada proceso del ejecutor mapea la instantánea Arrow de su versión. Sin
+    # instantánea (no se pudo escribir) carga el CSV; si el archivo cambió justo
+    # entre la recarga y el arranque, sus consultas responden VersionCambiada.
+    global _actual
+    if ruta_arrow is None:
+        _actual = cargar_motor(RUTA_DATOS)
+    else:
+        _actual = MotorVentas(mapear_instantanea(ruta_arrow, version))
+
+
+def _instantanea_trabajador(version: str) -> MotorVentas:
+    snap = _actual
+    if snap is None or snap.version != version:
+        raise VersionCambiada(version)
+    return snap
+
+
+EJECUTOR = Ejecutor(LIMITES, inicializador=_inicializar_trabajador)
+DESCARGAS = LimiteFlujo("exportar", MAX_DESCARGAS)
+
+
+def recargar(ruta: str = RUTA_DATOS) -> MotorVentas:
+    # Construye la instantánea del archivo actual y la publica. Las recargas se
+    # hacen de a una; si el archivo no cambió se mantiene la vigente. Los
+    # procesos de la versión nueva se crean antes de publicarla, así ninguna
+    # consulta ve una versión que el ejecutor todavía no tiene.
+    global _actual
+    with _lock_recarga:
+        nuevo = cargar_motor(ruta)
+        if _actual is not nuevo:
+            nuevo.preparar()
+            try:
+                ruta_arrow = guardar_instantanea(nuevo.tabla, ruta, nuevo.version)
+            except OSError:
+                ruta_arrow = None # Sin permisos de escritura: cada proceso carga su copia
+            EJECUTOR.publicar(nuevo.version, ruta_arrow, nuevo.version)
+            _actual = nuevo # Publicación atómica: una sola asignación de referencia
+            _recarga["recargas"] += 1
+        return _actual
+
+
+def _recargar_y_registrar():
+    try:
+        recargar()
+        _recarga["error"] = None
+    except Exception as error: # El servidor sigue con la versión anterior
+        _recarga["error"] = f"{type(error).__name__}: {error}"
+
+
+def recargar_en_segundo_plano() -> bool:
+    # Devuelve False si ya había una recarga en curso
+    hilo = _recarga["hilo"]
+    if hilo is not None and hilo.is_alive():
+        return False
+    hilo = threading.Thread(target=_recargar_y_registrar, name="recarga-ventas", daemon=True)
+    _recarga["hilo"] = hilo
+    hilo.start()
+    return True
+
+
+def _firma(ruta: str):
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def _vigilar(parar: threading.Event, ruta: str, intervalo: float):
+    # Recarga cuando el archivo cambió y lleva un intervalo sin cambiar (así no
+    # se lee un archivo que todavía se está copiando)
+    cargada = _firma(ruta)
+    vista = cargada
+    while not parar.wait(intervalo):
+        firma = _firma(ruta)
+        if firma is not None and firma == vista and firma != cargada:
+            _recargar_y_registrar()
+            cargada = firma
+        vista = firma
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    recargar()
+    parar = threading.Event()
+    if SEGUNDOS_VIGILANCIA > 0:
+        threading.Thread(target=_vigilar, args=(parar, RUTA_DATOS, SEGUNDOS_VIGILANCIA),
+                         name="vigilante-ventas", daemon=True).start()
+    yield
+    parar.set()
+    EJECUTOR.cerrar()
+
+
+# Inicializar la aplicación FastAPI
+app = FastAPI(title="API de Resultados Analíticos con Pandas", lifespan=lifespan)
+app.add_middleware(MiddlewareMetricas, metricas=METRICAS)
+
+
+def respuesta_json(datos: pd.DataFrame) -> Response:
+    # Lista de registros serializada desde las columnas (los nulos salen como null)
+    contenido = datos.to_json(orient="records", force_ascii=False, double_precision=DECIMALES_VENTAS)
+    return Response(content=contenido, media_type="application/json")
+
+
+def _etag(clave: tuple) -> str:
+    # Misma clave (endpoint, parámetros, versión) => mismo cuerpo byte a byte
+    return '"' + hashlib.sha256(repr(clave).encode()).hexdigest()[:32] + '"'
+
+
+def _coincide_etag(request: Request, etag: str) -> bool:
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return False
+    etiquetas = [e.strip().removeprefix("W/") for e in cabecera.split(",")]
+    return etag in etiquetas or "*" in etiquetas
+
+
+async def respuesta_cacheada(request: Request, snap: MotorVentas, nombre: str, tarea, *args) -> Response:
+    # tarea(version, *args) devuelve el cuerpo JSON; se ejecuta en el pool de
+    # procesos solo si la respuesta no está en la caché
+    clave = (nombre,) + args + (snap.version,)
+    etag = _etag(clave)
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache"} # El cliente revalida siempre con el ETag
+    if _coincide_etag(request, etag):
+        return Response(status_code=304, headers=cabeceras)
+    cuerpo = CACHE_RESPUESTAS.obtener(clave)
+    if cuerpo is None:
+        cuerpo = await EJECUTOR.ejecutar(nombre, tarea, snap.version, *args, version=snap.version)
+        CACHE_RESPUESTAS.guardar(clave, cuerpo)
+    return Response(content=cuerpo, media_type="application/json", headers=cabeceras)
+
+
+def _columnas(snap: MotorVentas, fields: Optional[str]) -> list:
+    if not fields:
+        return list(snap.df.columns)
+    columnas = [c.strip() for c in fields.split(",") if c.strip()]
+    desconocidas = [c for c in columnas if c not in snap.df.columns]
+    if desconocidas:
+        raise HTTPException(status_code=400, detail=f"Columnas desconocidas: {', '.join(desconocidas)}")
+    return columnas
+
+
+def _orden(snap: MotorVentas, sort: Optional[str]):
+    # "Ventas_GLOBALES" -> ascendente, "-Ventas_GLOBALES" -> descendente
+    if not sort:
+        return None, True
+    columna = sort.lstrip("-")
+    if columna not in snap.df.columns:
+        raise HTTPException(status_code=400, detail=f"No se puede ordenar por '{columna}'")
+    return columna, not sort.startswith("-")
+
+
+def _codificar_cursor(consulta: list, desde: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps(consulta + [desde]).encode()).decode()
+
+
+def _leer_cursor(cursor: Optional[str], consulta: list) -> int:
+    if not cursor:
+        return 0
+    try:
+        *consulta_cursor, desde = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+    if consulta_cursor != consulta or not isinstance(desde, int) or desde < 0:
+        # Otra consulta, u otra versión del dataset: las posiciones ya no valen
+        raise HTTPException(status_code=400, detail="El cursor no corresponde a esta consulta o a estos datos")
+    return desde
+
+
+def pagina(snap: MotorVentas, filas: np.ndarray, consulta: list, limit: int, cursor: Optional[str],
+           fields: Optional[str], sort: Optional[str]) -> Response:
+    # filas: posiciones que cumplen el filtro, en el orden original
+    columnas = _columnas(snap, fields)
+    columna_orden, ascendente = _orden(snap, sort)
+    consulta = [snap.version] + consulta + [sort or ""]
+    desde = _leer_cursor(cursor, consulta)
+
+    with fase("calculo"):
+        if columna_orden is not None:
+            filas = snap.indice.ordenar(filas, columna_orden, ascendente)
+        visibles = filas[desde:desde + limit]
+        df = snap.df
+        seleccion = df.iloc[visibles, [df.columns.get_loc(c) for c in columnas]]
+    with fase("serializacion"):
+        respuesta = respuesta_json(seleccion)
+    respuesta.headers["X-Total-Filas"] = str(len(filas))
+    if desde + limit < len(filas):
+        respuesta.headers["X-Cursor-Siguiente"] = _codificar_cursor(consulta, desde + limit)
+    return respuesta
+
+
+# --- Tareas que se ejecutan en los procesos del pool ---
+
+def tarea_estadisticas(version: str) -> str:
+    with fase("calculo"):
+        estadisticas = _instantanea_trabajador(version).estadisticas()
+    with fase("serializacion"):
+        return estadisticas.to_json()
+
+
+def tarea_ingresos_por_categoria(version: str) -> str:
+    with fase("calculo"):
+        ingresos = _instantanea_trabajador(version).ingresos_por_categoria()
+    with fase("serializacion"):
+        return ingresos.to_json()
+
+
+def tarea_consulta(version: str, consulta: dict) -> str:
+    snap = _instantanea_trabajador(version)
+    plan = None if consulta["plan"] == "auto" else consulta["plan"]
+    with fase("calculo"):
+        plan, milisegundos, resultado = snap.consultar(consulta, plan)
+    with fase("serializacion"):
+        filas = resultado.to_json(orient="records", force_ascii=False, double_precision=DECIMALES_VENTAS + 2)
+    return (f'{{"plan":"{plan}","tiempo_ms":{milisegundos:.3f},"grupos":{len(resultado)},'
+            f'"version":{json.dumps(version)},"filas":{filas}}}')
+
+
+def verificar_admin(x_token_admin: Optional[str] = Header(None)):
+    # Falla cerrado: sin API_TOKEN_ADMIN configurado no se puede administrar
+    if not TOKEN_ADMIN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_token_admin or "", TOKEN_ADMIN):
+        raise HTTPException(status_code=403, detail="Token de administración no válido")
+
 
 # Modelo Pydantic para validar parámetros de entrada (opcional)
 class FiltroCategoria(BaseModel):
     categoria: Optional[str] = None
 
+
+class FiltroConsulta(BaseModel):
+    columna: str
+    op: Literal["==", "!=", "in", "not in", ">", ">=", "<", "<=", "between", "is null", "not null"] = "=="
+    valor: Any = None
+
+
+class MedidaConsulta(BaseModel):
+    funcion: Literal["sum", "mean", "count", "top"] = "sum"
+    columna: str = "Ventas_GLOBALES"
+    k: int = Field(10, ge=1, le=100) # Solo para top
+
+
+class Consulta(BaseModel):
+    por: list[str] = []
+    medidas: list[MedidaConsulta] = [MedidaConsulta()]
+    filtros: list[FiltroConsulta] = []
+    orden: Optional[str] = None # Medida o dimensión; "-" delante para descendente
+    limite: int = Field(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO)
+    plan: Literal["auto", "cubo", "indice", "escaneo"] = "auto" # Forzar un camino (para comparar)
+
+
+def filas_filtradas(snap: MotorVentas, filtro: FiltroCategoria) -> np.ndarray:
+    if filtro.categoria:
+        return snap.filas(Igual('Género', filtro.categoria))
+    return snap.filas()
+
 # Endpoint raíz
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Bienvenido a la API de resultados analíticos con Pandas"}
 
-# Endpoint para obtener el DataFrame completo
+# Endpoint para obtener el DataFrame completo (por páginas)
 @app.get("/datos")
-def get_datos():
-    return df.to_dict(orient="records")
+async def get_datos(limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO), cursor: Optional[str] = None,
+                    fields: Optional[str] = None, sort: Optional[str] = None):
+    snap = instantanea()
+    return await EJECUTOR.ejecutar(
+        "datos", lambda: pagina(snap, np.arange(len(snap.df)), ["datos"], limit, cursor, fields, sort), proceso=False)
 
 # Endpoint para estadísticas descriptivas
 @app.get("/estadisticas")
-def get_estadisticas():
-    estadisticas = df.describe().to_dict()
-    return estadisticas
+async def get_estadisticas(request: Request):
+    return await respuesta_cacheada(request, instantanea(), "estadisticas", tarea_estadisticas)
 
-# Endpoint para filtrar por categoría
+# Endpoint para filtrar por categoría (género)
 @app.post("/filtro")
-def filtrar_por_categoria(filtro: FiltroCategoria):
-    if filtro.categoria:
-        df_filtrado = df[df['Categoría'] == filtro.categoria]
-    else:
-        df_filtrado = df
-    return df_filtrado.to_dict(orient="records")
+async def filtrar_por_categoria(filtro: FiltroCategoria,
+                                limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                                cursor: Optional[str] = None, fields: Optional[str] = None,
+                                sort: Optional[str] = None):
+    snap = instantanea()
+    return await EJECUTOR.ejecutar(
+        "filtro", lambda: pagina(snap, filas_filtradas(snap, filtro), ["filtro", filtro.categoria],
+                                 limit, cursor, fields, sort), proceso=False)
+
+def _adjunto(base: str, extension: str) -> str:
+    # Content-Disposition seguro para cualquier texto: filename solo con
+    # [A-Za-z0-9_-] (las cabeceras son Latin-1 y las comillas o ';' las
+    # romperían) y el nombre completo en UTF-8 según RFC 5987
+    ascii_ = re.sub(r"[^A-Za-z0-9_-]+", "_", base).strip("_-") or "ventas"
+    return f"attachment; filename=\"{ascii_}.{extension}\"; filename*=UTF-8''{quote(base + '.' + extension, safe='')}"
+
+# Endpoint para exportar el dataset (o una categoría) en Arrow IPC o Parquet
+@app.get("/exportar")
+def exportar(request: Request, filtro: FiltroCategoria = Depends(),
+             formato: Optional[str] = Query(None, pattern="^(arrow|parquet)$"), fields: Optional[str] = None):
+    snap = instantanea()
+    if formato is None:
+        aceptados = request.headers.get("accept", "")
+        formato = "parquet" if TIPOS_MEDIO["parquet"] in aceptados else "arrow"
+    tabla = snap.tabla.select(_columnas(snap, fields))
+    filas = filas_filtradas(snap, filtro) if filtro.categoria else None # Sin filtro: lotes sin copia
+    nombre = f"ventas{'-' + filtro.categoria if filtro.categoria else ''}"
+    return StreamingResponse(DESCARGAS.envolver(flujo(formato, tabla, filas)), media_type=TIPOS_MEDIO[formato],
+                             headers={"Content-Disposition": _adjunto(nombre, EXTENSIONES[formato]),
+                                      "X-Version-Datos": snap.version})
 
-# Endpoint para obtener ingresos totales por categoría
+# Endpoint para obtener ingresos totales (ventas globales) por categoría
 @app.get("/ingresos_por_categoria")
-def get_ingresos_por_categoria():
-    ingresos = df.groupby('Categoría')['Ingresos'].sum().to_dict()
-    return ingresos
\ No newline at end of file
+async def get_ingresos_por_categoria(request: Request):
+    return await respuesta_cacheada(request, instantanea(), "ingresos_por_categoria", tarea_ingresos_por_categoria)
+
+# Endpoint para agregaciones a medida (dimensiones, medidas y filtros)
+@app.post("/consulta")
+async def consultar(consulta: Consulta):
+    snap = instantanea()
+    try:
+        cuerpo = await EJECUTOR.ejecutar("consulta", tarea_consulta, snap.version, consulta.model_dump(),
+                                         version=snap.version)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return Response(content=cuerpo, media_type="application/json")
+
+# Endpoints de administración: recarga del dataset y estado
+@app.post("/admin/recargar", status_code=202, dependencies=[Depends(verificar_admin)])
+def admin_recargar():
+    iniciada = recargar_en_segundo_plano()
+    return {"recarga": "iniciada" if iniciada else "en curso", "version": instantanea().version}
+
+@app.get("/admin/estado", dependencies=[Depends(verificar_admin)])
+async def admin_estado():
+    snap = instantanea()
+    hilo = _recarga["hilo"]
+    return {
+        "version": snap.version,
+        "filas": len(snap.df),
+        "cargada": snap.cargado,
+        "recargas": _recarga["recargas"],
+        "recarga_en_curso": hilo is not None and hilo.is_alive(),
+        "ultimo_error": _recarga["error"],
+        "ruta": RUTA_DATOS,
+        "vigilancia_segundos": SEGUNDOS_VIGILANCIA,
+        "consultas_en_curso": EJECUTOR.ocupados(),
+        "pools": EJECUTOR.pools(), # Versión -> trabajos en curso (el anterior sigue hasta vaciarse)
+        "rechazadas": EJECUTOR.rechazadas,
+        "vencidas": EJECUTOR.vencidas,
+    }
+
+# Métricas en formato de texto de Prometheus
+@app.get("/metrics")
+async def metrics():
+    snap = instantanea()
+    cache = CACHE_RESPUESTAS.estadisticas()
+    extra = [
+        ("api_consultas_ocupadas", "gauge", "Consultas en ejecución o esperando turno en los pools",
+         ("endpoint",), {(e,): n for e, n in EJECUTOR.ocupados().items()}),
+        ("api_pool_trabajos", "gauge", "Trabajos en curso en el pool de procesos de cada versión",
+         ("version",), {(v,): n for v, n in EJECUTOR.pools().items()}),
+        ("api_consultas_rechazadas_total", "counter", "Consultas sin turno dentro del plazo (503)",
+         ("endpoint",), {(e,): n for e, n in EJECUTOR.rechazadas.items()}),
+        ("api_consultas_vencidas_total", "counter", "Consultas que superaron el plazo (504)",
+         ("endpoint",), {(e,): n for e, n in EJECUTOR.vencidas.items()}),
+        ("api_cache_respuestas_total", "counter", "Consultas a la caché de respuestas",
+         ("resultado",), {("acierto",): cache["aciertos"], ("fallo",): cache["fallos"]}),
+        ("api_cache_respuestas_bytes", "gauge", "Bytes ocupados por la caché de respuestas",
+         (), {(): cache["bytes"]}),
+        ("api_dataset_filas", "gauge", "Filas del dataset vigente", ("version",), {(snap.version,): len(snap.df)}),
+        ("api_recargas_total", "counter", "Versiones del dataset publicadas", (), {(): _recarga["recargas"]}),
+    ]
+    return Response(content=METRICAS.exponer(extra), media_type="text/plain; version=0.0.4; charset=utf-8")
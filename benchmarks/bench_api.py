@@ -0,0 +1,87 @@
+# Serialización de las respuestas de api_analytics: el camino original
+# (to_dict por filas + jsonable_encoder + json.dumps de FastAPI) frente al
+# encoder JSON de pandas que escribe directamente desde las columnas, y
+# exportación por lotes en Arrow IPC / Parquet (tiempo hasta el primer lote).
+# Uso: python benchmarks/bench_api.py [--filas 1000000]
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from api_analytics import respuesta_json  # noqa: E402
+from datos_ventas import DECIMALES_VENTAS, cargar_ventas, limpiar_ventas  # noqa: E402
+from exportar_ventas import a_arrow, flujo  # noqa: E402
+
+
+def por_registros(df) -> bytes:
+    return JSONResponse(jsonable_encoder(df.to_dict(orient="records"))).body
+
+
+def por_columnas(df) -> bytes:
+    return respuesta_json(df).body
+
+
+def cronometrar(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        cuerpo = funcion()
+    return (time.perf_counter() - inicio) / repeticiones, cuerpo
+
+
+def exportar(formato, tabla):
+    inicio = time.perf_counter()
+    primero = None
+    total = 0
+    for datos in flujo(formato, tabla):
+        if primero is None:
+            primero = time.perf_counter() - inicio
+        total += len(datos)
+    return primero, time.perf_counter() - inicio, total
+
+
+def normalizar(registros):
+    # El camino original emite los float32 con todo su ruido (41.4900016784668)
+    return [{k: round(v, DECIMALES_VENTAS) if isinstance(v, float) and not math.isnan(v) else v
+             for k, v in fila.items()} for fila in registros]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON de la API")
+    parser.add_argument("--filas", type=int, default=0, help="Filas sintéticas (0 = assets/vgsales.csv)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.filas:
+        from generar_ventas import generar_bloque
+        df = limpiar_ventas(generar_bloque(np.random.default_rng(0), 0, args.filas))
+    else:
+        df = cargar_ventas()
+    print(f"{len(df):,} filas")
+
+    t_registros, cuerpo_registros = cronometrar(lambda: por_registros(df), args.repeticiones)
+    t_columnas, cuerpo_columnas = cronometrar(lambda: por_columnas(df), args.repeticiones)
+
+    iguales = normalizar(json.loads(cuerpo_registros)) == json.loads(cuerpo_columnas)
+    print("Paridad: OK" if iguales else "Paridad: FALLO")
+    for nombre, segundos, cuerpo in [("to_dict + jsonable_encoder", t_registros, cuerpo_registros),
+                                     ("to_json por columnas", t_columnas, cuerpo_columnas)]:
+        print(f"{nombre:28s} {segundos * 1000:8.0f} ms  {len(cuerpo) / 1e6:7.1f} MB  "
+              f"{len(cuerpo) / segundos / 1e6:7.1f} MB/s")
+    print(f"Aceleración: {t_registros / t_columnas:.1f}x")
+
+    tabla = a_arrow(df)
+    for formato in ["arrow", "parquet"]:
+        primero, segundos, total = exportar(formato, tabla)
+        print(f"exportar {formato:19s} {segundos * 1000:8.0f} ms  {total / 1e6:7.1f} MB  "
+              f"{total / segundos / 1e6:7.1f} MB/s  (primer lote en {primero * 1000:.1f} ms)")
+    sys.exit(0 if iguales else 1)
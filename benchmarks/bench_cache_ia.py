@@ -0,0 +1,106 @@
+# Caché de contenido de la página de IA (cache_ia.py) sin llamar a Gemini: un
+# generador simulado tarda --generacion-ms por respuesta. Mide una ronda de
+# prompts repetidos con y sin caché, y comprueba que la clave cambia con el
+# prompt, el modelo, la temperatura y max_output_tokens, que el espacio no
+# pasa de CACHE_IA_MB (LRU) y la tasa de aciertos. La caché va a un directorio
+# temporal.
+# Uso: python benchmarks/bench_cache_ia.py [--prompts 20 --repeticiones 5 --generacion-ms 50]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("CACHE_DISCO_RUTA", os.path.join(tempfile.mkdtemp(), "respuestas.sqlite3"))
+os.environ.setdefault("CACHE_IA_MB", "0.05")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import cache_ia  # noqa: E402
+from cache_ia import buscar, clave_prompt, estadisticas, guardar  # noqa: E402
+
+MODELO = "gemini-1.5-flash"
+
+
+def generar(prompt: str, segundos: float) -> str:
+    time.sleep(segundos)
+    return f"Contenido para: {prompt}\n" + "texto de marketing " * 100
+
+
+def generar_con_cache(prompt: str, segundos: float, temperatura: float = 0.7, max_tokens: int = 400) -> str:
+    clave = clave_prompt(prompt, MODELO, temperatura, max_tokens)
+    texto = buscar(clave)
+    if texto is None:
+        texto = generar(prompt, segundos)
+        guardar(clave, texto)
+    return texto
+
+
+def comprobar(nombre: str, ok: bool, detalle: str) -> bool:
+    print(f"{'OK   ' if ok else 'FALLO'} {nombre:44s} {detalle}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Caché de contenido generado con Gemini")
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--generacion-ms", type=float, default=50)
+    args = parser.parse_args()
+    segundos = args.generacion_ms / 1000
+    resultados = []
+
+    # Varias sesiones pidiendo los mismos productos (pocos prompts distintos)
+    ronda = [f"Producto {i}" for i in range(args.prompts)] * args.repeticiones
+    random.Random(0).shuffle(ronda)
+    inicio = time.perf_counter()
+    sin_cache = [generar(prompt, segundos) for prompt in ronda]
+    t_sin = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    con_cache = [generar_con_cache(prompt, segundos) for prompt in ronda]
+    t_con = time.perf_counter() - inicio
+    stats = estadisticas()
+    print(f"{len(ronda)} generaciones, {args.prompts} prompts distintos: sin caché {t_sin * 1000:.0f} ms, "
+          f"con caché {t_con * 1000:.0f} ms")
+    resultados.append(comprobar("mismo contenido con y sin caché", sin_cache == con_cache, ""))
+    esperada = 1 - args.prompts / len(ronda)
+    resultados.append(comprobar("tasa de aciertos", abs(stats["tasa"] - esperada) < 1e-9,
+                                f"{stats['aciertos']}/{stats['aciertos'] + stats['fallos']} ({stats['tasa']:.0%})"))
+
+    # La clave distingue cada parámetro de la generación
+    base = ("Producto 0", MODELO, 0.7, 400)
+    variantes = [("Producto 1", MODELO, 0.7, 400), ("Producto 0", "gemini-1.5-pro", 0.7, 400),
+                 ("Producto 0", MODELO, 0.9, 400), ("Producto 0", MODELO, 0.7, 200)]
+    claves = {clave_prompt(*base)} | {clave_prompt(*v) for v in variantes}
+    resultados.append(comprobar("clave por prompt, modelo, temperatura y tokens",
+                                len(claves) == 1 + len(variantes) and clave_prompt(*base) == clave_prompt(*base),
+                                f"{len(claves)} claves distintas"))
+
+    # Una entrada guardada que quien la pide no acepta es un fallo, no un acierto
+    clave = clave_prompt("Sin lista", MODELO, 0.7, 400)
+    guardar(clave, "Texto sin lista numerada")
+    antes = estadisticas()
+    descartada = buscar(clave, lambda texto: texto.lstrip().startswith("1."))
+    aceptada = buscar(clave, lambda texto: bool(texto.strip()))
+    despues = estadisticas()
+    cambios = {k: despues[k] - antes[k] for k in ("aciertos", "fallos", "descartadas")}
+    resultados.append(comprobar("entrada no válida cuenta como fallo",
+                                descartada is None and aceptada is not None
+                                and cambios == {"aciertos": 1, "fallos": 1, "descartadas": 1},
+                                f"aciertos +{cambios['aciertos']}, fallos +{cambios['fallos']}, "
+                                f"descartadas +{cambios['descartadas']}"))
+
+    # LRU: el espacio no pasa del máximo y se conserva lo usado recientemente
+    maximo = int(cache_ia.MAX_MB * 1024 * 1024)
+    for i in range(200):
+        generar_con_cache(f"Relleno {i}", 0)
+        generar_con_cache("Producto 0", 0) # Se usa siempre: no debe salir
+    ocupado = estadisticas()["bytes"]
+    antes = estadisticas()["aciertos"]
+    generar_con_cache("Producto 0", 0)
+    resultados.append(comprobar("LRU acotado por CACHE_IA_MB",
+                                ocupado <= maximo and estadisticas()["aciertos"] == antes + 1
+                                and buscar(clave_prompt("Relleno 0", MODELO, 0.7, 400)) is None,
+                                f"{ocupado} bytes de {maximo}, {estadisticas()['entradas']} entradas"))
+    sys.exit(0 if all(resultados) else 1)
@@ -0,0 +1,125 @@
+# Clima de las 13 ciudades contra el servidor local de benchmarks/servidor_clima.py:
+# el camino original (un requests.get nuevo por ciudad, una detrás de otra)
+# frente a clima.consultar, el mismo camino que usa la página (lote concurrente
+# sobre la sesión con pool), en frío y con las conexiones ya abiertas (vaciando
+# antes la caché de clima). Comprueba que ambos caminos devuelven los
+# mismos datos y cuenta las conexiones que abre cada uno. Después mide la caché
+# por ciudad: tras invalidar una ciudad, consultar devuelve al instante la
+# observación anterior y el refresco en segundo plano la reemplaza. Cada paso
+# comprueba los aciertos, fallos y vencidas de la caché (contadores_cache) y las
+# peticiones que llegan al servicio; termina con código 1 si algo no coincide.
+# Uso: python benchmarks/bench_clima.py [--latencia-ms 80 --handshake-ms 150]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+# Caché en disco y cuota propias: no se mezclan con las de la app ni con otras ejecuciones
+os.environ.setdefault("CACHE_DISCO_RUTA", os.path.join(tempfile.mkdtemp(), "respuestas.sqlite3"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from clima import CIUDADES, actualizando, consultar, contadores_cache, invalidar, limpiar_cache  # noqa: E402
+from servidor_clima import iniciar  # noqa: E402
+
+CLAVE = "clave-de-prueba"
+
+
+def secuencial_sin_sesion(url: str) -> dict:
+    datos = {}
+    for ciudad in CIUDADES:
+        respuesta = requests.get(url, params={"q": ciudad, "appid": CLAVE, "units": "metric", "lang": "es"})
+        respuesta.raise_for_status()
+        datos[ciudad] = respuesta.json()
+    return datos
+
+
+def lote(url: str):
+    # Las 13 ciudades como las pide la página, sin caché y esperando a todas.
+    # Devuelve ({ciudad: datos}, {ciudad: error})
+    limpiar_cache()
+    observaciones = consultar(CIUDADES, CLAVE, url, presupuesto=60)
+    datos = {ciudad: o.datos for ciudad, o in observaciones.items() if o.datos is not None}
+    errores = {ciudad: o.error for ciudad, o in observaciones.items() if o.datos is None}
+    return datos, errores
+
+
+def medir(servidor, nombre: str, funcion, esperado: tuple = None):
+    # esperado: (aciertos, fallos, vencidas, peticiones al servicio) del paso,
+    # peticiones None si no se comprueban; devuelve (resultado, coincide)
+    antes, cache = dict(servidor.contadores), contadores_cache()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    conexiones = servidor.contadores["conexiones"] - antes["conexiones"]
+    peticiones = servidor.contadores["peticiones"] - antes["peticiones"]
+    obtenido = tuple(contadores_cache()[k] - cache[k] for k in ("aciertos", "fallos", "vencidas")) + (peticiones,)
+    linea = f"{nombre:36s} {segundos * 1000:8.0f} ms  {peticiones:3d} peticiones  {conexiones:3d} conexiones nuevas"
+    if esperado is None:
+        print(linea)
+        return resultado, True
+    coincide = obtenido[:3] == esperado[:3] and esperado[3] in (None, peticiones)
+    detalle = f"esperado {esperado[0]}/{esperado[1]}/{esperado[2]}"
+    if esperado[3] is not None:
+        detalle += f", {esperado[3]} peticiones"
+    print(f"{linea}  caché {obtenido[0]}/{obtenido[1]}/{obtenido[2]} {'OK' if coincide else f'FALLO ({detalle})'}")
+    return resultado, coincide
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del lote concurrente de clima")
+    parser.add_argument("--latencia-ms", type=float, default=80)
+    parser.add_argument("--handshake-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    servidor = iniciar(latencia_ms=args.latencia_ms, handshake_ms=args.handshake_ms)
+    print(f"{len(CIUDADES)} ciudades, latencia {args.latencia_ms:g} ms, handshake {args.handshake_ms:g} ms")
+
+    n = len(CIUDADES)
+    contadores = [] # Pasos cuyos contadores coinciden con lo esperado
+    original, _ = medir(servidor, "secuencial, requests.get por ciudad", lambda: secuencial_sin_sesion(servidor.url))
+    (frio, errores), ok = medir(servidor, "consultar (pool en frío)", lambda: lote(servidor.url), (0, n, 0, n))
+    contadores.append(ok)
+    (caliente, _), ok = medir(servidor, "consultar (pool caliente)", lambda: lote(servidor.url), (0, n, 0, n))
+    contadores.append(ok)
+    desconocida, ok = medir(servidor, "ciudad desconocida (404)",
+                            lambda: consultar(["Atlántida"], CLAVE, servidor.url, presupuesto=60), (0, 1, 0, 1))
+    contadores.append(ok)
+    errores_desconocida = desconocida["Atlántida"].datos is None and desconocida["Atlántida"].error is not None
+
+    ciudad = CIUDADES[0]
+    limpiar_cache()
+    _, ok = medir(servidor, "caché por ciudad (primera consulta)", lambda: consultar([ciudad], CLAVE, servidor.url),
+                  (0, 1, 0, 1))
+    contadores.append(ok)
+    anterior, ok = medir(servidor, "caché por ciudad (segunda consulta)",
+                         lambda: consultar([ciudad], CLAVE, servidor.url), (1, 0, 0, 0))
+    contadores.append(ok)
+    anterior = anterior[ciudad]
+    invalidar([ciudad], CLAVE, servidor.url)
+    antes = servidor.contadores["peticiones"]
+    vieja, ok = medir(servidor, "caché tras invalidar (sin esperar)", lambda: consultar([ciudad], CLAVE, servidor.url),
+                      (0, 0, 1, None)) # El refresco en segundo plano puede llegar al servicio antes o después
+    contadores.append(ok)
+    while actualizando([ciudad], CLAVE, servidor.url):
+        time.sleep(0.01)
+    refrescos = servidor.contadores["peticiones"] - antes
+    print(f"{'refresco en segundo plano':36s} {refrescos:11d} peticiones  {'OK' if refrescos == 1 else 'FALLO'}")
+    contadores.append(refrescos == 1)
+    nueva, ok = medir(servidor, "caché tras el refresco", lambda: consultar([ciudad], CLAVE, servidor.url), (1, 0, 0, 0))
+    contadores.append(ok)
+    nueva = nueva[ciudad]
+    servidor.shutdown()
+    revalidada = (vieja[ciudad].datos is anterior.datos and nueva.fecha > anterior.fecha
+                  and nueva.datos == anterior.datos)
+
+    paridad = original == frio == caliente and not errores
+    print("Paridad: OK" if paridad else f"Paridad: FALLO {errores}")
+    print(f"Ciudad desconocida: {'error informado' if errores_desconocida else 'FALLO'}")
+    print(f"Stale-while-revalidate: {'OK' if revalidada else 'FALLO'}")
+    print(f"Aciertos/fallos/vencidas y peticiones: {'OK' if all(contadores) else 'FALLO'}")
+    sys.exit(0 if paridad and errores_desconocida and revalidada and all(contadores) else 1)
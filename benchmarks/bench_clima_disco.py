@@ -0,0 +1,133 @@
+# Caché de clima en disco compartida entre procesos, contra el servidor local de
+# benchmarks/servidor_clima.py:
+# - reinicio: un proceso nuevo encuentra en disco lo que pidió el anterior y no
+#   llama al servicio;
+# - réplicas: varios procesos que arrancan a la vez en frío piden cada ciudad
+#   una sola vez entre todos (las reservas hacen que los demás esperen);
+# - cuota: procesos que disparan muchas más peticiones de las permitidas no
+#   pasan de la cubeta de fichas compartida.
+# Cada proceso es este mismo script con --trabajador. La caché va a un
+# directorio temporal.
+# Uso: python benchmarks/bench_clima_disco.py [--procesos 4 --latencia-ms 200]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from clima import CIUDADES  # noqa: E402
+
+CLAVE = "clave-de-prueba"
+
+
+def trabajador(modo: str, peticiones: int):
+    # Corre en un proceso aparte; imprime un JSON con lo que obtuvo
+    import clima
+    from cache_disco import CuotaAgotada
+
+    if modo == "consultar":
+        observaciones = clima.consultar(clima.CIUDADES, CLAVE, presupuesto=30)
+        print(json.dumps({"con_datos": sum(o.datos is not None for o in observaciones.values()),
+                          **clima.contadores_cache()}))
+    else: # rafaga: muchas peticiones seguidas, sin caché, hasta agotar la cuota
+        aceptadas = rechazadas = errores = 0
+        for i in range(peticiones):
+            try:
+                clima.obtener_clima(clima.CIUDADES[i % len(clima.CIUDADES)], CLAVE, plazo=0.5)
+                aceptadas += 1
+            except CuotaAgotada:
+                rechazadas += 1
+            except clima.ERRORES_CLIMA: # Plazo vencido, conexión o respuesta inválida: se cuenta y sigue
+                errores += 1
+        print(json.dumps({"aceptadas": aceptadas, "rechazadas": rechazadas, "errores": errores}))
+
+
+def lanzar(n: int, modo: str, entorno: dict, peticiones: int = 0) -> list:
+    procesos = [subprocess.Popen([sys.executable, __file__, "--trabajador", modo, "--peticiones", str(peticiones)],
+                                 env=entorno, stdout=subprocess.PIPE, text=True) for _ in range(n)]
+    salidas = []
+    for proceso in procesos:
+        lineas = proceso.communicate()[0].strip().splitlines()
+        if proceso.returncode != 0 or not lineas: # El trabajador falló: su traza ya salió por stderr
+            sys.exit(f"El trabajador {modo} terminó con código {proceso.returncode} sin resultado")
+        salidas.append(json.loads(lineas[-1]))
+    return salidas
+
+
+def comprobar(nombre: str, ok: bool, detalle: str) -> bool:
+    print(f"{'OK   ' if ok else 'FALLO'} {nombre:52s} {detalle}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Caché de clima en disco entre procesos")
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--latencia-ms", type=float, default=200)
+    parser.add_argument("--por-minuto", type=float, default=60)
+    parser.add_argument("--trabajador", choices=["consultar", "rafaga"])
+    parser.add_argument("--peticiones", type=int, default=0)
+    args = parser.parse_args()
+    if args.trabajador:
+        trabajador(args.trabajador, args.peticiones)
+        sys.exit(0)
+
+    from servidor_clima import iniciar
+
+    servidor = iniciar(latencia_ms=args.latencia_ms)
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        entorno = dict(os.environ, OPENWEATHER_URL=servidor.url, CLIMA_POR_MINUTO=str(args.por_minuto),
+                       CACHE_DISCO_RUTA=os.path.join(directorio, "respuestas.sqlite3"))
+        n = len(CIUDADES)
+        print(f"{n} ciudades, {args.procesos} procesos, latencia {args.latencia_ms:g} ms, "
+              f"cuota {args.por_minuto:g}/min")
+
+        # Réplicas en frío a la vez: una petición por ciudad entre todas
+        inicio = primera = time.perf_counter()
+        salidas = lanzar(args.procesos, "consultar", entorno)
+        segundos = time.perf_counter() - inicio
+        peticiones = servidor.contadores["peticiones"]
+        # Ningún proceso tiene nada en memoria ni en disco: cada uno espera sus n ciudades
+        resultados.append(comprobar(f"{args.procesos} procesos en frío a la vez",
+                                    peticiones == n and all(s["con_datos"] == n and s["fallos"] == n
+                                                            and s["aciertos"] == s["vencidas"] == 0 for s in salidas),
+                                    f"{peticiones} peticiones al servicio (sin disco: {n * args.procesos}), "
+                                    f"{segundos:.1f} s"))
+
+        # Reinicio: un proceso nuevo lee del disco
+        antes = servidor.contadores["peticiones"]
+        salida = lanzar(1, "consultar", entorno)[0]
+        peticiones = servidor.contadores["peticiones"] - antes
+        resultados.append(comprobar("proceso nuevo tras reiniciar",
+                                    peticiones == 0 and salida["con_datos"] == n and salida["aciertos"] == n
+                                    and salida["fallos"] == salida["vencidas"] == 0,
+                                    f"{peticiones} peticiones al servicio, {salida['aciertos']} aciertos desde disco"))
+
+        # Cuota: las réplicas juntas no pasan de la cubeta compartida. Todas las
+        # peticiones desde el primer paso salen de ella: como mucho la ráfaga
+        # inicial más lo que se repuso desde entonces. Una petición con error
+        # (p. ej. el plazo de 0.5 s se fue esperando ficha) puede haber llegado
+        # al servicio o no
+        antes = servidor.contadores["peticiones"]
+        salidas = lanzar(2, "rafaga", entorno, peticiones=int(args.por_minuto))
+        aceptadas = sum(s["aceptadas"] for s in salidas)
+        rechazadas = sum(s["rechazadas"] for s in salidas)
+        errores = sum(s["errores"] for s in salidas)
+        total = servidor.contadores["peticiones"]
+        permitidas = args.por_minuto + (time.perf_counter() - primera) * args.por_minuto / 60
+        resultados.append(comprobar("2 procesos disparando el doble de la cuota",
+                                    aceptadas <= total - antes <= aceptadas + errores
+                                    and total <= permitidas + 1 and rechazadas > 0,
+                                    f"{total} al servicio en total (máximo {permitidas:.0f}), "
+                                    f"{rechazadas} rechazadas por cuota"))
+        resultados.append(comprobar("ráfaga: cada petición con un resultado",
+                                    aceptadas + rechazadas + errores == 2 * int(args.por_minuto),
+                                    f"{aceptadas} aceptadas + {rechazadas} rechazadas + {errores} errores "
+                                    f"de {2 * int(args.por_minuto)}"))
+    servidor.shutdown()
+    sys.exit(0 if all(resultados) else 1)
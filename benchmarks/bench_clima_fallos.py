@@ -0,0 +1,153 @@
+# Comportamiento de clima.py con el servidor local de benchmarks/servidor_clima.py
+# fallando: 200 con un cuerpo que no es JSON (cuenta como fallo del circuito),
+# 503 intermitentes (se reintentan), servidor colgado (la página no
+# espera más que su presupuesto y sigue mostrando el último dato bueno) y
+# circuito abierto (las peticiones fallan al instante sin tocar la red) hasta
+# que el servidor se recupera. En las consultas comprueba también si la caché
+# contó acierto, fallo o vencida. Timeouts y plazos reducidos para que tarde poco;
+# se pueden cambiar con las mismas variables de entorno CLIMA_*.
+# Uso: python benchmarks/bench_clima_fallos.py
+import os
+import sys
+import tempfile
+import time
+
+# Caché en disco y cuota propias: no se mezclan con las de la app ni con otras ejecuciones
+os.environ.setdefault("CACHE_DISCO_RUTA", os.path.join(tempfile.mkdtemp(), "respuestas.sqlite3"))
+os.environ.setdefault("CLIMA_TIMEOUT_LECTURA", "0.3")
+os.environ.setdefault("CLIMA_PLAZO_SEGUNDOS", "1.5")
+os.environ.setdefault("CLIMA_PRESUPUESTO_SEGUNDOS", "0.5")
+os.environ.setdefault("CLIMA_ESPERA_BASE", "0.05")
+os.environ.setdefault("CLIMA_UMBRAL_FALLOS", "5")
+os.environ.setdefault("CLIMA_ENFRIAMIENTO_SEGUNDOS", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import clima  # noqa: E402
+from clima import (CircuitoAbierto, actualizando, consultar, contadores_cache, estado_upstream, invalidar,  # noqa: E402
+                   obtener_clima)
+from servidor_clima import iniciar  # noqa: E402
+
+CLAVE = "clave-de-prueba"
+
+
+def esperar_refresco(ciudades: list, url: str):
+    while actualizando(ciudades, CLAVE, url):
+        time.sleep(0.01)
+
+
+def cache_desde(antes: dict) -> tuple:
+    # (aciertos, fallos, vencidas) de la caché de clima desde `antes`
+    ahora = contadores_cache()
+    return tuple(ahora[k] - antes[k] for k in ("aciertos", "fallos", "vencidas"))
+
+
+def comprobar(nombre: str, ok: bool, detalle: str) -> bool:
+    print(f"{'OK   ' if ok else 'FALLO'} {nombre:50s} {detalle}")
+    return ok
+
+
+if __name__ == "__main__":
+    servidor = iniciar(latencia_ms=20)
+    servidor.colgado_s = 2.0
+    url = servidor.url
+    print(f"timeout lectura {clima.TIMEOUT_LECTURA:g} s, plazo {clima.PLAZO_SEGUNDOS:g} s, "
+          f"presupuesto {clima.PRESUPUESTO_SEGUNDOS:g} s, umbral {clima.UMBRAL_FALLOS}, "
+          f"enfriamiento {clima.ENFRIAMIENTO_SEGUNDOS:g} s")
+    resultados = []
+
+    # 200 con HTML: error para quien pide y fallo para el circuito (no un éxito)
+    servidor.basura = True
+    try:
+        obtener_clima("Madrid", CLAVE, url)
+        rechazada = False
+    except ValueError:
+        rechazada = True
+    servidor.basura = False
+    estado = estado_upstream(url)
+    resultados.append(comprobar("200 con HTML cuenta como fallo", rechazada and estado["fallos"] == 1,
+                                f"{estado['fallos']} fallo(s): {estado['ultimo_error']}"))
+
+    # 503 intermitente: se reintenta y la petición termina bien
+    servidor.fallar = 2
+    antes = servidor.contadores["peticiones"]
+    inicio = time.perf_counter()
+    datos = obtener_clima("Madrid", CLAVE, url)
+    ms = (time.perf_counter() - inicio) * 1000
+    peticiones = servidor.contadores["peticiones"] - antes
+    resultados.append(comprobar("503 x2 y luego 200", datos["name"] == "Madrid" and peticiones == 3,
+                                f"{ms:6.0f} ms, {peticiones} peticiones"))
+
+    # Servidor colgado: la petición no pasa del plazo
+    cache = contadores_cache()
+    consultar(["Medellín"], CLAVE, url)
+    resultados.append(comprobar("primera consulta: fallo de caché", cache_desde(cache) == (0, 1, 0),
+                                "aciertos/fallos/vencidas %d/%d/%d" % cache_desde(cache)))
+    servidor.colgar = True
+    inicio = time.perf_counter()
+    try:
+        obtener_clima("Bogotá", CLAVE, url)
+        colgada = False
+    except CircuitoAbierto:
+        colgada = False
+    except clima.requests.Timeout:
+        colgada = True
+    segundos = time.perf_counter() - inicio
+    resultados.append(comprobar("servidor colgado: corta en el plazo",
+                                colgada and segundos < clima.PLAZO_SEGUNDOS + 0.2, f"{segundos * 1000:6.0f} ms"))
+
+    # Ciudad con dato: tras invalidarla se muestra el dato viejo al instante
+    cache = contadores_cache()
+    anterior = consultar(["Medellín"], CLAVE, url)["Medellín"]
+    resultados.append(comprobar("dato vigente: acierto de caché", cache_desde(cache) == (1, 0, 0),
+                                "aciertos/fallos/vencidas %d/%d/%d" % cache_desde(cache)))
+    invalidar(["Medellín"], CLAVE, url)
+    cache = contadores_cache()
+    inicio = time.perf_counter()
+    vieja = consultar(["Medellín"], CLAVE, url)["Medellín"]
+    ms = (time.perf_counter() - inicio) * 1000
+    resultados.append(comprobar("colgado: dato viejo sin esperar",
+                                vieja.datos is anterior.datos and ms < 50 and cache_desde(cache) == (0, 0, 1),
+                                f"{ms:6.0f} ms, aciertos/fallos/vencidas %d/%d/%d" % cache_desde(cache)))
+
+    # Ciudad sin dato: la página espera como mucho su presupuesto
+    cache = contadores_cache()
+    inicio = time.perf_counter()
+    fria = consultar(["Cali"], CLAVE, url)["Cali"]
+    segundos = time.perf_counter() - inicio
+    resultados.append(comprobar("colgado: ciudad sin dato dentro del presupuesto",
+                                fria.datos is None and segundos < clima.PRESUPUESTO_SEGUNDOS + 0.2
+                                and cache_desde(cache) == (0, 1, 0),
+                                f"{segundos * 1000:6.0f} ms, {fria.error}"))
+
+    # Con los fallos seguidos el circuito se abre y no se toca la red
+    esperar_refresco(["Medellín", "Cali"], url)
+    estado = estado_upstream(url)
+    antes = servidor.contadores["peticiones"]
+    inicio = time.perf_counter()
+    try:
+        obtener_clima("Tokio", CLAVE, url)
+        rapido = False
+    except CircuitoAbierto:
+        rapido = True
+    ms = (time.perf_counter() - inicio) * 1000
+    resultados.append(comprobar("circuito abierto: falla sin red",
+                                estado["estado"] == "abierto" and rapido
+                                and servidor.contadores["peticiones"] == antes,
+                                f"{ms:6.2f} ms, {estado['fallos']} fallos seguidos"))
+    cache = contadores_cache()
+    guardada = consultar(["Medellín"], CLAVE, url)["Medellín"]
+    resultados.append(comprobar("circuito abierto: se mantiene el último dato bueno",
+                                guardada.datos is anterior.datos and guardada.error is not None
+                                and cache_desde(cache) == (0, 0, 1), guardada.error))
+
+    # Recuperación: pasado el enfriamiento, una petición de prueba cierra el circuito
+    servidor.colgar = False
+    time.sleep(clima.ENFRIAMIENTO_SEGUNDOS + servidor.colgado_s)
+    datos = obtener_clima("Tokio", CLAVE, url)
+    estado = estado_upstream(url)
+    resultados.append(comprobar("recuperación: circuito cerrado", estado["estado"] == "cerrado",
+                                f"p50 {estado['p50_ms']:.0f} ms, p95 {estado['p95_ms']:.0f} ms"))
+    servidor.shutdown()
+    sys.exit(0 if all(resultados) else 1)
@@ -0,0 +1,123 @@
+# Planificador de /consulta: cada consulta se ejecuta por el camino elegido y
+# por todos los más generales (cubo -> indice -> escaneo), se comprueba que den
+# el mismo resultado y se comparan los tiempos. También comprueba que los
+# filtros con un valor que no corresponde al operador se rechazan con
+# ValueError (400 en la API) y no llegan a pandas.
+# Uso: python benchmarks/bench_consultas.py [--filas 1000000]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from consultas_ventas import PLANES, ejecutar_consulta  # noqa: E402
+from cubo_ventas import CuboVentas  # noqa: E402
+from datos_ventas import cargar_ventas, limpiar_ventas  # noqa: E402
+from indices_ventas import IndiceBitmap  # noqa: E402
+
+
+def consulta(por=(), medidas=({"funcion": "sum", "columna": "Ventas_GLOBALES"},), filtros=(), orden=None):
+    return {"por": list(por), "medidas": list(medidas), "filtros": list(filtros), "orden": orden, "limite": 1000}
+
+
+SUMA = {"funcion": "sum", "columna": "Ventas_GLOBALES"}
+CONTEO = {"funcion": "count"}
+
+CONSULTAS = {
+    "ventas_por_genero": consulta(["Género"], [SUMA, CONTEO, {"funcion": "mean", "columna": "Ventas_JP"}]),
+    "plataforma_anio_desde_2010": consulta(["Plataforma", "Año"], [SUMA],
+                                           [{"columna": "Año", "op": ">=", "valor": 2010}]),
+    "top_editores_racing": consulta(["Editor"], [SUMA, CONTEO],
+                                    [{"columna": "Género", "op": "==", "valor": "Racing"}], "-sum_Ventas_GLOBALES"),
+    "genero_jp_mayor_1": consulta(["Género"], [SUMA, {"funcion": "top", "columna": "Ventas_GLOBALES", "k": 3}],
+                                  [{"columna": "Ventas_JP", "op": ">", "valor": 1}]),
+    "top_wii": consulta([], [{"funcion": "top", "columna": "Ventas_EU", "k": 5}],
+                        [{"columna": "Plataforma", "op": "==", "valor": "Wii"}]),
+    "por_nombre": consulta(["Nombre"], [SUMA], [{"columna": "Nombre", "op": "in", "valor": ["Tetris", "FIFA 14"]}]),
+}
+
+# Umbrales que no son exactos en float32 (las ventas lo son): el índice y el
+# escaneo tienen que comparar igual que pandas, con cada operador
+for _columna in ("Ventas_JP", "Ventas_NA", "Ventas_GLOBALES"):
+    for _umbral in (0.1, 0.3, 1.1):
+        for _op in (">", ">=", "<", "<="):
+            CONSULTAS[f"{_columna} {_op} {_umbral}"] = consulta(
+                ["Género"], [SUMA, CONTEO], [{"columna": _columna, "op": _op, "valor": _umbral}])
+        CONSULTAS[f"{_columna} between {_umbral}"] = consulta(
+            ["Género"], [SUMA, CONTEO], [{"columna": _columna, "op": "between", "valor": [_umbral, _umbral + 1.1]}])
+
+
+# Filtros inválidos: tienen que rechazarse con ValueError en validar()
+INVALIDAS = {
+    "> sin valor": {"columna": "Año", "op": ">"},
+    ">= con texto": {"columna": "Ventas_JP", "op": ">=", "valor": "1"},
+    "< con lista": {"columna": "Ventas_JP", "op": "<", "valor": [1]},
+    "<= con booleano": {"columna": "Año", "op": "<=", "valor": True},
+    "== sin valor": {"columna": "Género", "op": "==", "valor": None},
+    "!= con objeto": {"columna": "Género", "op": "!=", "valor": {"a": 1}},
+    "between con nulo": {"columna": "Año", "op": "between", "valor": [2010, None]},
+    "between con texto": {"columna": "Año", "op": "between", "valor": ["2010", 2012]},
+    "between de 3": {"columna": "Año", "op": "between", "valor": [2010, 2011, 2012]},
+    "in con objeto": {"columna": "Género", "op": "in", "valor": [{"a": 1}]},
+    "not in con nulo": {"columna": "Género", "op": "not in", "valor": ["Racing", None]},
+    "in sin lista": {"columna": "Género", "op": "in", "valor": "Racing"},
+}
+
+
+def cronometrar(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000, resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del planificador de consultas")
+    parser.add_argument("--filas", type=int, default=0, help="Filas sintéticas (0 = assets/vgsales.csv)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.filas:
+        from generar_ventas import generar_bloque
+        df = limpiar_ventas(generar_bloque(np.random.default_rng(0), 0, args.filas))
+    else:
+        df = cargar_ventas()
+    indice = IndiceBitmap(df)
+    cubo = CuboVentas(df)
+    print(f"{len(df):,} filas, cubo de {len(cubo):,} celdas")
+
+    fallos = 0
+    for nombre, c in CONSULTAS.items():
+        plan = ejecutar_consulta(c, df, indice, cubo)[0]
+        tiempos = []
+        base = None
+        for forzado in PLANES[PLANES.index(plan):]:
+            ms, (_, _, resultado) = cronometrar(lambda: ejecutar_consulta(c, df, indice, cubo, forzado),
+                                                args.repeticiones)
+            tiempos.append(f"{forzado} {ms:7.1f} ms")
+            if base is None:
+                base = resultado
+            elif resultado.shape != base.shape or not (resultado.astype(str).values == base.astype(str).values).all():
+                fallos += 1
+                tiempos[-1] += " (FALLO)"
+        print(f"{nombre:28s} -> {plan:8s} | " + " | ".join(tiempos))
+    print("Paridad: OK" if not fallos else f"Paridad: {fallos} FALLOS")
+
+    rechazos = 0
+    for nombre, filtro in INVALIDAS.items():
+        try:
+            ejecutar_consulta(consulta(["Género"], [SUMA], [filtro]), df, indice, cubo)
+            error = "aceptada"
+        except ValueError:
+            rechazos += 1
+            continue
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        fallos += 1
+        print(f"FALLO filtro inválido {nombre}: {error}")
+    print(f"Filtros inválidos rechazados: {rechazos}/{len(INVALIDAS)}")
+    sys.exit(1 if fallos else 0)
@@ -0,0 +1,106 @@
+# Paridad y tiempos: cubo de agregaciones vs. las expresiones pandas originales
+# de la página de gráficos, sobre el esquema compacto (categóricas, float32) y
+# sobre el original (textos object, float64). Termina con código 1 si algún
+# resultado no coincide. Uso: python benchmarks/bench_cubo.py
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cubo_ventas import REGIONES, CuboVentas  # noqa: E402
+from datos_ventas import cargar_ventas, esquema_original  # noqa: E402
+
+
+def consultas_pandas(df, genero, editores, plataformas):
+    return {
+        "genero_global": df.groupby("Género", observed=True)["Ventas_GLOBALES"].sum(),
+        "top_plataformas": df.groupby("Plataforma", observed=True)["Ventas_GLOBALES"].sum().nlargest(10),
+        "regiones": df[REGIONES].sum(),
+        "genero_na": df.groupby("Género", observed=True)["Ventas_NA"].sum(),
+        "genero_jp": df.groupby("Género", observed=True)["Ventas_JP"].sum(),
+        "genero_por_region": df[df["Género"] == genero][REGIONES].sum(),
+        "anual": df.groupby("Año")["Ventas_GLOBALES"].sum(),
+        "juegos_por_anio": df["Año"].value_counts().sort_index(),
+        "genero_anual": df[df["Género"] == genero].groupby("Año")["Ventas_GLOBALES"].sum(),
+        "heatmap": df[df["Plataforma"].isin(df["Plataforma"].value_counts().head(10).index)].pivot_table(
+            values="Ventas_GLOBALES", index="Plataforma", columns="Año", aggfunc="sum", observed=True).fillna(0),
+        "genero_total": df[df["Género"] == genero]["Ventas_GLOBALES"].sum(),
+        "genero_plataforma": df[df["Género"] == genero].groupby("Plataforma", observed=True)["Ventas_GLOBALES"].sum(),
+        "top_editores": df.groupby("Editor", observed=True)["Ventas_GLOBALES"].sum().nlargest(10),
+        "editores_sel": df[df["Editor"].isin(editores)].groupby("Editor", observed=True)["Ventas_GLOBALES"].sum(),
+        "plataforma_region": df[df["Plataforma"].isin(plataformas)].groupby("Plataforma", observed=True)[REGIONES].sum(),
+    }
+
+
+def consultas_cubo(cubo, genero, editores, plataformas):
+    return {
+        "genero_global": cubo.total("Género"),
+        "top_plataformas": cubo.total("Plataforma").nlargest(10),
+        "regiones": cubo.por_region(),
+        "genero_na": cubo.total("Género", "Ventas_NA"),
+        "genero_jp": cubo.total("Género", "Ventas_JP"),
+        "genero_por_region": cubo.por_region({"Género": genero}),
+        "anual": cubo.total("Año"),
+        "juegos_por_anio": cubo.total("Año", "Juegos"),
+        "genero_anual": cubo.total("Año", filtros={"Género": genero}),
+        "heatmap": cubo.pivote("Plataforma", "Año",
+                               filtros={"Plataforma": cubo.total("Plataforma", "Juegos").nlargest(10).index}),
+        "genero_total": cubo.suma(filtros={"Género": genero}),
+        "genero_plataforma": cubo.total("Plataforma", filtros={"Género": genero}),
+        "top_editores": cubo.total("Editor").nlargest(10),
+        "editores_sel": cubo.total("Editor", filtros={"Editor": editores}),
+        "plataforma_region": cubo.total("Plataforma", REGIONES, filtros={"Plataforma": plataformas}),
+    }
+
+
+def iguales(a, b):
+    if np.isscalar(a):
+        return np.isclose(a, b, rtol=1e-4)
+    if isinstance(a, pd.Series):
+        a, b = a.rename("valor"), b.rename("valor") # El nombre de la serie no importa
+    a, b = pd.DataFrame(a), pd.DataFrame(b)
+    a.index, b.index = a.index.astype(object), b.index.astype(object)
+    a.columns, b.columns = a.columns.astype(object), b.columns.astype(object)
+    if set(a.index) != set(b.index) or set(a.columns) != set(b.columns):
+        return False
+    b = b.loc[a.index, a.columns]
+    return np.allclose(a.to_numpy(dtype="float64"), b.to_numpy(dtype="float64"), rtol=1e-4)
+
+
+def cronometrar(funcion, repeticiones=20):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+if __name__ == "__main__":
+    df = cargar_ventas()
+    inicio = time.perf_counter()
+    cubo = CuboVentas(df)
+    print(f"Cubo: {len(cubo)} celdas a partir de {len(df)} filas ({(time.perf_counter() - inicio) * 1000:.1f} ms)")
+
+    argumentos = ("Action", ["Nintendo", "Sony Computer Entertainment", "Activision"], ["PS2", "X360", "Wii"])
+    original = consultas_pandas(esquema_original(df), *argumentos)
+    compacto = consultas_pandas(df, *argumentos)
+    obtenido = consultas_cubo(cubo, *argumentos)
+
+    fallos = []
+    print(f"  {'':22s} {'compacto':9s} {'cubo':9s} (contra pandas sobre el esquema original)")
+    for nombre in original:
+        marcas = []
+        for camino, resultado in (("compacto", compacto), ("cubo", obtenido)):
+            ok = iguales(original[nombre], resultado[nombre])
+            marcas.append("OK" if ok else "FALLO")
+            if not ok:
+                fallos.append(f"{nombre} ({camino})")
+        print(f"  {nombre:22s} {marcas[0]:9s} {marcas[1]:9s}")
+
+    print(f"pandas: {cronometrar(lambda: consultas_pandas(df, *argumentos)):.1f} ms por pasada")
+    print(f"cubo:   {cronometrar(lambda: consultas_cubo(cubo, *argumentos)):.1f} ms por pasada")
+    if fallos:
+        sys.exit(f"Sin paridad con el esquema original: {', '.join(fallos)}")
@@ -0,0 +1,108 @@
+# Filtros de Proyecto Integrador: código pandas original (un recorrido por
+# filtro) frente al motor de bitmaps (todos los filtros activos en una pasada),
+# y barrido de umbrales (movimientos de slider) con el índice ordenado frente a
+# comparar la columna completa.
+# Uso: python benchmarks/bench_filtros.py [--filas 1000000]
+import argparse
+import operator
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from datos_ventas import cargar_ventas, limpiar_ventas  # noqa: E402
+from indices_ventas import En, EsNulo, Igual, IndiceBitmap, Mayor, MayorIgual, Menor, MenorIgual, evaluar_varios  # noqa: E402
+
+PREDICADOS = {
+    "global_20m": Mayor('Ventas_GLOBALES', 20),
+    "nintendo_wii": Igual('Editor', 'Nintendo') & Igual('Plataforma', 'Wii'),
+    "nintendo_sony": Igual('Editor', 'Nintendo') | Igual('Editor', 'Sony Computer Entertainment'),
+    "accion_x360": Igual('Género', 'Action') & Igual('Plataforma', 'X360'),
+    "modernas": En('Plataforma', ['PS4', 'XOne', 'PC']),
+    "jp_1m": Mayor('Ventas_JP', 1) & ~EsNulo('Año'),
+    "anio_2010": MayorIgual('Año', 2010),
+    "no_deportes_carreras": ~En('Género', ['Sports', 'Racing']),
+    "nintendo_na_2m": Igual('Editor', 'Nintendo') & Mayor('Ventas_NA', 2),
+}
+
+
+def filtros_pandas(df):
+    return {
+        "global_20m": df[df['Ventas_GLOBALES'] > 20],
+        "nintendo_wii": df[(df['Editor'] == 'Nintendo') & (df['Plataforma'] == 'Wii')],
+        "nintendo_sony": df[(df['Editor'] == 'Nintendo') | (df['Editor'] == 'Sony Computer Entertainment')],
+        "accion_x360": df.query("Género == 'Action' and Plataforma == 'X360'"),
+        "modernas": df[df['Plataforma'].isin(['PS4', 'XOne', 'PC'])],
+        "jp_1m": df.where(df['Ventas_JP'] > 1).dropna(),
+        "anio_2010": df[df['Año'] >= 2010],
+        "no_deportes_carreras": df[~df['Género'].isin(['Sports', 'Racing'])],
+        "nintendo_na_2m": df[(df['Editor'] == 'Nintendo') & (df['Ventas_NA'] > 2)],
+    }
+
+
+def cronometrar(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000, resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de filtros bitmap vs pandas")
+    parser.add_argument("--filas", type=int, default=0, help="Filas sintéticas (0 = assets/vgsales.csv)")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.filas:
+        from generar_ventas import generar_bloque
+        df = limpiar_ventas(generar_bloque(np.random.default_rng(0), 0, args.filas))
+    else:
+        df = cargar_ventas()
+
+    inicio = time.perf_counter()
+    indice = IndiceBitmap(df)
+    print(f"{len(df):,} filas; índice bitmap construido en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    t_pandas, esperado = cronometrar(lambda: filtros_pandas(df), args.repeticiones)
+    t_conteo, bitmaps = cronometrar(lambda: evaluar_varios(indice, PREDICADOS), args.repeticiones)
+    t_filas, _ = cronometrar(lambda: {k: indice.filas_de(b) for k, b in evaluar_varios(indice, PREDICADOS).items()},
+                             args.repeticiones)
+
+    for nombre, filas in esperado.items():
+        obtenido = indice.filas_de(bitmaps[nombre])
+        estado = "OK   " if np.array_equal(obtenido, df.index.get_indexer(filas.index)) else "FALLO"
+        print(f"  {estado} {nombre}: {len(filas):,} filas")
+
+    print(f"pandas (9 filtros, un recorrido cada uno): {t_pandas:8.1f} ms")
+    print(f"bitmaps (9 filtros en una pasada):         {t_conteo:8.1f} ms")
+    print(f"bitmaps + posiciones de filas:             {t_filas:8.1f} ms")
+
+    # Barrido de umbrales sobre las columnas de ventas, como al mover un slider
+    # (pasos de 0.1) o al escribir un valor que aparece en los datos (2
+    # decimales). Son floats de Python, como los que llegan de la página y de
+    # la API: pandas los compara en float32, y el índice tiene que coincidir.
+    pasos = [round(0.1 * i, 1) for i in range(51)]
+    fallos = 0
+    for columna in ['Ventas_GLOBALES', 'Ventas_NA', 'Ventas_JP']:
+        serie = df[columna]
+        distintos = np.unique(serie.dropna().to_numpy())
+        datos = sorted({round(float(v), 2) for v in distintos[::max(1, len(distintos) // 50)]})
+        umbrales = pasos + datos
+        t_scan, _ = cronometrar(lambda: [np.flatnonzero(serie > u) for u in umbrales], args.repeticiones)
+        ordenado = indice.ordenado(columna)
+        t_orden, _ = cronometrar(lambda: [ordenado.rango(minimo=u, incluir_minimo=False) for u in umbrales],
+                                 args.repeticiones)
+        for u in umbrales:
+            for comparar, predicado in ((operator.gt, Mayor), (operator.ge, MayorIgual),
+                                        (operator.lt, Menor), (operator.le, MenorIgual)):
+                esperado = np.flatnonzero(comparar(serie, u))
+                if not np.array_equal(np.sort(indice.filas_de(predicado(columna, u).evaluar(indice))), esperado):
+                    fallos += 1
+                    print(f"  FALLO {columna} {comparar.__name__} {u!r}")
+        print(f"{columna} > u ({len(umbrales)} umbrales): comparación {t_scan:8.1f} ms, "
+              f"índice ordenado {t_orden:6.2f} ms")
+    print("Umbrales: OK" if not fallos else f"Umbrales: {fallos} FALLOS")
@@ -0,0 +1,65 @@
+# Tiempo y memoria máxima de la ingesta por bloques frente a la carga completa.
+# La memoria de la ingesta depende del bloque y del tamaño del cubo: se
+# muestran también sus celdas por fila del archivo.
+# Uso: python benchmarks/bench_ingesta.py --filas 10000000 [--completo]
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from generar_ventas import generar_csv  # noqa: E402
+
+
+def _medir(modo: str, ruta: str, filas_por_bloque: int, cola):
+    # Se ejecuta en un proceso aparte para que la memoria máxima sea solo la de este modo
+    from cubo_ventas import CuboVentas, ingestar_por_bloques
+    from datos_ventas import TIPOS_CSV, limpiar_ventas
+    import pandas as pd
+
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    if modo == "bloques":
+        cubo = ingestar_por_bloques(ruta, filas_por_bloque)
+    else:
+        cubo = CuboVentas(limpiar_ventas(pd.read_csv(ruta, dtype=TIPOS_CSV)))
+    segundos = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cola.put((segundos, (pico - base) / 1024, len(cubo), int(cubo.datos['Juegos'].sum())))  # ru_maxrss está en KB en Linux
+
+
+def medir(modo: str, ruta: str, filas_por_bloque: int):
+    cola = multiprocessing.Queue()
+    proceso = multiprocessing.Process(target=_medir, args=(modo, ruta, filas_por_bloque, cola))
+    proceso.start()
+    resultado = cola.get()
+    proceso.join()
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la ingesta por bloques")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--bloque", type=int, default=500_000)
+    parser.add_argument("--csv", help="CSV existente (si no se indica se genera uno sintético)")
+    parser.add_argument("--completo", action="store_true", help="Comparar también con la carga completa en memoria")
+    args = parser.parse_args()
+
+    ruta = args.csv
+    if ruta is None:
+        ruta = os.path.join(tempfile.gettempdir(), f"ventas_sinteticas_{args.filas}.csv")
+        if not os.path.exists(ruta):
+            print(f"Generando {args.filas:,} filas en {ruta}...")
+            generar_csv(ruta, args.filas)
+    print(f"Archivo: {os.path.getsize(ruta) / 1024 / 1024:,.0f} MB")
+
+    modos = ["bloques", "completo"] if args.completo else ["bloques"]
+    for modo in modos:
+        segundos, pico_mb, celdas, filas = medir(modo, ruta, args.bloque)
+        print(f"{modo:>9}: {segundos:6.1f} s, memoria máxima +{pico_mb:,.0f} MB, {celdas:,} celdas en el cubo "
+              f"({celdas / filas:.2f} por fila)")
@@ -0,0 +1,344 @@
+# Prueba de carga de api_analytics: arranca la API con uvicorn sobre un
+# dataset sintético (o assets/vgsales.csv), lanza varios clientes concurrentes
+# contra cada endpoint durante unos segundos y mide peticiones por segundo y
+# latencias p50/p95/p99. Después mide la carga mixta: clientes de endpoints
+# ligeros (/, páginas de filas, estado) y pesados (agregaciones, consultas,
+# exportación) a la vez, que es donde se ve si una agregación frena a los
+# demás. De esa fase se leen también las métricas del servidor (/metrics):
+# tiempo medio en cola y de cálculo por endpoint, rechazos (503), vencimientos
+# (504) y el máximo de consultas ocupadas. Los resultados se guardan en JSON y
+# se pueden comparar con una ejecución anterior guardada como referencia: si un
+# endpoint empeora más de la tolerancia (p95 más alto o menos peticiones por
+# segundo), aislado o en la mezcla, el script termina con código 1.
+# Uso: python benchmarks/carga_api.py --filas 1000000 --clientes 8 --segundos 10 --salida carga.json
+#      python benchmarks/carga_api.py --filas 1000000 --referencia carga.json
+import argparse
+import json
+import os
+import re
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from generar_ventas import generar_csv  # noqa: E402
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Sin API_TOKEN_ADMIN la API no expone /admin: la que arranca este script usa uno propio
+TOKEN_ADMIN = os.environ.get("API_TOKEN_ADMIN") or secrets.token_hex(16)
+CABECERAS = {"X-Token-Admin": TOKEN_ADMIN}
+
+# (nombre, método, ruta, cuerpo JSON, pesado)
+ENDPOINTS = [
+    ("raiz", "GET", "/", None, False),
+    ("datos", "GET", "/datos?limit=100", None, False),
+    ("datos_ordenados", "GET", "/datos?limit=100&sort=-Ventas_GLOBALES&fields=Nombre,Plataforma,Ventas_GLOBALES", None,
+     False),
+    ("filtro", "POST", "/filtro?limit=100", {"categoria": "Racing"}, False),
+    ("estadisticas", "GET", "/estadisticas", None, True),
+    ("ingresos_por_categoria", "GET", "/ingresos_por_categoria", None, True),
+    ("exportar", "GET", "/exportar?categoria=Puzzle&formato=arrow", None, True),
+    ("consulta_cubo", "POST", "/consulta", {"por": ["Plataforma"], "medidas": [{"funcion": "sum"}],
+                                            "filtros": [{"columna": "Género", "op": "==", "valor": "Sports"}]}, True),
+    ("consulta_indice", "POST", "/consulta", {"por": ["Género"], "medidas": [{"funcion": "sum"}],
+                                              "filtros": [{"columna": "Ventas_JP", "op": ">", "valor": 1}]}, True),
+    ("admin_estado", "GET", "/admin/estado", None, False),
+]
+
+
+# --- Servidor ---
+
+def preparar_datos(filas: int, directorio: str) -> str:
+    if not filas:
+        return os.path.join(RAIZ, "assets", "vgsales.csv")
+    ruta = os.path.join(directorio, f"ventas_{filas}.csv")
+    print(f"Generando {filas:,} filas sintéticas...")
+    generar_csv(ruta, filas)
+    return ruta
+
+
+def arrancar_api(ruta_datos: str, puerto: int, directorio: str, entorno: dict, espera: float = 600) -> subprocess.Popen:
+    # El servidor corre en el directorio temporal; el Parquet y el Arrow del
+    # dataset sintético quedan junto a su CSV, también fuera del repositorio
+    entorno = {**os.environ, **entorno, "API_RUTA_VENTAS": ruta_datos, "API_TOKEN_ADMIN": TOKEN_ADMIN}
+    registro = open(os.path.join(directorio, "uvicorn.log"), "wb")
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api_analytics:app", "--app-dir", RAIZ,
+         "--port", str(puerto), "--log-level", "warning", "--no-access-log"],
+        cwd=directorio, env=entorno, stdout=registro, stderr=subprocess.STDOUT)
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if servidor.poll() is not None:
+            raise RuntimeError(f"La API terminó al arrancar; ver {registro.name}")
+        try:
+            if requests.get(f"http://127.0.0.1:{puerto}/", timeout=1).ok:
+                return servidor
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    servidor.terminate()
+    raise RuntimeError(f"La API no respondió en {espera:g} s")
+
+
+# --- Carga ---
+
+def cargar(url: str, grupos: list, segundos: float, calentamiento: float = 1.0) -> dict:
+    # grupos: [(nombre, método, ruta, cuerpo, clientes)], todos a la vez. Cada
+    # cliente repite su petición con su propia sesión (conexión keep-alive)
+    # hasta que se acaba el tiempo; solo se miden las que empiezan después del
+    # calentamiento. Devuelve {nombre: medidas}
+    inicio_medida = time.monotonic() + calentamiento
+    fin = inicio_medida + segundos
+    clientes = [(nombre, metodo, ruta, cuerpo) for nombre, metodo, ruta, cuerpo, n in grupos for _ in range(n)]
+    latencias = [[] for _ in clientes]
+    estados = [{} for _ in clientes]
+    bytes_recibidos = [0] * len(clientes)
+
+    def cliente(i: int):
+        _, metodo, ruta, cuerpo = clientes[i]
+        sesion = requests.Session()
+        sesion.headers.update(CABECERAS)
+        while True:
+            comienzo = time.monotonic()
+            if comienzo >= fin:
+                break
+            try:
+                respuesta = sesion.request(metodo, url + ruta, json=cuerpo, timeout=60)
+                estado = respuesta.status_code
+                tam = len(respuesta.content)
+            except requests.RequestException:
+                estado, tam = "error", 0
+            if comienzo >= inicio_medida:
+                latencias[i].append((time.monotonic() - comienzo) * 1000)
+                estados[i][estado] = estados[i].get(estado, 0) + 1
+                bytes_recibidos[i] += tam
+        sesion.close()
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(len(clientes))]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    # Las peticiones que empezaron antes del fin pueden terminar algo después
+    duracion = max(segundos, time.monotonic() - inicio_medida)
+
+    resultados = {}
+    for nombre, *_ in grupos:
+        mios = [i for i, c in enumerate(clientes) if c[0] == nombre]
+        todas = np.array([ms for i in mios for ms in latencias[i]])
+        conteo = {}
+        for i in mios:
+            for estado, n in estados[i].items():
+                conteo[str(estado)] = conteo.get(str(estado), 0) + n
+        correctas = sum(n for estado, n in conteo.items() if estado.startswith("2") or estado == "304")
+        resultado = {
+            "peticiones": int(len(todas)),
+            "por_segundo": round(len(todas) / duracion, 1),
+            "errores": int(len(todas) - correctas),
+            "estados": conteo,
+            "mb_por_segundo": round(sum(bytes_recibidos[i] for i in mios) / duracion / 1e6, 2),
+        }
+        if len(todas):
+            p50, p95, p99 = np.percentile(todas, [50, 95, 99])
+            resultado.update(p50_ms=round(p50, 2), p95_ms=round(p95, 2), p99_ms=round(p99, 2),
+                             max_ms=round(float(todas.max()), 2))
+        resultados[nombre] = resultado
+    return resultados
+
+
+# --- Métricas del servidor ---
+
+_LINEA_METRICA = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+_ETIQUETA = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def leer_metricas(url: str) -> dict:
+    # /metrics en formato Prometheus -> {(nombre, ((etiqueta, valor), ...)): valor}
+    metricas = {}
+    for linea in requests.get(url + "/metrics", timeout=10).text.splitlines():
+        coincide = _LINEA_METRICA.match(linea)
+        if linea.startswith("#") or not coincide:
+            continue
+        nombre, etiquetas, valor = coincide.groups()
+        metricas[(nombre, tuple(sorted(_ETIQUETA.findall(etiquetas or ""))))] = float(valor)
+    return metricas
+
+
+def vigilar_ocupadas(url: str, parar: threading.Event, maximos: dict, intervalo: float = 0.5):
+    # Máximo de api_consultas_ocupadas por endpoint mientras dura la mezcla
+    while not parar.wait(intervalo):
+        try:
+            metricas = leer_metricas(url)
+        except requests.RequestException:
+            continue
+        for (nombre, etiquetas), valor in metricas.items():
+            if nombre == "api_consultas_ocupadas":
+                endpoint = dict(etiquetas)["endpoint"]
+                maximos[endpoint] = max(maximos.get(endpoint, 0), int(valor))
+
+
+def resumen_servidor(antes: dict, despues: dict, ocupadas: dict) -> dict:
+    # Lo que pasó en el servidor entre dos lecturas de /metrics
+    def delta(nombre, etiquetas):
+        return despues.get((nombre, etiquetas), 0) - antes.get((nombre, etiquetas), 0)
+
+    fases = {}
+    for nombre, etiquetas in despues:
+        if nombre == "api_fase_segundos_count" and delta(nombre, etiquetas) > 0:
+            datos = dict(etiquetas)
+            media = delta("api_fase_segundos_sum", etiquetas) / delta(nombre, etiquetas) * 1000
+            fases.setdefault(datos["endpoint"], {})[f"{datos['fase']}_ms"] = round(media, 2)
+    contadores = {}
+    for clave, metrica in (("rechazadas", "api_consultas_rechazadas_total"),
+                           ("vencidas", "api_consultas_vencidas_total")):
+        contadores[clave] = {dict(etiquetas)["endpoint"]: int(delta(nombre, etiquetas))
+                             for nombre, etiquetas in despues if nombre == metrica and delta(nombre, etiquetas)}
+    return {"fases_medias": fases, **contadores, "ocupadas_max": ocupadas}
+
+
+# --- Comparación con la referencia ---
+
+def comparar(actual: dict, referencia: dict, tolerancia: float) -> list:
+    regresiones = []
+    medidas = [(nombre, medida, referencia["resultados"].get(nombre)) for nombre, medida in actual["resultados"].items()]
+    if actual.get("mezcla") and referencia.get("mezcla"):
+        medidas += [(f"mezcla/{nombre}", medida, referencia["mezcla"]["resultados"].get(nombre))
+                    for nombre, medida in actual["mezcla"]["resultados"].items()]
+    for nombre, medida, base in medidas:
+        if not base or "p95_ms" not in base or "p95_ms" not in medida:
+            continue
+        if medida["p95_ms"] > base["p95_ms"] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p95 {base['p95_ms']} -> {medida['p95_ms']} ms")
+        if medida["por_segundo"] < base["por_segundo"] * (1 - tolerancia):
+            regresiones.append(f"{nombre}: {base['por_segundo']} -> {medida['por_segundo']} pet/s")
+        if medida["errores"] > base["errores"]:
+            regresiones.append(f"{nombre}: errores {base['errores']} -> {medida['errores']}")
+    for clave in ("filas", "clientes"):
+        if actual[clave] != referencia.get(clave):
+            print(f"Aviso: la referencia usó {clave}={referencia.get(clave)} y esta ejecución {actual[clave]}")
+    return regresiones
+
+
+def imprimir(resultados: dict, referencia: dict = None, aislados: dict = None):
+    # referencia: mismas medidas de otra ejecución; aislados: este endpoint sin la mezcla
+    print(f"{'endpoint':24s} {'pet/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'errores':>8s}")
+    for nombre, medida in resultados.items():
+        fila = (f"{nombre:24s} {medida['por_segundo']:8.1f} {medida.get('p50_ms', float('nan')):8.1f} "
+                f"{medida.get('p95_ms', float('nan')):8.1f} {medida.get('p99_ms', float('nan')):8.1f} "
+                f"{medida['errores']:8d}")
+        base = (aislados or {}).get(nombre)
+        if base and base.get("p95_ms") and medida.get("p95_ms"):
+            fila += f"   p95 x{medida['p95_ms'] / base['p95_ms']:.1f} vs aislado"
+        base = (referencia or {}).get(nombre)
+        if base and base.get("p95_ms") and medida.get("p95_ms"):
+            fila += f"   p95 {medida['p95_ms'] / base['p95_ms'] - 1:+.0%} vs referencia"
+        print(fila)
+
+
+def imprimir_servidor(servidor: dict):
+    print("Servidor durante la mezcla (/metrics):")
+    for endpoint, fases in sorted(servidor["fases_medias"].items()):
+        detalle = ", ".join(f"{fase[:-3]} {ms:.1f} ms" for fase, ms in sorted(fases.items()))
+        print(f"  {endpoint:28s} media por petición: {detalle}")
+    def texto(conteo: dict) -> str:
+        return ", ".join(f"{endpoint} {n}" for endpoint, n in sorted(conteo.items())) or "-"
+
+    print(f"  consultas ocupadas como máximo: {texto(servidor['ocupadas_max'])}")
+    print(f"  rechazadas (503): {texto(servidor['rechazadas'])}; vencidas (504): {texto(servidor['vencidas'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga y latencias de la API de ventas")
+    parser.add_argument("--filas", type=int, default=0, help="Filas sintéticas (0 = assets/vgsales.csv)")
+    parser.add_argument("--clientes", type=int, default=8, help="Clientes concurrentes por endpoint")
+    parser.add_argument("--segundos", type=float, default=10, help="Duración de la medida por endpoint")
+    parser.add_argument("--endpoints", default="", help="Solo estos endpoints, separados por comas")
+    parser.add_argument("--clientes-mezcla", type=int, default=2,
+                        help="Clientes por endpoint en la carga mixta (0 = no medirla)")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--url", default="", help="Medir una API ya arrancada en vez de iniciar una")
+    parser.add_argument("--salida", default="", help="Guardar los resultados en este JSON")
+    parser.add_argument("--referencia", default="", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento admitido (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    elegidos = [e for e in ENDPOINTS if not args.endpoints or e[0] in args.endpoints.split(",")]
+    with tempfile.TemporaryDirectory() as directorio:
+        servidor = None
+        url = args.url.rstrip("/")
+        if not url:
+            # Plazos y límites holgados: se mide la latencia, no el rechazo por saturación
+            ruta_datos = preparar_datos(args.filas, directorio)
+            inicio = time.perf_counter()
+            descargas = max(args.clientes, args.clientes_mezcla)
+            holgura = {"API_PLAZO_SEGUNDOS": "60", "API_MAX_DESCARGAS": str(descargas)}
+            servidor = arrancar_api(ruta_datos, args.puerto, directorio, holgura)
+            print(f"API lista en {time.perf_counter() - inicio:.1f} s")
+            url = f"http://127.0.0.1:{args.puerto}"
+        try:
+            estado = requests.get(url + "/admin/estado", headers=CABECERAS, timeout=10).json()
+            resultados = {}
+            for nombre, metodo, ruta, cuerpo, _ in elegidos:
+                resultados.update(cargar(url, [(nombre, metodo, ruta, cuerpo, args.clientes)], args.segundos))
+                print(f"  {nombre}: {resultados[nombre]['por_segundo']} pet/s")
+
+            mezcla = None
+            if args.clientes_mezcla and len(elegidos) > 1:
+                ligeros = [e[0] for e in elegidos if not e[4]]
+                pesados = [e[0] for e in elegidos if e[4]]
+                print(f"Carga mixta: {args.clientes_mezcla} clientes en cada endpoint a la vez "
+                      f"(ligeros: {', '.join(ligeros) or '-'}; pesados: {', '.join(pesados) or '-'})")
+                antes = leer_metricas(url)
+                parar, ocupadas = threading.Event(), {}
+                vigilante = threading.Thread(target=vigilar_ocupadas, args=(url, parar, ocupadas))
+                vigilante.start()
+                try:
+                    grupos = [(nombre, metodo, ruta, cuerpo, args.clientes_mezcla)
+                              for nombre, metodo, ruta, cuerpo, _ in elegidos]
+                    mezcla = {"clientes": args.clientes_mezcla, "resultados": cargar(url, grupos, args.segundos)}
+                finally:
+                    parar.set()
+                    vigilante.join()
+                mezcla["servidor"] = resumen_servidor(antes, leer_metricas(url), ocupadas)
+        finally:
+            if servidor is not None:
+                servidor.terminate()
+                servidor.wait(timeout=30)
+
+    actual = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "filas": estado.get("filas"),
+        "version": estado.get("version"),
+        "clientes": args.clientes,
+        "segundos": args.segundos,
+        "cpus": os.cpu_count(),
+        "resultados": resultados,
+        "mezcla": mezcla,
+    }
+    referencia = None
+    if args.referencia:
+        with open(args.referencia, encoding="utf-8") as archivo:
+            referencia = json.load(archivo)
+    print("Cada endpoint por separado:")
+    imprimir(resultados, (referencia or {}).get("resultados"))
+    if mezcla is not None:
+        print("Carga mixta (todos los endpoints a la vez):")
+        imprimir(mezcla["resultados"], ((referencia or {}).get("mezcla") or {}).get("resultados"), resultados)
+        imprimir_servidor(mezcla["servidor"])
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(actual, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+    if referencia is not None:
+        regresiones = comparar(actual, referencia, args.tolerancia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        print("Sin regresiones" if not regresiones else f"{len(regresiones)} regresiones")
+        sys.exit(1 if regresiones else 0)
@@ -0,0 +1,60 @@
+# Genera un CSV sintético con el mismo esquema que assets/vgsales.csv.
+# Uso: python benchmarks/generar_ventas.py salida.csv --filas 10000000
+import argparse
+
+import numpy as np
+import pandas as pd
+
+PLATAFORMAS = ['2600', '3DO', '3DS', 'DC', 'DS', 'GB', 'GBA', 'GC', 'GEN', 'GG', 'N64', 'NES', 'NG', 'PC',
+               'PCFX', 'PS', 'PS2', 'PS3', 'PS4', 'PSP', 'PSV', 'SAT', 'SCD', 'SNES', 'TG16', 'WS', 'Wii',
+               'WiiU', 'X360', 'XB', 'XOne']
+GENEROS = ['Action', 'Adventure', 'Fighting', 'Misc', 'Platform', 'Puzzle', 'Racing', 'Role-Playing',
+           'Shooter', 'Simulation', 'Sports', 'Strategy']
+EDITORES_CONOCIDOS = ['Nintendo', 'Sony Computer Entertainment', 'Electronic Arts', 'Activision', 'Ubisoft',
+                      'Take-Two Interactive', 'Sega', 'Namco Bandai Games', 'Konami Digital Entertainment', 'THQ']
+
+
+def generar_bloque(rng, inicio: int, filas: int, editores: int = 600) -> pd.DataFrame:
+    # Ventas con distribución de cola larga (pocas superventas, muchos juegos
+    # pequeños) y algunos años y editores faltantes, como en el dataset real
+    editores_sinteticos = np.array(EDITORES_CONOCIDOS + [f"Editor {i}" for i in range(editores)], dtype=object)
+    pesos = 1 / np.arange(1, len(editores_sinteticos) + 1)
+    pesos /= pesos.sum()
+
+    regiones = rng.lognormal(mean=-2.5, sigma=1.3, size=(filas, 4)) * rng.random((filas, 4))
+    regiones = regiones.round(2)
+    anios = rng.integers(1980, 2021, size=filas).astype('float64')
+    anios[rng.random(filas) < 0.016] = np.nan
+    editor = editores_sinteticos[rng.choice(len(editores_sinteticos), size=filas, p=pesos)]
+    editor[rng.random(filas) < 0.004] = None
+
+    return pd.DataFrame({
+        'Rank': np.arange(inicio + 1, inicio + filas + 1),
+        'Name': np.char.add('Juego ', (rng.integers(0, max(filas, 1) * 4, size=filas) + inicio).astype(str)),
+        'Platform': rng.choice(PLATAFORMAS, size=filas),
+        'Year': anios,
+        'Genre': rng.choice(GENEROS, size=filas),
+        'Publisher': editor,
+        'NA_Sales': regiones[:, 0],
+        'EU_Sales': regiones[:, 1],
+        'JP_Sales': regiones[:, 2],
+        'Other_Sales': regiones[:, 3],
+        'Global_Sales': regiones.sum(axis=1).round(2),
+    })
+
+
+def generar_csv(ruta: str, filas: int, filas_por_bloque: int = 1_000_000, semilla: int = 42):
+    rng = np.random.default_rng(semilla)
+    for inicio in range(0, filas, filas_por_bloque):
+        bloque = generar_bloque(rng, inicio, min(filas_por_bloque, filas - inicio))
+        bloque.to_csv(ruta, mode='w' if inicio == 0 else 'a', header=inicio == 0, index=False, float_format='%g')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un CSV sintético de ventas de videojuegos")
+    parser.add_argument("salida")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--bloque", type=int, default=1_000_000)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+    generar_csv(args.salida, args.filas, args.bloque, args.semilla)
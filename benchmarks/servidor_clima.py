@@ -0,0 +1,150 @@
+# Servidor local que imita /data/2.5/weather de OpenWeatherMap (misma forma de
+# respuesta, datos deterministas por ciudad) para probar la página de clima y
+# clima.py sin red ni clave. Simula la latencia de ida y vuelta de cada
+# petición y el coste de abrir cada conexión nueva (handshake TCP/TLS).
+# También simula un servidor con problemas: `fallar` responde 503 a las
+# siguientes N peticiones, `colgar` deja de responder (espera `colgado_s`) y
+# `basura` responde 200 con HTML en vez de JSON (como un proxy o un portal).
+# Uso: python benchmarks/servidor_clima.py --puerto 8766 --latencia-ms 80 --handshake-ms 150
+#      OPENWEATHER_URL=http://127.0.0.1:8766/data/2.5/weather streamlit run Inicio.py
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RUTA = "/data/2.5/weather"
+
+# Coordenadas aproximadas de las ciudades de la página (las demás dan 404)
+COORDENADAS = {
+    "Medellín": (6.25, -75.56), "Bogotá": (4.61, -74.08), "Cali": (3.44, -76.52),
+    "Barranquilla": (10.96, -74.8), "Cartagena": (10.4, -75.51), "Londres": (51.51, -0.13),
+    "Nueva York": (40.71, -74.01), "París": (48.85, 2.35), "Tokio": (35.69, 139.69),
+    "Sídney": (-33.87, 151.21), "Buenos Aires": (-34.61, -58.38), "Madrid": (40.42, -3.7),
+    "Ciudad de México": (19.43, -99.13),
+}
+CONDICIONES = [(800, "Clear", "cielo claro", "01d"), (802, "Clouds", "nubes dispersas", "03d"),
+               (500, "Rain", "lluvia ligera", "10d"), (701, "Mist", "niebla", "50d")]
+
+
+def clima_simulado(ciudad: str) -> dict:
+    lat, lon = COORDENADAS[ciudad]
+    semilla = int.from_bytes(hashlib.sha256(ciudad.encode()).digest()[:4], "big")
+    temp = round(28 - abs(lat) * 0.45 + semilla % 70 / 10, 2)
+    condicion = CONDICIONES[semilla % len(CONDICIONES)]
+    return {
+        "coord": {"lon": lon, "lat": lat},
+        "weather": [{"id": condicion[0], "main": condicion[1], "description": condicion[2], "icon": condicion[3]}],
+        "base": "stations",
+        "main": {"temp": temp, "feels_like": round(temp + 1.3, 2), "temp_min": round(temp - 2, 2),
+                 "temp_max": round(temp + 2, 2), "pressure": 1000 + semilla % 30, "humidity": 35 + semilla % 60},
+        "visibility": 10000,
+        "wind": {"speed": round(semilla % 90 / 10, 1), "deg": semilla % 360},
+        "clouds": {"all": semilla % 100},
+        "dt": 1700000000,
+        "sys": {"country": "XX", "sunrise": 1699950000, "sunset": 1699993000},
+        "timezone": 0,
+        "id": semilla % 1000000,
+        "name": ciudad,
+        "cod": 200,
+    }
+
+
+class ManejadorClima(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive: una conexión sirve varias peticiones
+
+    def setup(self):
+        super().setup()
+        self.server.contar("conexiones")
+        time.sleep(self.server.handshake) # Coste de abrir la conexión
+
+    def do_GET(self):
+        self.server.contar("peticiones")
+        time.sleep(self.server.latencia)
+        if self.server.colgar:
+            time.sleep(self.server.colgado_s)
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        ciudad = params.get("q", [""])[0]
+        if self.server.descontar_fallo():
+            estado, cuerpo = 503, {"cod": 503, "message": "Service Unavailable"}
+        elif url.path != RUTA:
+            estado, cuerpo = 404, {"cod": "404", "message": "Internal error"}
+        elif not params.get("appid"):
+            estado, cuerpo = 401, {"cod": 401, "message": "Invalid API key."}
+        elif ciudad not in COORDENADAS:
+            estado, cuerpo = 404, {"cod": "404", "message": "city not found"}
+        else:
+            estado, cuerpo = 200, clima_simulado(ciudad)
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode()
+        tipo = "application/json; charset=utf-8"
+        if self.server.basura:
+            estado, datos, tipo = 200, b"<html><body>Mantenimiento</body></html>", "text/html"
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorClima(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # Con la cola de 5 por defecto, las conexiones que sobran esperan 1 s al reintento de SYN
+
+    def __init__(self, direccion, latencia: float = 0.0, handshake: float = 0.0):
+        super().__init__(direccion, ManejadorClima)
+        self.latencia = latencia
+        self.handshake = handshake
+        self.contadores = {"conexiones": 0, "peticiones": 0}
+        self.fallar = 0 # Peticiones que aún responderán 503
+        self.colgar = False
+        self.colgado_s = 30.0
+        self.basura = False
+        self._lock = threading.Lock()
+
+    def contar(self, nombre: str):
+        with self._lock:
+            self.contadores[nombre] += 1
+
+    def handle_error(self, request, client_address):
+        # El cliente cortó por timeout mientras el servidor estaba "colgado": no es un error del servidor
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def descontar_fallo(self) -> bool:
+        with self._lock:
+            if self.fallar > 0:
+                self.fallar -= 1
+                return True
+            return False
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{RUTA}"
+
+
+def iniciar(puerto: int = 0, latencia_ms: float = 0, handshake_ms: float = 0) -> ServidorClima:
+    # Arranca el servidor en un hilo; puerto 0 = uno libre (ver servidor.url)
+    servidor = ServidorClima(("127.0.0.1", puerto), latencia_ms / 1000, handshake_ms / 1000)
+    threading.Thread(target=servidor.serve_forever, name="servidor-clima", daemon=True).start()
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local con la forma de respuesta de OpenWeatherMap")
+    parser.add_argument("--puerto", type=int, default=8766)
+    parser.add_argument("--latencia-ms", type=float, default=80)
+    parser.add_argument("--handshake-ms", type=float, default=150)
+    args = parser.parse_args()
+    servidor = ServidorClima(("127.0.0.1", args.puerto), args.latencia_ms / 1000, args.handshake_ms / 1000)
+    print(f"OPENWEATHER_URL={servidor.url}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
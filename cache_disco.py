@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- Caché persistente en disco (SQLite) ---
+# Respuestas de servicios externos guardadas en un archivo SQLite compartido
+# por todos los procesos de la máquina (varias réplicas de Streamlit, la API)
+# y que sobrevive a los reinicios: un proceso nuevo arranca con lo que ya
+# pidieron los demás en vez de gastar cuota. Cada módulo usa su propio
+# `espacio` dentro del mismo archivo. Los valores se guardan como JSON con la
+# hora en que se obtuvieron y la hora en que vencen; leer() devuelve también
+# las entradas vencidas (quien lee decide si le sirven mientras se refrescan)
+# y purgar() borra las que llevan vencidas más de un tiempo. Para acotar el
+# tamaño, leer(tocar=True) anota el último uso y recortar() borra las entradas
+# usadas hace más tiempo hasta quedar por debajo de un máximo de bytes (LRU).
+#
+# Para coordinar procesos hay dos piezas más en el mismo archivo:
+# - Reservas: antes de pedir algo al servicio, un proceso reserva la clave por
+#   unos segundos. Los demás, en vez de repetir la petición, esperan a que el
+#   valor aparezca en la caché (peticiones idénticas simultáneas = una sola).
+# - Cubetas de fichas: limitan las peticiones por minuto al servicio entre
+#   todos los procesos, para no pasar de la cuota del proveedor.
+#
+# SQLite en modo WAL permite leer mientras otro proceso escribe; cada hilo usa
+# su propia conexión.
+
+RUTA_CACHE = os.environ.get("CACHE_DISCO_RUTA", "./assets/.cache/respuestas.sqlite3")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    espacio TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    guardado REAL NOT NULL,
+    expira REAL,
+    usado REAL NOT NULL,
+    PRIMARY KEY (espacio, clave)
+);
+CREATE TABLE IF NOT EXISTS reservas (
+    espacio TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    hasta REAL NOT NULL,
+    PRIMARY KEY (espacio, clave)
+);
+CREATE TABLE IF NOT EXISTS cubetas (
+    nombre TEXT PRIMARY KEY,
+    fichas REAL NOT NULL,
+    actualizado REAL NOT NULL
+);
+"""
+
+
+class Entrada:
+    def __init__(self, valor, guardado: float, expira: float = None):
+        self.valor = valor
+        self.guardado = guardado # time.time() al obtenerla
+        self.expira = expira # None: no vence
+
+    @property
+    def vigente(self) -> bool:
+        return self.expira is None or time.time() < self.expira
+
+    def edad(self) -> float:
+        return time.time() - self.guardado
+
+
+class CacheDisco:
+    def __init__(self, espacio: str, ruta: str = RUTA_CACHE):
+        self.espacio = espacio
+        self.ruta = ruta
+        self._local = threading.local()
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.executescript(_ESQUEMA)
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=10, isolation_level=None) # Autocommit; BEGIN explícito
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+        return conexion
+
+    # --- Entradas ---
+
+    def leer(self, clave: str, tocar: bool = False):
+        # Entrada guardada (vigente o no) o None; con tocar, cuenta como usada para recortar()
+        conexion = self._conexion()
+        fila = conexion.execute(
+            "SELECT valor, guardado, expira FROM entradas WHERE espacio = ? AND clave = ?",
+            (self.espacio, clave)).fetchone()
+        if fila is None:
+            return None
+        if tocar:
+            conexion.execute("UPDATE entradas SET usado = ? WHERE espacio = ? AND clave = ?",
+                             (time.time(), self.espacio, clave))
+        return Entrada(json.loads(fila[0]), fila[1], fila[2])
+
+    def guardar(self, clave: str, valor, ttl: float = None, guardado: float = None):
+        texto = json.dumps(valor, ensure_ascii=False)
+        ahora = time.time()
+        guardado = ahora if guardado is None else guardado
+        self._conexion().execute(
+            "INSERT OR REPLACE INTO entradas (espacio, clave, valor, bytes, guardado, expira, usado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.espacio, clave, texto, len(texto.encode()), guardado,
+             None if ttl is None else guardado + ttl, ahora))
+
+    def borrar(self, clave: str = None):
+        # Una clave, o todo el espacio
+        if clave is None:
+            self._conexion().execute("DELETE FROM entradas WHERE espacio = ?", (self.espacio,))
+        else:
+            self._conexion().execute("DELETE FROM entradas WHERE espacio = ? AND clave = ?", (self.espacio, clave))
+
+    def purgar(self, retencion: float = 0.0) -> int:
+        # Borra las entradas vencidas hace más de `retencion` segundos
+        cursor = self._conexion().execute(
+            "DELETE FROM entradas WHERE espacio = ? AND expira IS NOT NULL AND expira < ?",
+            (self.espacio, time.time() - retencion))
+        return cursor.rowcount
+
+    def recortar(self, max_bytes: int) -> int:
+        # Borra las entradas menos usadas hasta que el espacio ocupe como mucho max_bytes
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            total = conexion.execute("SELECT COALESCE(SUM(bytes), 0) FROM entradas WHERE espacio = ?",
+                                     (self.espacio,)).fetchone()[0]
+            borrar = []
+            if total > max_bytes:
+                for clave, tamano in conexion.execute(
+                        "SELECT clave, bytes FROM entradas WHERE espacio = ? ORDER BY usado", (self.espacio,)):
+                    if total <= max_bytes:
+                        break
+                    borrar.append((self.espacio, clave))
+                    total -= tamano
+                conexion.executemany("DELETE FROM entradas WHERE espacio = ? AND clave = ?", borrar)
+            conexion.execute("COMMIT")
+            return len(borrar)
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def resumen(self) -> dict:
+        entradas, total = self._conexion().execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entradas WHERE espacio = ?", (self.espacio,)).fetchone()
+        return {"entradas": entradas, "bytes": total}
+
+    # --- Reservas entre procesos ---
+
+    def reservar(self, clave: str, segundos: float) -> bool:
+        # True si este proceso queda a cargo de pedir la clave durante `segundos`
+        conexion = self._conexion()
+        ahora = time.time()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conexion.execute("SELECT hasta FROM reservas WHERE espacio = ? AND clave = ?",
+                                    (self.espacio, clave)).fetchone()
+            libre = fila is None or fila[0] <= ahora
+            if libre:
+                conexion.execute("INSERT OR REPLACE INTO reservas (espacio, clave, hasta) VALUES (?, ?, ?)",
+                                 (self.espacio, clave, ahora + segundos))
+            conexion.execute("COMMIT")
+            return libre
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def liberar(self, clave: str):
+        self._conexion().execute("DELETE FROM reservas WHERE espacio = ? AND clave = ?", (self.espacio, clave))
+
+    def esperar(self, clave: str, desde: float, plazo: float, intervalo: float = 0.05):
+        # Espera a que otro proceso guarde la clave (guardado después de `desde`)
+        # o suelte la reserva; devuelve la entrada nueva o None
+        limite = time.monotonic() + plazo
+        while time.monotonic() < limite:
+            entrada = self.leer(clave)
+            if entrada is not None and entrada.guardado >= desde:
+                return entrada
+            fila = self._conexion().execute("SELECT hasta FROM reservas WHERE espacio = ? AND clave = ?",
+                                            (self.espacio, clave)).fetchone()
+            if fila is None or fila[0] <= time.time():
+                return None # La soltó sin guardar (falló): que lo intente quien espera
+            time.sleep(intervalo)
+        return None
+
+
+class CuotaAgotada(Exception):
+    pass
+
+
+class CubetaFichas:
+    # Cubeta de fichas compartida entre procesos: `por_minuto` fichas por
+    # minuto, hasta `rafaga` acumuladas. Cada petición al servicio gasta una.
+    def __init__(self, cache: CacheDisco, nombre: str, por_minuto: float, rafaga: float = None):
+        self.cache = cache
+        self.nombre = nombre
+        self.por_segundo = por_minuto / 60
+        self.rafaga = por_minuto if rafaga is None else rafaga
+        # Los hilos del proceso pasan de a uno: si no, compiten por el bloqueo
+        # de escritura de SQLite, cuyos reintentos esperan varios milisegundos
+        self._lock = threading.Lock()
+
+    def _intentar(self) -> float:
+        # Toma una ficha si hay; si no, devuelve los segundos hasta la próxima
+        with self._lock:
+            return self._intentar_bloqueado()
+
+    def _intentar_bloqueado(self) -> float:
+        conexion = self.cache._conexion()
+        ahora = time.time()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conexion.execute("SELECT fichas, actualizado FROM cubetas WHERE nombre = ?",
+                                    (self.nombre,)).fetchone()
+            fichas = self.rafaga if fila is None else min(self.rafaga,
+                                                         fila[0] + (ahora - fila[1]) * self.por_segundo)
+            espera = 0.0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / self.por_segundo
+            conexion.execute("INSERT OR REPLACE INTO cubetas (nombre, fichas, actualizado) VALUES (?, ?, ?)",
+                             (self.nombre, fichas, ahora))
+            conexion.execute("COMMIT")
+            return espera
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def tomar(self, espera_max: float = 0.0):
+        # Espera como mucho `espera_max` segundos a tener ficha; si no, CuotaAgotada
+        limite = time.monotonic() + espera_max
+        while True:
+            espera = self._intentar()
+            if espera == 0:
+                return
+            if time.monotonic() + espera > limite:
+                raise CuotaAgotada(f"Cuota de {self.nombre} agotada; próxima petición en {espera:.1f} s")
+            time.sleep(espera)
+
+    def disponibles(self) -> float:
+        fila = self.cache._conexion().execute("SELECT fichas, actualizado FROM cubetas WHERE nombre = ?",
+                                              (self.nombre,)).fetchone()
+        if fila is None:
+            return self.rafaga
+        return min(self.rafaga, fila[0] + (time.time() - fila[1]) * self.por_segundo)
@@ -0,0 +1,52 @@
+import os
+
+import plotly.io as pio
+import streamlit as st
+
+from cache_lru import CacheLRU
+
+# --- Caché de figuras Plotly ---
+# Guarda cada figura ya construida (y validada por Plotly), con clave (id del
+# gráfico, parámetros de los widgets, versión del dataset). Es compartida por
+# todas las sesiones del proceso, tiene un presupuesto de memoria (el tamaño de
+# su JSON) y desaloja primero lo que lleva más tiempo sin usarse (LRU, ver
+# cache_lru). En un acierto no se ejecuta pandas ni Plotly Express, solo la
+# serialización de st.plotly_chart. Se guarda la figura y no su JSON: a partir
+# de un JSON o un dict, st.plotly_chart vuelve a validar la figura entera, y eso
+# cuesta más que construirla. Cada gráfico lleva una key fija (su id).
+
+PRESUPUESTO_MB = float(os.environ.get("CACHE_FIGURAS_MB", "64"))
+
+CACHE_FIGURAS = CacheLRU(int(PRESUPUESTO_MB * 1024 * 1024))
+
+
+def _clave_entrada(entrada):
+    # Los objetos con versión (el cubo del dataset) se identifican por ella; las
+    # listas de los multiselect se convierten en tuplas para poder usarlas de clave.
+    if hasattr(entrada, "version"):
+        return ("version", entrada.version)
+    if isinstance(entrada, (list, tuple)):
+        return tuple(_clave_entrada(e) for e in entrada)
+    if isinstance(entrada, set):
+        return tuple(sorted(entrada, key=str))
+    hash(entrada) # Falla aquí si la entrada no sirve como clave (p. ej. un DataFrame)
+    return entrada
+
+
+def grafico_cacheado(id_grafico: str, construir, *entradas, cache: CacheLRU = CACHE_FIGURAS):
+    clave = (id_grafico,) + tuple(_clave_entrada(e) for e in entradas)
+    figura = cache.obtener(clave)
+    if figura is None:
+        figura = construir(*entradas)
+        cache.guardar(clave, figura, len(pio.to_json(figura, validate=False)))
+    st.plotly_chart(figura, use_container_width=True, key=f"grafico-{id_grafico}")
+
+
+def mostrar_estadisticas(cache: CacheLRU = CACHE_FIGURAS):
+    datos = cache.estadisticas()
+    st.sidebar.caption(
+        f"Caché de figuras: {datos['aciertos']} aciertos / {datos['fallos']} fallos "
+        f"({datos['tasa_aciertos']:.0%}), {datos['entradas']} figuras, "
+        f"{datos['bytes'] / 1024 / 1024:.1f} de {datos['presupuesto_bytes'] / 1024 / 1024:.0f} MB, "
+        f"{datos['desalojos']} desalojos"
+    )
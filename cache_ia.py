@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from cache_disco import CacheDisco
+
+# --- Caché de contenido generado con Gemini ---
+# Cada generación tarda segundos y cuesta dinero, y con el mismo producto,
+# público, tono y longitud el prompt que se envía es idéntico. El texto
+# generado se guarda en la caché en disco (cache_disco.py, espacio "ia") con
+# clave = hash del prompt ya armado, el modelo, la temperatura y
+# max_output_tokens: si cambia cualquiera de ellos es otra entrada. Como la
+# caché en disco es compartida, lo que genera una réplica o una sesión lo
+# reutilizan las demás, también después de reiniciar.
+#
+# El contenido no vence; el espacio se limita a MAX_MB y, al pasarse, se
+# borran las entradas usadas hace más tiempo (LRU). Quien quiera variaciones
+# nuevas puede saltarse la lectura: el texto nuevo reemplaza al guardado.
+# Los aciertos y fallos se cuentan por proceso para mostrar la tasa de
+# aciertos en la página: una entrada guardada que quien la pide no acepta
+# (p. ej. copys que no forman una lista) cuenta como fallo, y además como
+# descartada. Si el disco no está disponible, se genera siempre.
+
+MAX_MB = float(os.environ.get("CACHE_IA_MB", "20"))
+VERSION_CLAVE = 1 # Subirla invalida todo lo guardado (p. ej. si cambia cómo se arma la respuesta)
+
+_cache = None
+_lock = threading.Lock()
+_contadores = {"aciertos": 0, "fallos": 0, "descartadas": 0}
+
+
+def cache():
+    global _cache
+    with _lock:
+        if _cache is None:
+            try:
+                _cache = CacheDisco("ia")
+            except (sqlite3.Error, OSError):
+                _cache = False
+        return _cache or None
+
+
+def clave_prompt(prompt: str, modelo: str, temperatura: float, max_tokens: int) -> str:
+    texto = json.dumps([VERSION_CLAVE, modelo, prompt, float(temperatura), int(max_tokens)], ensure_ascii=False)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def buscar(clave: str, valido=None):
+    # Texto guardado o None; cuenta el acierto o el fallo. valido(texto) decide
+    # si el texto guardado sirve: si no, se devuelve None como un fallo
+    texto = None
+    if cache() is not None:
+        try:
+            entrada = cache().leer(clave, tocar=True)
+            texto = None if entrada is None else entrada.valor
+        except sqlite3.Error:
+            pass
+    descartada = texto is not None and valido is not None and not valido(texto)
+    with _lock:
+        _contadores["fallos" if texto is None or descartada else "aciertos"] += 1
+        _contadores["descartadas"] += descartada
+    return None if descartada else texto
+
+
+def guardar(clave: str, texto: str):
+    if cache() is None:
+        return
+    try:
+        cache().guardar(clave, texto)
+        cache().recortar(int(MAX_MB * 1024 * 1024))
+    except sqlite3.Error:
+        pass
+
+
+def estadisticas() -> dict:
+    with _lock:
+        aciertos, fallos, descartadas = _contadores["aciertos"], _contadores["fallos"], _contadores["descartadas"]
+    resumen = {"entradas": 0, "bytes": 0}
+    if cache() is not None:
+        try:
+            resumen = cache().resumen()
+        except sqlite3.Error:
+            pass
+    consultas = aciertos + fallos
+    return {"aciertos": aciertos, "fallos": fallos, "descartadas": descartadas,
+            "tasa": aciertos / consultas if consultas else None, **resumen}
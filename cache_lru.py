@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+# --- Caché LRU acotada en bytes ---
+# Valores ya serializados (str o bytes) compartidos por todo el proceso, con un
+# presupuesto de memoria: al pasarse se desaloja primero lo que lleva más
+# tiempo sin usarse. Para otros objetos se indica su tamaño al guardarlos. No depende de Streamlit, así la usan tanto las páginas
+# (figuras Plotly, cache_figuras.py) como la API (respuestas JSON).
+
+
+class CacheLRU:
+    def __init__(self, presupuesto_bytes: int):
+        self.presupuesto_bytes = presupuesto_bytes
+        self._entradas = OrderedDict() # clave -> (valor, tamaño en bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, valor, tamano: int = None):
+        # tamano: bytes que ocupa el valor (por defecto len(valor))
+        tamano = len(valor) if tamano is None else tamano
+        if tamano > self.presupuesto_bytes:
+            return # Un valor más grande que todo el presupuesto no se guarda
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[clave] = (valor, tamano)
+            self._bytes += tamano
+            while self._bytes > self.presupuesto_bytes:
+                _, (_, desalojado) = self._entradas.popitem(last=False)
+                self._bytes -= desalojado
+                self.desalojos += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "presupuesto_bytes": self.presupuesto_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
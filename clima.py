@@ -0,0 +1,458 @@
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache_disco import CacheDisco, CubetaFichas, CuotaAgotada
+
+# --- Consulta del clima en OpenWeatherMap ---
+# Todas las peticiones salen por una única sesión de requests con un pool de
+# conexiones keep-alive, compartida por el proceso: cambiar de ciudad reutiliza
+# una conexión abierta en vez de repetir el handshake TCP/TLS. Las ciudades se
+# piden juntas desde consultar() en un pool de hilos (hasta MAX_CONEXIONES
+# a la vez), así el lote tarda lo que la respuesta más lenta y no la suma de
+# todas.
+#
+# La última observación de cada ciudad se guarda en memoria del proceso
+# (compartida por todas las sesiones), con clave (ciudad, api_key, url). Se
+# puede invalidar una sola ciudad sin tocar las demás ni ninguna otra caché de
+# la app. Mientras tenga menos de TTL_SEGUNDOS se usa tal cual. Pasado ese
+# tiempo (o tras invalidarla) se sigue mostrando la observación vieja y se pide
+# la nueva en segundo plano (stale-while-revalidate): solo espera la página la
+# primera vez que se consulta una ciudad. Cada ciudad tiene como mucho una
+# petición en curso; si otra consulta la necesita, espera esa misma petición.
+# contadores_cache() cuenta cada ciudad consultada como acierto (vigente),
+# vencida (se mostró la vieja y se refresca) o fallo (hubo que esperarla).
+# calentar() pide todas las ciudades en segundo plano (lo llaman la página de
+# inicio y la de API la primera vez que se abren).
+#
+# Ninguna petición espera indefinidamente: cada intento tiene timeouts de
+# conexión y de lectura, y todos los intentos de una ciudad comparten un plazo
+# (PLAZO_SEGUNDOS). Los fallos transitorios (timeout, conexión, 429 y 5xx) se
+# reintentan con espera exponencial con jitter. Además la página no espera más
+# de PRESUPUESTO_SEGUNDOS por las ciudades sin dato: lo que no llegó a tiempo
+# sigue pidiéndose en segundo plano. Un circuito por servidor cuenta los fallos
+# seguidos; al llegar a UMBRAL_FALLOS se abre y durante ENFRIAMIENTO_SEGUNDOS
+# las peticiones fallan al instante sin tocar la red (se sigue mostrando el
+# último dato bueno). Después deja pasar una petición de prueba: si responde,
+# el circuito se cierra; si no, vuelve a abrirse.
+#
+# Debajo de la memoria hay una caché en disco (cache_disco.py, SQLite) que
+# comparten todos los procesos y que sobrevive a los reinicios, con clave
+# (url, ciudad, unidades, idioma): un proceso que arranca lee de ahí lo que ya
+# pidieron los demás, y si el dato sigue vigente no llama al servicio. Cuando
+# hay que pedir una ciudad, el proceso la reserva; si otro ya la está pidiendo,
+# espera su respuesta en vez de repetirla. Cada llamada al servicio gasta una
+# ficha de una cubeta compartida por todos los procesos que usan la misma
+# clave (POR_MINUTO fichas por minuto), para no pasar de la cuota del
+# proveedor. Si el disco no está disponible, todo sigue funcionando solo en
+# memoria y sin límite de cuota.
+#
+# OPENWEATHER_URL permite apuntar a otro servidor con la misma forma de
+# respuesta (por ejemplo benchmarks/servidor_clima.py para probar sin red).
+
+URL_CLIMA = os.environ.get("OPENWEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+MAX_CONEXIONES = int(os.environ.get("CLIMA_MAX_CONEXIONES", "16"))
+TTL_SEGUNDOS = float(os.environ.get("CLIMA_TTL_SEGUNDOS", "60"))
+TIMEOUT_CONEXION = float(os.environ.get("CLIMA_TIMEOUT_CONEXION", "3.05"))
+TIMEOUT_LECTURA = float(os.environ.get("CLIMA_TIMEOUT_LECTURA", "5"))
+PLAZO_SEGUNDOS = float(os.environ.get("CLIMA_PLAZO_SEGUNDOS", "10")) # Todos los intentos de una ciudad
+PRESUPUESTO_SEGUNDOS = float(os.environ.get("CLIMA_PRESUPUESTO_SEGUNDOS", "4")) # Espera máxima de la página
+REINTENTOS = int(os.environ.get("CLIMA_REINTENTOS", "2"))
+ESPERA_BASE = float(os.environ.get("CLIMA_ESPERA_BASE", "0.2"))
+UMBRAL_FALLOS = int(os.environ.get("CLIMA_UMBRAL_FALLOS", "5"))
+ENFRIAMIENTO_SEGUNDOS = float(os.environ.get("CLIMA_ENFRIAMIENTO_SEGUNDOS", "30"))
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+CACHE_DISCO = os.environ.get("CLIMA_CACHE_DISCO", "1") == "1"
+POR_MINUTO = float(os.environ.get("CLIMA_POR_MINUTO", "60")) # Plan gratuito de OpenWeatherMap
+RETENCION_SEGUNDOS = float(os.environ.get("CLIMA_RETENCION_SEGUNDOS", "86400")) # Datos vencidos en disco
+UNIDADES, IDIOMA = "metric", "es"
+ERRORES_CLIMA = (requests.RequestException, ValueError, CuotaAgotada) # ValueError: cuerpo que no es JSON (requests.JSONDecodeError)
+
+CIUDADES = [
+    "Medellín", "Bogotá", "Cali", "Barranquilla", "Cartagena",
+    "Londres", "Nueva York", "París", "Tokio", "Sídney", "Buenos Aires", "Madrid", "Ciudad de México"
+]
+
+_sesion = None
+_lock_sesion = threading.Lock()
+_interruptores = {} # url -> Interruptor
+_disco = None
+_cubetas = {} # api_key -> CubetaFichas
+_observaciones = {} # (ciudad, api_key, url) -> Observacion
+_en_vuelo = {} # (ciudad, api_key, url) -> Future de la petición en curso
+_contadores = {"aciertos": 0, "vencidas": 0, "fallos": 0} # Ciudades servidas por consultar()
+_lock_cache = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=MAX_CONEXIONES, thread_name_prefix="clima")
+
+
+def sesion() -> requests.Session:
+    # Sesión compartida; el pool admite MAX_CONEXIONES conexiones por host
+    global _sesion
+    with _lock_sesion:
+        if _sesion is None:
+            nueva = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONEXIONES)
+            nueva.mount("http://", adaptador)
+            nueva.mount("https://", adaptador)
+            _sesion = nueva
+        return _sesion
+
+
+def disco():
+    # Caché en disco compartida, o None si está desactivada o no se puede abrir
+    global _disco
+    with _lock_sesion:
+        if _disco is None and CACHE_DISCO:
+            try:
+                _disco = CacheDisco("clima")
+            except (sqlite3.Error, OSError):
+                _disco = False
+        return _disco or None
+
+
+def _clave_disco(ciudad: str, url: str) -> str:
+    return json.dumps([url, ciudad, UNIDADES, IDIOMA], ensure_ascii=False)
+
+
+def _en_disco(operacion, *args):
+    # El disco es una mejora: si falla, se sigue solo con la memoria
+    cache = disco()
+    if cache is None:
+        return None
+    try:
+        return getattr(cache, operacion)(*args)
+    except sqlite3.Error:
+        return None
+
+
+def cubeta(api_key: str):
+    # Cuota por clave de API, compartida entre procesos (None sin disco)
+    cache = disco()
+    if cache is None:
+        return None
+    with _lock_sesion:
+        if api_key not in _cubetas:
+            nombre = "openweathermap:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+            _cubetas[api_key] = CubetaFichas(cache, nombre, POR_MINUTO)
+        return _cubetas[api_key]
+
+
+class CircuitoAbierto(requests.RequestException):
+    pass
+
+
+class Interruptor:
+    # Circuito de un servidor (cerrado -> abierto -> semiabierto) y latencias recientes
+    def __init__(self, umbral: int = UMBRAL_FALLOS, enfriamiento: float = ENFRIAMIENTO_SEGUNDOS):
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self.estado = "cerrado"
+        self.fallos = 0 # Fallos seguidos
+        self.abierto_en = 0.0
+        self.latencias = deque(maxlen=100) # ms de las últimas respuestas
+        self.ultimo_error = None
+        self._prueba = False # Ya salió la petición de prueba del estado semiabierto
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == "abierto" and time.monotonic() - self.abierto_en >= self.enfriamiento:
+                self.estado, self._prueba = "semiabierto", False
+            if self.estado == "semiabierto" and not self._prueba:
+                self._prueba = True
+                return True
+            return self.estado == "cerrado"
+
+    def cancelar(self):
+        # La petición permitida no llegó a salir (sin cuota): otra puede ser la de prueba
+        with self._lock:
+            self._prueba = False
+
+    def exito(self, ms: float):
+        with self._lock:
+            self.latencias.append(ms)
+            self.estado, self.fallos, self._prueba = "cerrado", 0, False
+
+    def fallo(self, error: str, ms: float = None):
+        with self._lock:
+            if ms is not None:
+                self.latencias.append(ms)
+            self.fallos += 1
+            self.ultimo_error = error
+            if self.estado == "semiabierto" or self.fallos >= self.umbral:
+                self.estado, self.abierto_en, self._prueba = "abierto", time.monotonic(), False
+
+    def resumen(self) -> dict:
+        with self._lock:
+            latencias = sorted(self.latencias)
+            restante = self.enfriamiento - (time.monotonic() - self.abierto_en)
+            return {
+                "estado": self.estado,
+                "fallos": self.fallos,
+                "ultimo_error": self.ultimo_error,
+                "reabre_en": max(restante, 0.0) if self.estado == "abierto" else None,
+                "ultima_ms": self.latencias[-1] if self.latencias else None,
+                "p50_ms": latencias[len(latencias) // 2] if latencias else None,
+                "p95_ms": latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)] if latencias else None,
+            }
+
+
+def interruptor(url: str = URL_CLIMA) -> Interruptor:
+    with _lock_sesion:
+        if url not in _interruptores:
+            _interruptores[url] = Interruptor()
+        return _interruptores[url]
+
+
+def estado_upstream(url: str = URL_CLIMA) -> dict:
+    return interruptor(url).resumen()
+
+
+def _reintentable(error: Exception) -> bool:
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in ESTADOS_REINTENTABLES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def obtener_clima(ciudad: str, api_key: str, url: str = URL_CLIMA, plazo: float = None) -> dict:
+    # Respuesta JSON de OpenWeatherMap para una ciudad; lanza RequestException
+    # si falla (CircuitoAbierto sin tocar la red si el servidor está caído)
+    params = {
+        "q": ciudad,
+        "appid": api_key,
+        "units": UNIDADES, # Para obtener temperaturas
+        "lang": IDIOMA
+    }
+    circuito = interruptor(url)
+    cuota = cubeta(api_key)
+    limite = time.monotonic() + (PLAZO_SEGUNDOS if plazo is None else plazo)
+    intento = 0
+    while True:
+        if not circuito.permitir():
+            raise CircuitoAbierto(f"Servicio de clima no disponible ({circuito.ultimo_error})")
+        restante = limite - time.monotonic()
+        try:
+            if cuota is not None:
+                cuota.tomar(max(restante, 0.0)) # Espera turno dentro del plazo
+        except CuotaAgotada:
+            circuito.cancelar()
+            raise
+        except sqlite3.Error:
+            pass
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            circuito.cancelar()
+            raise requests.Timeout(f"Sin tiempo para pedir el clima de {ciudad}")
+        inicio = time.perf_counter()
+        try:
+            respuesta = sesion().get(url, params=params,
+                                     timeout=(min(TIMEOUT_CONEXION, restante), min(TIMEOUT_LECTURA, restante)))
+            respuesta.raise_for_status()
+        except requests.RequestException as error:
+            ms = (time.perf_counter() - inicio) * 1000
+            if not _reintentable(error):
+                circuito.exito(ms) # 401/404: el servidor responde bien, el problema es la petición
+                raise
+            circuito.fallo(str(error), ms)
+            espera = random.uniform(0, ESPERA_BASE * 2 ** intento) # Full jitter
+            intento += 1
+            if intento > REINTENTOS or time.monotonic() + espera >= limite:
+                raise
+            time.sleep(espera)
+            continue
+        try:
+            datos = respuesta.json()
+        except ValueError as error: # 200 con un cuerpo que no es JSON (requests.JSONDecodeError): cuenta como fallo
+            circuito.fallo(f"Respuesta que no es JSON: {error}", (time.perf_counter() - inicio) * 1000)
+            raise
+        circuito.exito((time.perf_counter() - inicio) * 1000)
+        return datos
+
+
+# --- Caché por ciudad con stale-while-revalidate ---
+
+class Observacion:
+    # Última respuesta conocida de una ciudad (datos None si nunca se obtuvo)
+    def __init__(self, datos: dict = None, error: str = None, instante: float = None, fecha: float = None):
+        self.datos = datos
+        self.error = error # Error de la última petición, aunque se conserven datos anteriores
+        self.instante = time.monotonic() if instante is None else instante
+        self.fecha = time.time() if fecha is None else fecha # Hora de la observación, para mostrarla
+
+    def edad(self) -> float:
+        return time.monotonic() - self.instante
+
+
+def _desde_disco(entrada) -> Observacion:
+    # La edad se conserva: un dato guardado hace 50 s por otro proceso vence en 10
+    return Observacion(entrada.valor, None, time.monotonic() - entrada.edad(), entrada.guardado)
+
+
+def _actual(clave: tuple):
+    # Observación en memoria; si no hay, la que haya en disco (la pasa a memoria)
+    with _lock_cache:
+        observacion = _observaciones.get(clave)
+    if observacion is not None:
+        return observacion
+    entrada = _en_disco("leer", _clave_disco(clave[0], clave[2]))
+    if entrada is None:
+        return None
+    with _lock_cache:
+        return _observaciones.setdefault(clave, _desde_disco(entrada))
+
+
+def _pedir_compartido(clave: tuple, anterior):
+    # Datos de la ciudad: de disco si otro proceso acaba de traerlos, esperando
+    # al proceso que ya los está pidiendo, o pidiéndolos al servicio
+    ciudad, api_key, url = clave
+    clave_disco = _clave_disco(ciudad, url)
+    desde = time.time()
+    entrada = _en_disco("leer", clave_disco)
+    if (entrada is not None and entrada.edad() < TTL_SEGUNDOS
+            and (anterior is None or anterior.datos is None or entrada.guardado > anterior.fecha)):
+        return _desde_disco(entrada)
+    reservada = _en_disco("reservar", clave_disco, PLAZO_SEGUNDOS) is not False
+    if not reservada:
+        entrada = _en_disco("esperar", clave_disco, desde, PLAZO_SEGUNDOS)
+        if entrada is not None:
+            return _desde_disco(entrada)
+    try:
+        datos = obtener_clima(ciudad, api_key, url)
+        observacion = Observacion(datos)
+        _en_disco("guardar", clave_disco, datos, TTL_SEGUNDOS, observacion.fecha)
+        return observacion
+    finally:
+        if reservada:
+            _en_disco("liberar", clave_disco)
+
+
+def _actualizar(clave: tuple) -> Observacion:
+    with _lock_cache:
+        anterior = _observaciones.get(clave)
+    obtenida, error = None, None
+    try:
+        obtenida = _pedir_compartido(clave, anterior)
+    except ERRORES_CLIMA as e:
+        error = str(e)
+    with _lock_cache:
+        anterior = _observaciones.get(clave)
+        if obtenida is not None:
+            nueva = obtenida
+        elif anterior is not None and anterior.datos is not None:
+            # Se conserva el último dato bueno, todavía vencido: se reintenta en la próxima consulta
+            nueva = Observacion(anterior.datos, error, anterior.instante, anterior.fecha)
+        else:
+            nueva = Observacion(None, error)
+        _observaciones[clave] = nueva
+        _en_vuelo.pop(clave, None)
+    return nueva
+
+
+def _pedir(clave: tuple):
+    # Lanza la petición de la ciudad, o devuelve la que ya está en curso
+    with _lock_cache:
+        futuro = _en_vuelo.get(clave)
+        if futuro is None:
+            futuro = _en_vuelo[clave] = _pool.submit(_actualizar, clave)
+        return futuro
+
+
+def consultar(ciudades: list, api_key: str, url: str = URL_CLIMA, ttl: float = TTL_SEGUNDOS,
+              revalidar: bool = True, presupuesto: float = PRESUPUESTO_SEGUNDOS) -> dict:
+    # {ciudad: Observacion}. Solo espera a las ciudades sin ningún dato (o a
+    # las vencidas si revalidar es False), y como mucho `presupuesto` segundos;
+    # las demás se refrescan en segundo plano.
+    resultado, esperando, vencidas = {}, {}, 0
+    actuales = {ciudad: _actual((ciudad, api_key, url)) for ciudad in ciudades}
+    for ciudad, observacion in actuales.items():
+        clave = (ciudad, api_key, url)
+        if observacion is not None and observacion.edad() < ttl:
+            resultado[ciudad] = observacion
+        elif observacion is not None and observacion.datos is not None and revalidar:
+            resultado[ciudad] = observacion
+            vencidas += 1
+            _pedir(clave)
+        else:
+            esperando[ciudad] = _pedir(clave)
+    with _lock_cache:
+        _contadores["aciertos"] += len(resultado) - vencidas
+        _contadores["vencidas"] += vencidas
+        _contadores["fallos"] += len(esperando)
+    wait(esperando.values(), timeout=presupuesto)
+    for ciudad, futuro in esperando.items():
+        if futuro.done():
+            resultado[ciudad] = futuro.result()
+        else: # Sigue en curso: la próxima consulta la recoge
+            anterior = actuales[ciudad]
+            resultado[ciudad] = Observacion(anterior.datos if anterior else None,
+                                            f"Sin respuesta en {presupuesto:g} s; se sigue intentando",
+                                            anterior.instante if anterior else None,
+                                            anterior.fecha if anterior else None)
+    return {ciudad: resultado[ciudad] for ciudad in ciudades}
+
+
+def contadores_cache() -> dict:
+    with _lock_cache:
+        return dict(_contadores)
+
+
+def actualizando(ciudades: list, api_key: str, url: str = URL_CLIMA) -> list:
+    # Ciudades con una petición en curso
+    with _lock_cache:
+        return [ciudad for ciudad in ciudades if (ciudad, api_key, url) in _en_vuelo]
+
+
+def invalidar(ciudades: list, api_key: str, url: str = URL_CLIMA):
+    # Marca vencidas solo esas ciudades: se siguen mostrando hasta que llegue el dato nuevo
+    with _lock_cache:
+        for ciudad in ciudades:
+            anterior = _observaciones.get((ciudad, api_key, url))
+            if anterior is not None:
+                _observaciones[(ciudad, api_key, url)] = Observacion(anterior.datos, anterior.error,
+                                                                     float("-inf"), anterior.fecha)
+
+
+def limpiar_cache():
+    # Memoria y disco: si no, el disco volvería a llenar la memoria
+    with _lock_cache:
+        _observaciones.clear()
+    _en_disco("borrar")
+
+
+def calentar(api_key: str, ciudades: list = CIUDADES, url: str = URL_CLIMA, ttl: float = TTL_SEGUNDOS):
+    # Pide en segundo plano las ciudades sin dato vigente en memoria ni en disco
+    # (abre también las conexiones del pool) y purga el disco
+    _en_disco("purgar", RETENCION_SEGUNDOS)
+    faltan = []
+    for ciudad in ciudades:
+        observacion = _actual((ciudad, api_key, url))
+        if observacion is None or observacion.edad() >= ttl:
+            faltan.append(ciudad)
+    return [_pedir((ciudad, api_key, url)) for ciudad in faltan]
+
+
+def resumen(datos: dict) -> pd.DataFrame:
+    # Una fila por ciudad con lo que muestra la vista comparativa
+    filas = []
+    for ciudad, clima in datos.items():
+        filas.append({
+            "Ciudad": ciudad,
+            "Temperatura (°C)": clima["main"]["temp"],
+            "Sensación (°C)": clima["main"].get("feels_like"),
+            "Humedad (%)": clima["main"]["humidity"],
+            "Viento (m/s)": clima.get("wind", {}).get("speed"),
+            "Condición": clima["weather"][0]["description"].capitalize(),
+            "lat": clima["coord"]["lat"],
+            "lon": clima["coord"]["lon"],
+        })
+    return pd.DataFrame(filas)
@@ -0,0 +1,248 @@
+import numbers
+import time
+
+import numpy as np
+import pandas as pd
+
+from cubo_ventas import DIMENSIONES, MEDIDAS, CuboVentas
+from datos_ventas import COLUMNAS_VENTAS, DECIMALES_VENTAS
+from indices_ventas import Comparacion, En, Entre, EsNulo, Igual, IndiceBitmap
+
+# --- Consultas de agregación con planificador ---
+# Una consulta indica las dimensiones de agrupación (por), las medidas
+# (sum, mean, count o top-k de una columna) y filtros (columna, operador,
+# valor). El planificador elige el camino más barato que la puede responder:
+#   - cubo: agrupación y filtros solo sobre dimensiones del cubo y medidas
+#     sum/mean/count de ventas. Se responde con las celdas preagregadas del
+#     cubo (y sus agregados memorizados) sin tocar las filas.
+#   - indice: todos los filtros se resuelven con los índices bitmap/ordenados.
+#     Solo se agregan las filas seleccionadas; un top-k sin agrupación se lee
+#     directamente del orden precalculado de la columna.
+#   - escaneo: el resto. Máscara booleana sobre todas las filas y groupby.
+# Los tres caminos tienen que dar el mismo resultado (bench_consultas.py lo
+# comprueba forzando cada plan): los grupos con dimensión nula (año
+# desconocido) no se incluyen, igual que en el cubo; "!=" / "not in" incluyen
+# las filas nulas, igual que la negación de bitmaps; y los umbrales se comparan
+# en el tipo de la columna (float32 en las ventas), como pandas, también en los
+# índices ordenados (ver indices_ventas.py).
+
+FUNCIONES = ("sum", "mean", "count", "top")
+OPERADORES_IGUALDAD = ("==", "!=", "in", "not in")
+OPERADORES_ORDEN = (">", ">=", "<", "<=", "between")
+OPERADORES_NULOS = ("is null", "not null")
+PLANES = ("cubo", "indice", "escaneo")
+
+
+def nombre_medida(medida: dict) -> str:
+    if medida["funcion"] == "count":
+        return "count"
+    return f"{medida['funcion']}_{medida['columna']}"
+
+
+def _escalar(valor) -> bool:
+    return isinstance(valor, (str, numbers.Number)) and not isinstance(valor, bool)
+
+
+def _numero(valor) -> bool:
+    return isinstance(valor, numbers.Real) and not isinstance(valor, bool) and np.isfinite(valor)
+
+
+def validar(consulta: dict, df: pd.DataFrame):
+    # Todo lo que el motor no sabe evaluar se rechaza aquí con ValueError (400
+    # en la API) en vez de fallar después con TypeError dentro de pandas
+    for col in consulta["por"]:
+        if col not in df.columns:
+            raise ValueError(f"No se puede agrupar por '{col}': la columna no existe")
+    if not consulta["medidas"]:
+        raise ValueError("La consulta necesita al menos una medida")
+    for medida in consulta["medidas"]:
+        if medida["funcion"] not in FUNCIONES:
+            raise ValueError(f"Función no soportada: {medida['funcion']}")
+        if medida["funcion"] != "count":
+            col = medida["columna"]
+            if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col].dtype):
+                raise ValueError(f"La medida {medida['funcion']} necesita una columna numérica, no '{col}'")
+    for filtro in consulta["filtros"]:
+        col, op, valor = filtro["columna"], filtro["op"], filtro.get("valor")
+        if col not in df.columns:
+            raise ValueError(f"No se puede filtrar por '{col}': la columna no existe")
+        if op not in OPERADORES_IGUALDAD + OPERADORES_ORDEN + OPERADORES_NULOS:
+            raise ValueError(f"Operador no soportado: {op}")
+        if op in OPERADORES_ORDEN and not pd.api.types.is_numeric_dtype(df[col].dtype):
+            raise ValueError(f"El operador {op} solo se aplica a columnas numéricas, no a '{col}'")
+        if op in (">", ">=", "<", "<=") and not _numero(valor):
+            raise ValueError(f"El operador {op} necesita un número")
+        if op in ("==", "!=") and not _escalar(valor):
+            raise ValueError(f"El operador {op} necesita un valor (texto o número); para nulos use 'is null'")
+        if op in ("in", "not in") and not (isinstance(valor, list) and all(_escalar(v) for v in valor)):
+            raise ValueError(f"El operador {op} necesita una lista de valores (texto o número)")
+        if op == "between" and not (isinstance(valor, list) and len(valor) == 2 and all(_numero(v) for v in valor)):
+            raise ValueError("El operador between necesita [mínimo, máximo] numéricos")
+    nombres = [nombre_medida(m) for m in consulta["medidas"]]
+    if consulta.get("orden") and consulta["orden"].lstrip("-") not in nombres + consulta["por"]:
+        raise ValueError(f"No se puede ordenar por '{consulta['orden']}': no es una medida ni una dimensión")
+
+
+# --- Filtros como máscara (escaneo) o como predicado sobre índices ---
+
+def _mascara(datos: pd.DataFrame, filtros: list) -> np.ndarray:
+    mascara = np.ones(len(datos), dtype=bool)
+    for filtro in filtros:
+        serie, op, valor = datos[filtro["columna"]], filtro["op"], filtro.get("valor")
+        if op in ("==", "!="):
+            parcial = serie == valor
+        elif op in ("in", "not in"):
+            parcial = serie.isin(valor)
+        elif op == "between":
+            parcial = (serie >= valor[0]) & (serie <= valor[1])
+        elif op in OPERADORES_ORDEN:
+            parcial = Comparacion.OPERADORES[op](serie, valor)
+        else:
+            parcial = serie.isna()
+        parcial = pd.Series(parcial).fillna(False).to_numpy(dtype=bool)
+        if op in ("!=", "not in", "not null"): # Negación de la máscara positiva: los nulos entran
+            parcial = ~parcial
+        mascara &= parcial
+    return mascara
+
+
+def _predicado(filtro: dict, indice: IndiceBitmap):
+    # Predicado equivalente sobre los índices, o None si la columna no tiene
+    # el índice que el operador necesita
+    col, op, valor = filtro["columna"], filtro["op"], filtro.get("valor")
+    con_bitmap = indice.tiene_indice(col)
+    if op in OPERADORES_IGUALDAD and con_bitmap:
+        predicado = Igual(col, valor) if op in ("==", "!=") else En(col, valor)
+        return ~predicado if op in ("!=", "not in") else predicado
+    if op in OPERADORES_ORDEN and (con_bitmap or indice.ordenado(col) is not None):
+        return Entre(col, *valor) if op == "between" else Comparacion(col, op, valor)
+    if op in OPERADORES_NULOS and con_bitmap:
+        return EsNulo(col) if op == "is null" else ~EsNulo(col)
+    return None
+
+
+def planificar(consulta: dict, indice: IndiceBitmap) -> str:
+    medidas = consulta["medidas"]
+    if (all(col in DIMENSIONES for col in consulta["por"])
+            and all(f["columna"] in DIMENSIONES for f in consulta["filtros"])
+            and all(m["funcion"] == "count" or (m["funcion"] in ("sum", "mean") and m["columna"] in COLUMNAS_VENTAS)
+                    for m in medidas)):
+        return "cubo"
+    if all(_predicado(f, indice) is not None for f in consulta["filtros"]):
+        return "indice"
+    return "escaneo"
+
+
+# --- Ejecución ---
+
+def _desde_cubo(cubo: CuboVentas, consulta: dict) -> pd.DataFrame:
+    por, filtros = consulta["por"], consulta["filtros"]
+    columnas = [f["columna"] for f in filtros]
+    if por and all(f["op"] in ("==", "in") for f in filtros) and len(set(columnas)) == len(columnas):
+        # Agregado memorizado del cubo
+        agregado = cubo.agregar(por, {f["columna"]: f["valor"] for f in filtros})
+    else:
+        celdas = cubo.datos[_mascara(cubo.datos, filtros)]
+        if por:
+            agregado = celdas.groupby(por, observed=True)[MEDIDAS].sum()
+        else:
+            agregado = celdas[MEDIDAS].sum().to_frame().T
+
+    resultado = {}
+    for medida in consulta["medidas"]:
+        nombre = nombre_medida(medida)
+        if medida["funcion"] == "count":
+            resultado[nombre] = agregado["Juegos"].astype("int64")
+        elif medida["funcion"] == "sum":
+            resultado[nombre] = agregado[medida["columna"]]
+        else:
+            resultado[nombre] = agregado[medida["columna"]] / agregado["Juegos"]
+    return pd.DataFrame(resultado, index=agregado.index)
+
+
+def _top(filas: pd.DataFrame, por: list, columna: str, k: int) -> pd.Series:
+    valores = filas[columna].to_numpy(dtype="float64", na_value=np.nan)
+    orden = np.argsort(-valores, kind="stable")
+    ordenadas = filas.iloc[orden[~np.isnan(valores[orden])]]
+    if not por:
+        return pd.Series([_registros_top(ordenadas.head(k), columna)])
+    mejores = ordenadas.groupby(por, observed=True, sort=False).head(k)
+    if mejores.empty: # apply sobre cero grupos devuelve un DataFrame, no una Serie
+        return pd.Series(dtype=object)
+    return (mejores[["Nombre", "Plataforma", columna]]
+            .groupby([mejores[col] for col in por], observed=True)
+            .apply(lambda grupo: _registros_top(grupo, columna)))
+
+
+def _registros_top(filas: pd.DataFrame, columna: str) -> list:
+    return [{"Nombre": nombre, "Plataforma": plataforma, columna: round(float(valor), DECIMALES_VENTAS)}
+            for nombre, plataforma, valor in zip(filas["Nombre"], filas["Plataforma"], filas[columna])]
+
+
+def _desde_filas(filas: pd.DataFrame, consulta: dict, indice: IndiceBitmap = None, bits=None) -> pd.DataFrame:
+    # Agrega solo las filas seleccionadas (todas las del filtro en el escaneo)
+    por = consulta["por"]
+    grupos = [filas[col] for col in por]
+    resultado = {}
+    for medida in consulta["medidas"]:
+        nombre = nombre_medida(medida)
+        funcion, columna = medida["funcion"], medida.get("columna")
+        if funcion == "count":
+            resultado[nombre] = filas.groupby(grupos, observed=True).size() if por else pd.Series([len(filas)])
+        elif funcion in ("sum", "mean"):
+            serie = filas[columna].astype("float64")
+            if por:
+                resultado[nombre] = getattr(serie.groupby(grupos, observed=True), funcion)()
+            else:
+                resultado[nombre] = pd.Series([getattr(serie, funcion)()])
+        elif not por and indice is not None:
+            # top-k sin agrupación: las k primeras filas del orden precalculado
+            orden = indice.orden(columna, ascendente=False)
+            marcas = np.unpackbits(bits, count=indice.filas).astype(bool)
+            mejores = orden[marcas[orden]][:medida["k"]]
+            mejores = mejores[indice.df[columna].iloc[mejores].notna().to_numpy()]
+            resultado[nombre] = pd.Series([_registros_top(indice.df.iloc[mejores], columna)])
+        else:
+            resultado[nombre] = _top(filas, por, columna, medida["k"])
+    return pd.DataFrame(resultado)
+
+
+def ejecutar_consulta(consulta: dict, df: pd.DataFrame, indice: IndiceBitmap, cubo: CuboVentas, plan: str = None):
+    # Devuelve (plan usado, milisegundos, DataFrame con una fila por grupo)
+    validar(consulta, df)
+    inicio = time.perf_counter()
+    plan_elegido = planificar(consulta, indice)
+    if plan is not None and plan != plan_elegido:
+        # Forzar un camino más general siempre es posible; uno más específico no
+        if PLANES.index(plan) < PLANES.index(plan_elegido):
+            raise ValueError(f"La consulta no se puede responder con el plan '{plan}'")
+        plan_elegido = plan
+
+    if plan_elegido == "cubo":
+        resultado = _desde_cubo(cubo, consulta)
+    elif plan_elegido == "indice":
+        predicados = [_predicado(f, indice) for f in consulta["filtros"]]
+        bits = indice.todos()
+        for predicado in predicados:
+            bits = np.bitwise_and(bits, predicado.evaluar(indice))
+        filas = df.iloc[indice.filas_de(bits)] if predicados else df
+        resultado = _desde_filas(filas, consulta, indice, bits)
+    else:
+        filas = df[_mascara(df, consulta["filtros"])] if consulta["filtros"] else df
+        resultado = _desde_filas(filas, consulta)
+
+    if consulta["por"]:
+        resultado = resultado.reset_index()
+        resultado.columns = consulta["por"] + list(resultado.columns[len(consulta["por"]):])
+    for medida in consulta["medidas"]:
+        nombre = nombre_medida(medida)
+        if medida["funcion"] == "sum":
+            resultado[nombre] = resultado[nombre].round(DECIMALES_VENTAS)
+        elif medida["funcion"] == "mean":
+            resultado[nombre] = resultado[nombre].round(DECIMALES_VENTAS + 2)
+    if consulta.get("orden"):
+        columna = consulta["orden"].lstrip("-")
+        resultado = resultado.sort_values(columna, ascending=not consulta["orden"].startswith("-"),
+                                          kind="stable", na_position="last")
+    resultado = resultado.head(consulta.get("limite") or len(resultado)).reset_index(drop=True)
+    return plan_elegido, (time.perf_counter() - inicio) * 1000, resultado
@@ -0,0 +1,152 @@
+import os
+import threading
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from datos_ventas import COLUMNAS_VENTAS, FILAS_POR_BLOQUE, leer_por_bloques, version_ventas
+
+# --- Cubo de agregaciones de ventas ---
+# Se materializa una sola vez, al cargar el dataset, la suma de ventas por
+# región y el número de juegos para cada combinación Género × Plataforma ×
+# Año × Editor. Los gráficos se responden agregando ese cubo (mucho más
+# pequeño que el dataset en datos grandes) en vez de recorrer todas las filas.
+
+DIMENSIONES = ['Género', 'Plataforma', 'Año', 'Editor']
+REGIONES = ['Ventas_NA', 'Ventas_EU', 'Ventas_JP', 'Ventas_OTRAS']
+MEDIDAS = COLUMNAS_VENTAS + ['Juegos']
+
+MAX_AGREGADOS = 256
+
+
+def agrupar_cubo(df: pd.DataFrame) -> pd.DataFrame:
+    # Suma de ventas (acumulada en float64 aunque el dataset sea float32) y
+    # número de juegos por cada combinación de dimensiones
+    ventas = df[COLUMNAS_VENTAS].astype('float64')
+    ventas[DIMENSIONES] = df[DIMENSIONES]
+    agrupado = ventas.groupby(DIMENSIONES, observed=True, dropna=False)
+    datos = agrupado[COLUMNAS_VENTAS].sum()
+    datos['Juegos'] = agrupado.size()
+    return datos.reset_index()
+
+
+def _combinar_parciales(parciales: list) -> pd.DataFrame:
+    # Une cubos parciales (por ejemplo de distintos bloques del CSV) en uno
+    # solo. Cada bloque trae su propia tabla de códigos, así que primero se
+    # unifican las categorías para que el groupby siga trabajando con enteros.
+    columnas = {}
+    for col in ['Género', 'Plataforma', 'Editor']:
+        columnas[col] = union_categoricals([p[col].array for p in parciales], ignore_order=True)
+    datos = pd.concat([p.drop(columns=list(columnas)) for p in parciales], ignore_index=True)
+    datos = datos.assign(**columnas)
+    return datos.groupby(DIMENSIONES, observed=True, dropna=False)[MEDIDAS].sum().reset_index()
+
+
+class CuboVentas:
+    def __init__(self, df: pd.DataFrame = None, datos: pd.DataFrame = None, version: str = None):
+        # Se construye desde el dataset completo o, en la ingesta por bloques,
+        # desde un cubo ya agregado (entonces no hay filas disponibles: df es None)
+        self.df = df
+        self.datos = agrupar_cubo(df) if datos is None else datos
+        if version is None:
+            version = version_ventas(df) or f"id-{id(df)}" # Sin versión: se identifica por objeto
+        self.version = version
+
+        self._agregados = {}
+        self._lock = threading.Lock()
+        for dimension in DIMENSIONES: # Totales por una dimensión, los más usados
+            self.agregar(dimension)
+
+    def __len__(self):
+        return len(self.datos)
+
+    def _clave(self, por, filtros):
+        filtros = filtros or {}
+        normalizados = []
+        for col, valores in sorted(filtros.items()):
+            if not isinstance(valores, (list, tuple, set, pd.Index)):
+                valores = [valores]
+            normalizados.append((col, tuple(sorted(valores, key=str))))
+        return tuple(por), tuple(normalizados)
+
+    def filtrar(self, filtros: dict = None) -> pd.DataFrame:
+        # Celdas del cubo que cumplen los filtros {dimensión: valor o lista de valores}
+        datos = self.datos
+        for col, valores in (filtros or {}).items():
+            if isinstance(valores, (list, tuple, set, pd.Index)):
+                datos = datos[datos[col].isin(list(valores))]
+            else:
+                datos = datos[datos[col] == valores]
+        return datos
+
+    def agregar(self, por, filtros: dict = None) -> pd.DataFrame:
+        # Todas las medidas agregadas por una o varias dimensiones. El cubo es
+        # inmutable, así que cada combinación por/filtros se calcula una vez.
+        por = [por] if isinstance(por, str) else list(por)
+        clave = self._clave(por, filtros)
+        with self._lock:
+            if clave in self._agregados:
+                return self._agregados[clave]
+
+        resultado = self.filtrar(filtros).groupby(por, observed=True)[MEDIDAS].sum()
+
+        with self._lock:
+            if len(self._agregados) >= MAX_AGREGADOS:
+                self._agregados.pop(next(iter(self._agregados)))
+            self._agregados[clave] = resultado
+        return resultado
+
+    def total(self, por, medida='Ventas_GLOBALES', filtros: dict = None):
+        # Serie (o DataFrame si medida es una lista) con la medida agregada por `por`
+        return self.agregar(por, filtros)[medida]
+
+    def suma(self, medida='Ventas_GLOBALES', filtros: dict = None):
+        return self.filtrar(filtros)[medida].sum()
+
+    def por_region(self, filtros: dict = None) -> pd.Series:
+        return self.filtrar(filtros)[REGIONES].sum()
+
+    def pivote(self, filas: str, columnas: str, medida='Ventas_GLOBALES', filtros: dict = None) -> pd.DataFrame:
+        return self.total([filas, columnas], medida, filtros).unstack(fill_value=0)
+
+
+# --- Ingesta por bloques ---
+# Construye solo el cubo de un CSV que no conviene cargar entero: el archivo se
+# lee por bloques acotados, cada bloque se limpia igual que el dataset completo
+# y se agrega al cubo. El resultado no tiene filas (df es None), así que sirve
+# para las consultas agregadas del cubo, no para las páginas que muestran filas.
+#
+# La memoria máxima es la de un bloque más la del cubo acumulado (hasta
+# `combinar_cada` cubos parciales antes de combinarlos). El cubo crece con el
+# número de combinaciones distintas Género × Plataforma × Año × Editor, no con
+# el de filas, pero con muchos editores puede tener casi tantas celdas como
+# filas (bench_ingesta.py lo muestra) y entonces el ahorro frente a la carga
+# completa es pequeño.
+
+class AcumuladorVentas:
+    def __init__(self, combinar_cada: int = 8):
+        self.combinar_cada = combinar_cada
+        self.filas = 0
+        self._parciales = []
+
+    def agregar_bloque(self, bloque: pd.DataFrame):
+        self.filas += len(bloque)
+        self._parciales.append(agrupar_cubo(bloque))
+        if len(self._parciales) >= self.combinar_cada:
+            self._parciales = [_combinar_parciales(self._parciales)]
+
+    def cubo(self, version: str) -> CuboVentas:
+        datos = _combinar_parciales(self._parciales)
+        for col in ['Género', 'Plataforma', 'Editor']:
+            datos[col] = datos[col].cat.reorder_categories(sorted(datos[col].cat.categories)) # Tabla de códigos estable
+        return CuboVentas(datos=datos, version=version)
+
+
+def ingestar_por_bloques(ruta: str, filas_por_bloque: int = FILAS_POR_BLOQUE, **opciones) -> CuboVentas:
+    acumulador = AcumuladorVentas(**opciones)
+    for bloque in leer_por_bloques(ruta, filas_por_bloque):
+        acumulador.agregar_bloque(bloque)
+    info = os.stat(ruta)
+    # Se evita una pasada extra solo para el hash: la versión sale del tamaño y la fecha
+    version = f"bloques-{info.st_size}-{info.st_mtime_ns}"
+    return acumulador.cubo(version)
@@ -0,0 +1,290 @@
+import hashlib
+import os
+import re
+import threading
+
+import pandas as pd
+
+# --- Carga compartida del dataset de ventas de videojuegos ---
+# Las páginas de Streamlit se re-ejecutan completas con cada clic, así que el
+# parseo y la limpieza del CSV se hacen una sola vez por proceso. Además se
+# guarda una copia en Parquet (sidecar) identificada por el hash del CSV, en la
+# carpeta .cache junto al CSV, para que los arranques en frío lean el archivo
+# columnar en vez del CSV.
+#
+# El esquema es compacto: los textos repetidos (plataforma, género, editor y
+# nombre) son categóricas con tabla de códigos ordenada, las ventas float32 y
+# el año un entero pequeño. Así filtros y groupbys trabajan sobre códigos
+# enteros en vez de comparar cadenas.
+
+RUTA_VENTAS = "./assets/vgsales.csv"
+CARPETA_SIDECAR = ".cache" # Junto al CSV: assets/vgsales.csv -> assets/.cache
+
+COLUMNAS_ES = {
+    'Name': 'Nombre',
+    'Platform': 'Plataforma',
+    'Year': 'Año',
+    'Genre': 'Género',
+    'Publisher': 'Editor',
+    'NA_Sales': 'Ventas_NA',
+    'EU_Sales': 'Ventas_EU',
+    'JP_Sales': 'Ventas_JP',
+    'Other_Sales': 'Ventas_OTRAS',
+    'Global_Sales': 'Ventas_GLOBALES'
+}
+
+COLUMNAS_VENTAS = ['Ventas_NA', 'Ventas_EU', 'Ventas_JP', 'Ventas_OTRAS', 'Ventas_GLOBALES']
+COLUMNAS_CATEGORICAS = ['Nombre', 'Plataforma', 'Género', 'Editor']
+
+# Tipos usados al leer el CSV: evita crear primero columnas object/float64
+TIPOS_CSV = {
+    'Rank': 'int32',
+    'Name': 'category',
+    'Platform': 'category',
+    'Genre': 'category',
+    'Publisher': 'category',
+    'NA_Sales': 'float32',
+    'EU_Sales': 'float32',
+    'JP_Sales': 'float32',
+    'Other_Sales': 'float32',
+    'Global_Sales': 'float32'
+}
+
+# Las ventas se publican en millones con dos decimales; al serializar los
+# float32 se redondean a esa precisión (evita 41.490002 en vez de 41.49)
+DECIMALES_VENTAS = 2
+
+# Tamaño de bloque por defecto para la ingesta por bloques de archivos grandes
+FILAS_POR_BLOQUE = 500_000
+
+# Se incrementa cuando cambia el esquema, para no reutilizar sidecars viejos
+VERSION_ESQUEMA = 2
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def hash_archivo(ruta: str, tam_bloque: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _a_categoria(serie: pd.Series) -> pd.Series:
+    # Categórica con las categorías ordenadas: el mismo conjunto de valores
+    # produce siempre la misma tabla de códigos.
+    serie = serie.astype('category').cat.remove_unused_categories()
+    return serie.cat.set_categories(sorted(serie.cat.categories))
+
+
+def _rellenar(serie: pd.Series, valor: str) -> pd.Series:
+    if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+        serie = serie.cat.add_categories([valor])
+    return serie.fillna(valor)
+
+
+def limpiar_ventas(df: pd.DataFrame, categoricas: list = COLUMNAS_CATEGORICAS) -> pd.DataFrame:
+    df = df.rename(columns=COLUMNAS_ES)
+
+    df['Año'] = pd.to_numeric(df['Año'], errors='coerce') # Convierte no-números a NaN
+    df['Año'] = df['Año'].astype('Int16') # Entero pequeño que permite NaNs
+
+    for col in COLUMNAS_VENTAS:
+        if col in df.columns:
+            df[col] = df[col].fillna(0).astype('float32') # Rellena NaN con 0 en columnas de ventas
+
+    df['Editor'] = _rellenar(df['Editor'], 'Desconocido')
+    df['Género'] = _rellenar(df['Género'], 'Desconocido')
+
+    for col in categoricas:
+        if col in df.columns:
+            df[col] = _a_categoria(df[col])
+    return df
+
+
+def leer_por_bloques(ruta: str, filas_por_bloque: int = FILAS_POR_BLOQUE):
+    # Genera el CSV en bloques ya limpios, con el mismo mapeo de columnas y
+    # los mismos tipos que el dataset completo. El nombre queda como texto:
+    # en un bloque casi todos son distintos y codificarlos no compensa.
+    tipos = {**TIPOS_CSV, 'Name': object}
+    categoricas = [col for col in COLUMNAS_CATEGORICAS if col != 'Nombre']
+    with pd.read_csv(ruta, dtype=tipos, chunksize=filas_por_bloque) as lector:
+        for bloque in lector:
+            yield limpiar_ventas(bloque, categoricas)
+
+
+def tabla_codigos(df: pd.DataFrame, columna: str) -> pd.DataFrame:
+    # Tabla código -> valor de una columna categórica
+    categorias = df[columna].cat.categories
+    return pd.DataFrame({'Código': range(len(categorias)), columna: categorias})
+
+
+def esquema_original(df: pd.DataFrame) -> pd.DataFrame:
+    # Reconstruye el esquema anterior (textos object, ventas float64, año Int64)
+    # para poder comparar el consumo de memoria.
+    original = df.copy()
+    for col in COLUMNAS_CATEGORICAS:
+        if col in original.columns:
+            original[col] = original[col].astype(object)
+    for col in COLUMNAS_VENTAS:
+        if col in original.columns:
+            original[col] = original[col].astype('float64')
+    original['Año'] = original['Año'].astype('Int64')
+    if 'Rank' in original.columns:
+        original['Rank'] = original['Rank'].astype('int64')
+    return original
+
+
+def reporte_memoria(df: pd.DataFrame) -> pd.DataFrame:
+    # Bytes por columna del esquema anterior frente al compacto (incluye el
+    # contenido de las cadenas, no solo los punteros).
+    antes = esquema_original(df).memory_usage(deep=True, index=False)
+    despues = df.memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame({'Original (bytes)': antes, 'Compacto (bytes)': despues})
+    reporte.loc['Total'] = reporte.sum()
+    reporte['Reducción (%)'] = (100 * (1 - reporte['Compacto (bytes)'] / reporte['Original (bytes)'])).round(1)
+    return reporte
+
+
+def _solo_lectura(df: pd.DataFrame) -> pd.DataFrame:
+    # Reconstruye el DataFrame sobre arreglos de solo lectura: el mismo objeto
+    # se comparte entre sesiones y páginas, así que nadie debe poder modificarlo.
+    columnas = {}
+    for col in df.columns:
+        valores = df[col].array
+        if isinstance(valores, pd.Categorical):
+            codigos = valores.codes.copy()
+            codigos.flags.writeable = False
+            columnas[col] = pd.Categorical.from_codes(codigos, dtype=valores.dtype)
+        elif isinstance(valores, pd.arrays.IntegerArray):
+            datos = valores._data.copy()
+            mascara = valores._mask.copy()
+            datos.flags.writeable = False
+            mascara.flags.writeable = False
+            columnas[col] = pd.arrays.IntegerArray(datos, mascara)
+        elif isinstance(valores, pd.arrays.NumpyExtensionArray):
+            datos = valores.to_numpy().copy()
+            datos.flags.writeable = False
+            columnas[col] = datos
+        else:
+            columnas[col] = valores
+    return pd.DataFrame(columnas, copy=False)
+
+
+def version_ventas(df: pd.DataFrame) -> str:
+    # Identificador del contenido del dataset (esquema + hash del CSV)
+    return df.attrs.get('version', '')
+
+
+def directorio_sidecar(ruta_csv: str) -> str:
+    # Los archivos derivados van junto al CSV, no al directorio de trabajo del proceso
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_csv)), CARPETA_SIDECAR)
+
+
+def _ruta_sidecar(ruta_csv: str, huella: str, directorio: str) -> str:
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    return os.path.join(directorio, f"{nombre}-v{VERSION_ESQUEMA}-{huella[:16]}.parquet")
+
+
+def _borrar_versiones_viejas(ruta_csv: str, directorio: str, vigente: str):
+    # Borra los derivados de otras versiones de este CSV: mismo nombre exacto,
+    # seguido de -v<esquema>-<hash> (los de ventas-2024.csv no son de ventas.csv)
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    extension = os.path.splitext(vigente)[1]
+    patron = re.compile(re.escape(nombre) + r"-v\d+-[0-9a-f]{16}" + re.escape(extension))
+    for viejo in os.listdir(directorio):
+        if patron.fullmatch(viejo) and viejo != os.path.basename(vigente):
+            try:
+                os.remove(os.path.join(directorio, viejo))
+            except OSError:
+                pass
+
+
+def _leer_o_construir(ruta_csv: str, huella: str, directorio: str) -> pd.DataFrame:
+    sidecar = _ruta_sidecar(ruta_csv, huella, directorio)
+
+    if os.path.exists(sidecar):
+        try:
+            return pd.read_parquet(sidecar)
+        except Exception:
+            pass # Sidecar dañado o incompatible: se regenera desde el CSV
+
+    df = limpiar_ventas(pd.read_csv(ruta_csv, dtype=TIPOS_CSV))
+
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        temporal = f"{sidecar}.{os.getpid()}.tmp"
+        df.to_parquet(temporal, index=False)
+        os.replace(temporal, sidecar) # Escritura atómica: otros procesos nunca ven un archivo a medias
+        _borrar_versiones_viejas(ruta_csv, directorio, sidecar)
+    except Exception:
+        pass # Sin permisos de escritura o sin pyarrow: se sigue solo con el CSV
+
+    return df
+
+
+# --- Instantánea Arrow para compartir entre procesos ---
+# La API publica cada versión del dataset también como archivo Arrow IPC sin
+# comprimir (uno por versión, nunca se modifica). Los procesos trabajadores lo
+# abren con memory-map: las columnas numéricas y los códigos de las categóricas
+# apuntan a las páginas del archivo, que el sistema comparte entre todos los
+# procesos, en vez de ser una copia por proceso. Solo las tablas de categorías
+# (los textos distintos) se crean en cada proceso.
+
+def ruta_instantanea(ruta_csv: str, version: str, directorio: str = None) -> str:
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    return os.path.join(directorio or directorio_sidecar(ruta_csv), f"{nombre}-{version}.arrow")
+
+
+def guardar_instantanea(tabla, ruta_csv: str, version: str, directorio: str = None) -> str:
+    # Escribe la tabla Arrow de la versión (si no existe ya) y devuelve su ruta
+    import pyarrow as pa
+
+    directorio = directorio or directorio_sidecar(ruta_csv)
+    destino = ruta_instantanea(ruta_csv, version, directorio)
+    if not os.path.exists(destino):
+        os.makedirs(directorio, exist_ok=True)
+        temporal = f"{destino}.{os.getpid()}.tmp"
+        with pa.OSFile(temporal, "wb") as archivo:
+            with pa.ipc.new_file(archivo, tabla.schema) as escritor:
+                escritor.write_table(tabla)
+        os.replace(temporal, destino) # Atómico: un trabajador nunca abre un archivo a medias
+        # Los procesos que aún mapean una versión anterior la siguen leyendo hasta
+        # cerrarse (en POSIX el archivo solo desaparece cuando nadie lo tiene abierto)
+        _borrar_versiones_viejas(ruta_csv, directorio, destino)
+    return destino
+
+
+def mapear_instantanea(ruta: str, version: str) -> pd.DataFrame:
+    # DataFrame de solo lectura sobre el archivo Arrow mapeado en memoria
+    import pyarrow as pa
+
+    tabla = pa.ipc.open_file(pa.memory_map(ruta, "r")).read_all()
+    df = tabla.to_pandas(split_blocks=True) # Un bloque por columna: sin copias para consolidar
+    for col in df.columns:
+        valores = df[col].array
+        if isinstance(valores, pd.arrays.IntegerArray): # Los enteros con nulos sí se copian
+            valores._data.flags.writeable = False
+            valores._mask.flags.writeable = False
+    df.attrs['version'] = version
+    return df
+
+
+def cargar_ventas(ruta: str = RUTA_VENTAS, directorio: str = None) -> pd.DataFrame:
+    # Devuelve el DataFrame limpio y tipado, compartido (y de solo lectura) por
+    # todo el proceso. Si el CSV cambia en disco se vuelve a construir.
+    ruta = os.path.abspath(ruta)
+    info = os.stat(ruta)
+    clave = (ruta, info.st_mtime_ns, info.st_size)
+
+    with _lock:
+        if clave not in _cache:
+            for vieja in [c for c in _cache if c[0] == ruta]:
+                del _cache[vieja]
+            huella = hash_archivo(ruta)
+            df = _solo_lectura(_leer_o_construir(ruta, huella, directorio or directorio_sidecar(ruta)))
+            df.attrs['version'] = f"v{VERSION_ESQUEMA}-{huella[:16]}"
+            _cache[clave] = df
+        return _cache[clave]
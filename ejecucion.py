@@ -0,0 +1,235 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from metricas import medir, sumar_fases
+
+# --- Ejecución acotada de las consultas pesadas de la API ---
+# Los cálculos pesados (describe, groupbys, escaneos) no se ejecutan en el
+# threadpool del servidor: van a un pool de procesos de tamaño fijo y el
+# endpoint espera el resultado sin ocupar un hilo. Los trabajos medianos (una
+# página de filas) van a un pool de hilos propio. Así los endpoints ligeros
+# (/, /admin/estado) nunca esperan detrás de una agregación.
+#
+# Cada endpoint tiene un límite de consultas simultáneas y un plazo: si no
+# consigue turno dentro del plazo responde 503 (con Retry-After) y si el
+# cálculo no termina a tiempo responde 504. El turno se libera cuando el
+# cálculo termina de verdad, así el límite refleja el trabajo real del pool.
+#
+# Hay un pool de procesos por versión del dataset. Al publicar una versión
+# (publicar(), lo llama la recarga) se crea su pool y pasa a ser el vigente; el
+# anterior deja de recibir trabajo y se cierra cuando terminan las consultas
+# que ya tenía, así una recarga no corta nada. Una consulta pide el pool de su
+# versión; si ese pool ya se cerró, va al vigente (y el trabajador responde
+# VersionCambiada -> 503). Nunca se crea un pool por una versión que no sea la
+# que se publica, así que no hay pools que se reemplacen unos a otros.
+#
+# Los procesos no se crean con fork: la API tiene hilos (servidor, recarga,
+# vigilante) y hacer fork de un proceso con hilos puede dejar bloqueos tomados
+# en el hijo. Se usa forkserver (un proceso limpio, con pandas ya importado,
+# del que salen los trabajadores) o spawn donde no existe. El inicializador
+# recibe los argumentos de publicar(): la API le pasa la instantánea Arrow de
+# esa versión, que cada trabajador mapea en memoria (ver datos_ventas).
+#
+# Cada trabajo se ejecuta envuelto en metricas.medir: sus fases (calculo,
+# serializacion) se suman a la petición que lo pidió, y el resto del tiempo de
+# espera (turno, cola del pool, envío entre procesos) cuenta como "cola".
+
+TRABAJADORES = int(os.environ.get("API_TRABAJADORES", str(min(4, os.cpu_count() or 1))))
+HILOS = int(os.environ.get("API_HILOS", "8"))
+PLAZO_SEGUNDOS = float(os.environ.get("API_PLAZO_SEGUNDOS", "10"))
+LIMITE_POR_DEFECTO = 4
+
+
+class VersionCambiada(Exception):
+    # El proceso trabajador tiene otra versión del dataset que la pedida
+    pass
+
+
+def _contexto():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context("forkserver")
+        contexto.set_forkserver_preload(["pandas", "motor_analitico"])
+        return contexto
+    return multiprocessing.get_context("spawn")
+
+
+class Ejecutor:
+    def __init__(self, limites: dict = None, plazos: dict = None, trabajadores: int = TRABAJADORES,
+                 hilos: int = HILOS, plazo: float = PLAZO_SEGUNDOS, inicializador=None):
+        self.limites = limites or {}
+        self.plazos = plazos or {}
+        self.trabajadores = trabajadores
+        self.plazo = plazo
+        self.inicializador = inicializador # Se ejecuta en cada proceso nuevo con los argumentos de publicar()
+        self._hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="consulta")
+        self._pools = {} # versión -> pool (el vigente y los que aún terminan trabajo)
+        self._en_curso = {} # versión -> trabajos enviados y no terminados
+        self._version = None # Versión vigente
+        self._lock = threading.Lock()
+        self._semaforos = {}
+        self._ocupados = {}
+        self.rechazadas = {}
+        self.vencidas = {}
+
+    def publicar(self, version: str, *argumentos):
+        # Crea el pool de la versión nueva (con sus procesos ya cargados) y
+        # retira el anterior, que se cierra al terminar lo que tiene en curso.
+        # `argumentos` se pasan al inicializador de cada proceso.
+        with self._lock:
+            if version in self._pools: # Vuelve una versión cuyo pool aún no se cerró: se reutiliza
+                anterior, self._version = self._version, version
+                self._retirar_si_libre(anterior)
+                return
+        nuevo = ProcessPoolExecutor(max_workers=self.trabajadores, mp_context=_contexto(),
+                                    initializer=self.inicializador, initargs=argumentos)
+        try:
+            for futuro in [nuevo.submit(os.getpid) for _ in range(self.trabajadores)]:
+                futuro.result() # Procesos arrancados antes de recibir consultas
+        except BaseException:
+            nuevo.shutdown(wait=False, cancel_futures=True) # Sigue vigente la versión anterior
+            raise
+        with self._lock:
+            anterior = self._version
+            self._pools[version] = nuevo
+            self._en_curso.setdefault(version, 0)
+            self._version = version
+            self._retirar_si_libre(anterior)
+
+    def _retirar_si_libre(self, version: str):
+        # Con el lock tomado: cierra el pool de una versión no vigente sin trabajo
+        if version is None or version == self._version or self._en_curso.get(version):
+            return
+        pool = self._pools.pop(version, None)
+        self._en_curso.pop(version, None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def pools(self) -> dict:
+        # Versión -> trabajos en curso, de los pools abiertos
+        with self._lock:
+            return {version: self._en_curso.get(version, 0) for version in self._pools}
+
+    def _enviar(self, version: str, funcion, *args):
+        with self._lock:
+            if version not in self._pools: # Versión ya retirada (o sin versión): el pool vigente
+                version = self._version
+            if version is None:
+                raise RuntimeError("No hay ninguna versión publicada en el ejecutor")
+            futuro = self._pools[version].submit(funcion, *args)
+            self._en_curso[version] += 1
+
+        def terminado(_):
+            with self._lock:
+                self._en_curso[version] -= 1
+                self._retirar_si_libre(version)
+
+        futuro.add_done_callback(terminado)
+        return futuro
+
+    def _semaforo(self, nombre: str) -> asyncio.Semaphore:
+        if nombre not in self._semaforos:
+            self._semaforos[nombre] = asyncio.Semaphore(self.limites.get(nombre, LIMITE_POR_DEFECTO))
+            self._ocupados[nombre] = 0
+        return self._semaforos[nombre]
+
+    def ocupados(self) -> dict:
+        # Consultas con turno (en ejecución o en la cola del pool) por endpoint
+        return dict(self._ocupados)
+
+    async def ejecutar(self, nombre: str, funcion, *args, version: str = None, proceso: bool = True):
+        # version: la del dataset que usa la consulta (elige el pool de procesos)
+        plazo = self.plazos.get(nombre, self.plazo)
+        inicio = time.perf_counter()
+        fin = time.monotonic() + plazo
+        limite = self._semaforo(nombre)
+        try:
+            await asyncio.wait_for(limite.acquire(), timeout=plazo)
+        except asyncio.TimeoutError:
+            self.rechazadas[nombre] = self.rechazadas.get(nombre, 0) + 1
+            raise HTTPException(status_code=503, detail=f"Demasiadas consultas simultáneas a {nombre}",
+                                headers={"Retry-After": "1"})
+        self._ocupados[nombre] += 1
+
+        def liberar():
+            self._ocupados[nombre] -= 1
+            limite.release()
+
+        loop = asyncio.get_running_loop()
+        try:
+            futuro = (self._enviar(version, medir, funcion, *args) if proceso
+                      else self._hilos.submit(medir, funcion, *args))
+        except BaseException:
+            liberar()
+            raise
+        futuro.add_done_callback(lambda _: loop.call_soon_threadsafe(liberar))
+
+        try:
+            resultado, fases, segundos = await asyncio.wait_for(asyncio.wrap_future(futuro),
+                                                                timeout=max(0.0, fin - time.monotonic()))
+        except asyncio.TimeoutError:
+            # Si no llegó a empezar se descarta; si ya corre, termina en segundo plano
+            self.vencidas[nombre] = self.vencidas.get(nombre, 0) + 1
+            raise HTTPException(status_code=504, detail=f"La consulta a {nombre} superó el plazo de {plazo:g} s")
+        except VersionCambiada:
+            raise HTTPException(status_code=503, detail="Los datos se están actualizando, reintente",
+                                headers={"Retry-After": "1"})
+        sumar_fases({**fases, "cola": time.perf_counter() - inicio - segundos})
+        return resultado
+
+    def cerrar(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._pools.clear()
+            self._en_curso.clear()
+            self._version = None
+        self._hilos.shutdown(wait=False, cancel_futures=True)
+
+
+class _FlujoLimitado:
+    # Iterador que devuelve el turno al agotarse, al cerrarse o al descartarse
+    # (p. ej. si el cliente se desconecta antes de empezar la descarga)
+    def __init__(self, partes, semaforo):
+        self._partes = iter(partes)
+        self._semaforo = semaforo
+        self._liberado = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._partes)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._liberado:
+            self._liberado = True
+            self._semaforo.release()
+            if hasattr(self._partes, "close"):
+                self._partes.close()
+
+    def __del__(self):
+        self.close()
+
+
+class LimiteFlujo:
+    # Límite para respuestas en streaming: el turno se toma antes de responder
+    # y se libera cuando termina (o se corta) el envío
+    def __init__(self, nombre: str, maximo: int):
+        self.nombre = nombre
+        self._semaforo = threading.BoundedSemaphore(maximo)
+
+    def envolver(self, partes):
+        if not self._semaforo.acquire(blocking=False):
+            raise HTTPException(status_code=503, detail=f"Demasiadas descargas simultáneas en {self.nombre}",
+                                headers={"Retry-After": "5"})
+        return _FlujoLimitado(partes, self._semaforo)
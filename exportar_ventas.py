@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- Exportación en Arrow IPC y Parquet por lotes ---
+# El dataset se convierte una sola vez (ver motor_analitico) en una tabla
+# Arrow que comparte los buffers de las columnas numéricas con el DataFrame
+# (sin copiarlas) y guarda las categóricas como diccionarios. Cada exportación recorre esa tabla por
+# lotes de FILAS_POR_LOTE filas: los lotes del dataset completo son vistas
+# (slice) y los de un filtro se copian con take solo lote a lote. Cada lote se
+# escribe y se entrega al cliente antes de preparar el siguiente, así la
+# respuesta empieza a llegar de inmediato y nunca está entera en memoria.
+
+FILAS_POR_LOTE = int(os.environ.get("EXPORTAR_FILAS_POR_LOTE", "65536"))
+
+TIPOS_MEDIO = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXTENSIONES = {"arrow": "arrow", "parquet": "parquet"}
+
+
+def a_arrow(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def lotes(tabla: pa.Table, filas: np.ndarray = None, filas_por_lote: int = FILAS_POR_LOTE):
+    # filas: posiciones a exportar (None = todas, sin copiar)
+    total = tabla.num_rows if filas is None else len(filas)
+    for inicio in range(0, total, filas_por_lote):
+        if filas is None:
+            parte = tabla.slice(inicio, filas_por_lote)
+        else:
+            parte = tabla.take(pa.array(filas[inicio:inicio + filas_por_lote]))
+        yield from parte.to_batches()
+
+
+class _Sumidero:
+    # Archivo de solo escritura que acumula lo escrito hasta que se retira
+    def __init__(self):
+        self._partes = []
+        self.closed = False
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def retirar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes = []
+        return datos
+
+
+def flujo_arrow(tabla: pa.Table, filas: np.ndarray = None, filas_por_lote: int = FILAS_POR_LOTE):
+    # Formato de streaming IPC: esquema, diccionarios y un mensaje por lote
+    sumidero = _Sumidero()
+    with pa.ipc.new_stream(sumidero, tabla.schema) as escritor:
+        yield sumidero.retirar()
+        for lote in lotes(tabla, filas, filas_por_lote):
+            escritor.write_batch(lote)
+            yield sumidero.retirar()
+    yield sumidero.retirar()
+
+
+def flujo_parquet(tabla: pa.Table, filas: np.ndarray = None, filas_por_lote: int = FILAS_POR_LOTE):
+    # Un row group por lote; el pie con los metadatos se escribe al cerrar
+    sumidero = _Sumidero()
+    with pq.ParquetWriter(sumidero, tabla.schema) as escritor:
+        for lote in lotes(tabla, filas, filas_por_lote):
+            escritor.write_batch(lote, row_group_size=filas_por_lote)
+            yield sumidero.retirar()
+    yield sumidero.retirar()
+
+
+def flujo(formato: str, tabla: pa.Table, filas: np.ndarray = None, filas_por_lote: int = FILAS_POR_LOTE):
+    escribir = flujo_arrow if formato == "arrow" else flujo_parquet
+    for datos in escribir(tabla, filas, filas_por_lote):
+        if datos:
+            yield datos
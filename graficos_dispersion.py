@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# --- Dispersión escalable ---
+# Un px.scatter normal envía cada punto al navegador como SVG. Según el número
+# de filas se elige el modo:
+#   - hasta UMBRAL_WEBGL puntos: scatter normal (igual que antes)
+#   - hasta UMBRAL_DENSIDAD puntos: scatter con render WebGL
+#   - por encima: mapa de densidad 2D calculado en el servidor (BINS x BINS
+#     celdas) más los valores atípicos como puntos individuales (como mucho
+#     MAX_ATIPICOS), así el tamaño de la figura no crece con el dataset.
+
+UMBRAL_WEBGL = int(os.environ.get("DISPERSION_UMBRAL_WEBGL", "5000"))
+UMBRAL_DENSIDAD = int(os.environ.get("DISPERSION_UMBRAL_DENSIDAD", "50000"))
+BINS = 100
+CUANTIL_ATIPICOS = 0.995
+MAX_ATIPICOS = 1500
+
+
+def modo_dispersion(filas: int, umbral_webgl: int = UMBRAL_WEBGL, umbral_densidad: int = UMBRAL_DENSIDAD) -> str:
+    if filas <= umbral_webgl:
+        return "svg"
+    if filas <= umbral_densidad:
+        return "webgl"
+    return "densidad"
+
+
+def _densidad(df, x, y, titulo, labels, texto, bins, max_atipicos):
+    xs = df[x].to_numpy(dtype="float64")
+    ys = df[y].to_numpy(dtype="float64")
+
+    # Los valores por encima del cuantil se consideran atípicos: salen del
+    # histograma (que así no queda aplastado por la cola larga) y se dibujan uno a uno
+    limite_x = np.quantile(xs, CUANTIL_ATIPICOS)
+    limite_y = np.quantile(ys, CUANTIL_ATIPICOS)
+    atipicos = (xs > limite_x) | (ys > limite_y)
+
+    conteos, bordes_x, bordes_y = np.histogram2d(
+        xs[~atipicos], ys[~atipicos], bins=bins,
+        range=[[xs.min(), max(limite_x, xs.min() + 1e-9)], [ys.min(), max(limite_y, ys.min() + 1e-9)]])
+    conteos = conteos.T # histogram2d devuelve [x][y]; el heatmap espera [fila=y][columna=x]
+    z = np.where(conteos > 0, np.log10(np.maximum(conteos, 1)), np.nan) # Escala log: la densidad es muy desigual
+
+    fig = go.Figure(go.Heatmap(
+        x=(bordes_x[:-1] + bordes_x[1:]) / 2,
+        y=(bordes_y[:-1] + bordes_y[1:]) / 2,
+        z=z,
+        customdata=conteos,
+        colorscale="Viridis",
+        colorbar=dict(title="Juegos (log10)"),
+        hovertemplate=f"{labels.get(x, x)}: %{{x:.2f}}<br>{labels.get(y, y)}: %{{y:.2f}}<br>Juegos: %{{customdata:,.0f}}<extra></extra>",
+    ))
+
+    indices = np.flatnonzero(atipicos)
+    if len(indices) > max_atipicos: # Se conservan los más extremos
+        extremos = np.argsort(xs[indices] + ys[indices])[-max_atipicos:]
+        indices = indices[extremos]
+    fig.add_trace(go.Scattergl(
+        x=xs[indices], y=ys[indices], mode="markers", name="Atípicos",
+        text=df[texto].iloc[indices].astype(str) if texto in df.columns else None,
+        marker=dict(size=5, color="#F63366"),
+    ))
+
+    fig.update_layout(
+        title=f"{titulo} ({len(df):,} juegos, densidad + {len(indices):,} atípicos)",
+        xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y),
+    )
+    return fig
+
+
+def figura_dispersion(df: pd.DataFrame, x: str, y: str, color: str = None, titulo: str = "", labels: dict = None,
+                      texto: str = "Nombre", umbral_webgl: int = UMBRAL_WEBGL,
+                      umbral_densidad: int = UMBRAL_DENSIDAD, bins: int = BINS, max_atipicos: int = MAX_ATIPICOS):
+    labels = labels or {}
+    modo = modo_dispersion(len(df), umbral_webgl, umbral_densidad)
+    if modo == "densidad":
+        return _densidad(df, x, y, titulo, labels, texto, bins, max_atipicos)
+    return px.scatter(df, x=x, y=y, color=color, title=titulo, labels=labels,
+                      render_mode="webgl" if modo == "webgl" else "svg")
@@ -0,0 +1,363 @@
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from datos_ventas import COLUMNAS_VENTAS
+
+# --- Índices bitmap y predicados de filtro ---
+# Para cada valor de Editor, Plataforma, Género y Año se precalcula un bitmap
+# (un bit por fila, empaquetado con np.packbits) con las filas que lo tienen.
+# Los filtros se declaran como predicados combinables con &, | y ~, que se
+# resuelven con AND/OR/NOT sobre esos bitmaps en vez de recorrer el dataset.
+# Memoria: filas / 8 bytes por cada valor distinto de las columnas indexadas.
+#
+# Las columnas numéricas (ventas y año) tienen además un índice ordenado: el
+# orden de las filas por valor, calculado una vez. Un umbral o un rango se
+# resuelve con búsqueda binaria y da directamente el tramo de filas que cumple,
+# sin comparar toda la columna en cada movimiento de un slider. Los valores
+# se guardan en el tipo de la columna (float32 en las ventas) y el umbral se
+# convierte a ese tipo antes de buscar: pandas compara una columna float32
+# contra un float de Python en float32, y 1.1 en float32 no es el mismo número
+# que 1.1 en float64, así que comparar en float64 daría otras filas.
+#
+# Para ordenar resultados (p. ej. paginar la API por ventas) se guarda el orden
+# completo de cada columna pedida; el orden de un subconjunto de filas se
+# obtiene recorriendo ese orden y quedándose con las filas del subconjunto.
+
+COLUMNAS_INDEXADAS = ['Editor', 'Plataforma', 'Género', 'Año']
+COLUMNAS_ORDENADAS = COLUMNAS_VENTAS + ['Año']
+
+
+def clave_orden(serie: pd.Series) -> np.ndarray:
+    # Clave numérica para ordenar; los nulos quedan como NaN (al final)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Las categorías están ordenadas alfabéticamente: ordenar por código
+        # equivale a ordenar por texto
+        codigos = serie.cat.codes.to_numpy().astype("float64")
+        codigos[codigos < 0] = np.nan
+        return codigos
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie.to_numpy(dtype="float64", na_value=np.nan)
+    return pd.Series(pd.factorize(serie, sort=True)[0], dtype="float64").replace(-1, np.nan).to_numpy()
+
+
+def tipo_comparacion(serie: pd.Series) -> np.dtype:
+    # Tipo en que pandas compara la columna con un número: el suyo si es
+    # flotante; los enteros (también los nullable) caben exactos en float64
+    tipo = getattr(serie.dtype, "numpy_dtype", serie.dtype)
+    return tipo if np.issubdtype(tipo, np.floating) else np.dtype("float64")
+
+
+def valores_comparables(serie: pd.Series) -> np.ndarray:
+    # La columna en su tipo de comparación, con los nulos como NaN
+    return serie.to_numpy(dtype=tipo_comparacion(serie), na_value=np.nan)
+
+
+class IndiceOrdenado:
+    def __init__(self, serie: pd.Series):
+        valores = valores_comparables(serie)
+        self.orden = np.argsort(valores, kind="stable") # Los NaN quedan al final
+        self.valores = valores[self.orden]
+        self.validos = len(valores) - int(np.isnan(valores).sum())
+
+    def rango(self, minimo=None, maximo=None, incluir_minimo=True, incluir_maximo=True) -> np.ndarray:
+        # Posiciones (en orden de valor) de las filas con minimo <= valor <= maximo
+        valores = self.valores[:self.validos]
+        inicio = 0
+        fin = self.validos
+        if minimo is not None:
+            minimo = np.asarray(minimo, dtype=valores.dtype)
+            inicio = np.searchsorted(valores, minimo, side="left" if incluir_minimo else "right")
+        if maximo is not None:
+            maximo = np.asarray(maximo, dtype=valores.dtype)
+            fin = np.searchsorted(valores, maximo, side="right" if incluir_maximo else "left")
+        return self.orden[inicio:max(inicio, fin)]
+
+    def limites(self):
+        return float(self.valores[0]), float(self.valores[self.validos - 1])
+
+
+class IndiceBitmap:
+    def __init__(self, df: pd.DataFrame, columnas: list = COLUMNAS_INDEXADAS,
+                 ordenadas: list = COLUMNAS_ORDENADAS):
+        self.df = df
+        self.filas = len(df)
+        self.bytes_bitmap = (self.filas + 7) // 8
+        self._bitmaps = {}
+        for col in columnas:
+            self._bitmaps[col] = self._indexar(df[col])
+        self._ordenados = {col: IndiceOrdenado(df[col]) for col in ordenadas if col in df.columns}
+        self._ordenes = {}
+        self._lock_ordenes = threading.Lock()
+
+    def _indexar(self, serie: pd.Series) -> dict:
+        # Un único argsort agrupa las filas por valor; cada grupo se convierte
+        # en su bitmap. Los nulos se indexan con la clave None.
+        codigos, valores = pd.factorize(serie, use_na_sentinel=True)
+        orden = np.argsort(codigos, kind="stable")
+        limites = np.searchsorted(codigos[orden], np.arange(-1, len(valores) + 1))
+        bitmaps = {}
+        for i, valor in enumerate([None] + list(valores)):
+            filas = orden[limites[i]:limites[i + 1]]
+            if len(filas) or valor is not None:
+                bitmaps[valor] = self.desde_filas(filas)
+        return bitmaps
+
+    def desde_filas(self, filas: np.ndarray) -> np.ndarray:
+        marcas = np.zeros(self.filas, dtype=bool)
+        marcas[filas] = True
+        return np.packbits(marcas)
+
+    def desde_mascara(self, mascara) -> np.ndarray:
+        return np.packbits(np.asarray(mascara, dtype=bool))
+
+    def vacio(self) -> np.ndarray:
+        return np.zeros(self.bytes_bitmap, dtype=np.uint8)
+
+    def todos(self) -> np.ndarray:
+        return np.packbits(np.ones(self.filas, dtype=bool))
+
+    def negar(self, bits: np.ndarray) -> np.ndarray:
+        # NOT sin encender los bits de relleno del último byte
+        return np.bitwise_and(np.invert(bits), self.todos())
+
+    def bitmap(self, columna: str, valor) -> np.ndarray:
+        if columna not in self._bitmaps:
+            raise KeyError(f"La columna '{columna}' no tiene índice bitmap")
+        return self._bitmaps[columna].get(valor, self.vacio())
+
+    def valores(self, columna: str) -> list:
+        return [v for v in self._bitmaps[columna] if v is not None]
+
+    def tiene_indice(self, columna: str) -> bool:
+        return columna in self._bitmaps
+
+    def ordenado(self, columna: str):
+        # Índice ordenado de la columna, o None si no tiene
+        return self._ordenados.get(columna)
+
+    def orden(self, columna: str, ascendente: bool = True) -> np.ndarray:
+        # Todas las filas ordenadas por la columna (estable, nulos al final)
+        clave = (columna, ascendente)
+        with self._lock_ordenes:
+            if clave not in self._ordenes:
+                ordenado = self.ordenado(columna)
+                if ascendente and ordenado is not None:
+                    self._ordenes[clave] = ordenado.orden
+                else:
+                    valores = clave_orden(self.df[columna])
+                    self._ordenes[clave] = np.argsort(valores if ascendente else -valores, kind="stable")
+            return self._ordenes[clave]
+
+    def ordenar(self, filas: np.ndarray, columna: str, ascendente: bool = True) -> np.ndarray:
+        # Las filas dadas en el orden de la columna, en O(filas del dataset)
+        orden = self.orden(columna, ascendente)
+        if len(filas) == self.filas:
+            return orden
+        marcas = np.zeros(self.filas, dtype=bool)
+        marcas[filas] = True
+        return orden[marcas[orden]]
+
+    def contar(self, bits: np.ndarray) -> int:
+        return int(np.bitwise_count(bits).sum())
+
+    def filas_de(self, bits: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bits, count=self.filas))
+
+
+# --- Predicados ---
+
+class Predicado(ABC):
+    def evaluar(self, indice: IndiceBitmap, memo: dict = None) -> np.ndarray:
+        # El memo permite reutilizar subexpresiones entre varios predicados
+        # evaluados en la misma pasada (p. ej. Editor == 'Nintendo')
+        memo = {} if memo is None else memo
+        clave = self.clave()
+        if clave not in memo:
+            memo[clave] = self._evaluar(indice, memo)
+        return memo[clave]
+
+    @abstractmethod
+    def _evaluar(self, indice, memo):
+        ...
+
+    @abstractmethod
+    def clave(self):
+        ...
+
+    def __and__(self, otro):
+        return Y(self, otro)
+
+    def __or__(self, otro):
+        return O(self, otro)
+
+    def __invert__(self):
+        return No(self)
+
+
+class Todos(Predicado):
+    def _evaluar(self, indice, memo):
+        return indice.todos()
+
+    def clave(self):
+        return ("todos",)
+
+
+class Igual(Predicado):
+    def __init__(self, columna: str, valor):
+        self.columna = columna
+        self.valor = valor
+
+    def _evaluar(self, indice, memo):
+        if indice.tiene_indice(self.columna):
+            return indice.bitmap(self.columna, self.valor)
+        return indice.desde_mascara(indice.df[self.columna] == self.valor)
+
+    def clave(self):
+        return ("igual", self.columna, self.valor)
+
+
+class En(Predicado):
+    def __init__(self, columna: str, valores):
+        self.columna = columna
+        self.valores = tuple(valores)
+
+    def _evaluar(self, indice, memo):
+        bits = indice.vacio()
+        for valor in self.valores:
+            bits = np.bitwise_or(bits, Igual(self.columna, valor).evaluar(indice, memo))
+        return bits
+
+    def clave(self):
+        return ("en", self.columna, self.valores)
+
+
+class EsNulo(Predicado):
+    def __init__(self, columna: str):
+        self.columna = columna
+
+    def _evaluar(self, indice, memo):
+        if indice.tiene_indice(self.columna):
+            return indice.bitmap(self.columna, None)
+        return indice.desde_mascara(indice.df[self.columna].isna())
+
+    def clave(self):
+        return ("nulo", self.columna)
+
+
+class Comparacion(Predicado):
+    # columna <op> umbral. Con índice ordenado se resuelve por búsqueda
+    # binaria; si no, con los bitmaps de los valores que cumplen o comparando.
+    OPERADORES = {
+        ">": np.greater,
+        ">=": np.greater_equal,
+        "<": np.less,
+        "<=": np.less_equal,
+    }
+
+    def __init__(self, columna: str, operador: str, umbral):
+        if operador not in self.OPERADORES:
+            raise ValueError(f"Operador no soportado: {operador}")
+        self.columna = columna
+        self.operador = operador
+        self.umbral = umbral
+
+    def _evaluar(self, indice, memo):
+        ordenado = indice.ordenado(self.columna)
+        if ordenado is not None:
+            if self.operador in (">", ">="):
+                filas = ordenado.rango(minimo=self.umbral, incluir_minimo=self.operador == ">=")
+            else:
+                filas = ordenado.rango(maximo=self.umbral, incluir_maximo=self.operador == "<=")
+            return indice.desde_filas(filas)
+        comparar = self.OPERADORES[self.operador]
+        if indice.tiene_indice(self.columna):
+            valores = [v for v in indice.valores(self.columna) if comparar(v, self.umbral)]
+            return En(self.columna, valores).evaluar(indice, memo)
+        columna = valores_comparables(indice.df[self.columna])
+        return indice.desde_mascara(comparar(columna, np.asarray(self.umbral, dtype=columna.dtype)))
+
+    def clave(self):
+        return ("comparacion", self.columna, self.operador, self.umbral)
+
+
+class Entre(Predicado):
+    # minimo <= columna <= maximo
+    def __init__(self, columna: str, minimo, maximo):
+        self.columna = columna
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def _evaluar(self, indice, memo):
+        ordenado = indice.ordenado(self.columna)
+        if ordenado is not None:
+            return indice.desde_filas(ordenado.rango(self.minimo, self.maximo))
+        return (MayorIgual(self.columna, self.minimo) & MenorIgual(self.columna, self.maximo)).evaluar(indice, memo)
+
+    def clave(self):
+        return ("entre", self.columna, self.minimo, self.maximo)
+
+
+def Mayor(columna, umbral):
+    return Comparacion(columna, ">", umbral)
+
+
+def MayorIgual(columna, umbral):
+    return Comparacion(columna, ">=", umbral)
+
+
+def Menor(columna, umbral):
+    return Comparacion(columna, "<", umbral)
+
+
+def MenorIgual(columna, umbral):
+    return Comparacion(columna, "<=", umbral)
+
+
+class Y(Predicado):
+    def __init__(self, *partes):
+        self.partes = partes
+
+    def _evaluar(self, indice, memo):
+        bits = self.partes[0].evaluar(indice, memo)
+        for parte in self.partes[1:]:
+            bits = np.bitwise_and(bits, parte.evaluar(indice, memo))
+        return bits
+
+    def clave(self):
+        return ("y",) + tuple(p.clave() for p in self.partes)
+
+
+class O(Predicado):
+    def __init__(self, *partes):
+        self.partes = partes
+
+    def _evaluar(self, indice, memo):
+        bits = self.partes[0].evaluar(indice, memo)
+        for parte in self.partes[1:]:
+            bits = np.bitwise_or(bits, parte.evaluar(indice, memo))
+        return bits
+
+    def clave(self):
+        return ("o",) + tuple(p.clave() for p in self.partes)
+
+
+class No(Predicado):
+    def __init__(self, parte: Predicado):
+        self.parte = parte
+
+    def _evaluar(self, indice, memo):
+        return indice.negar(self.parte.evaluar(indice, memo))
+
+    def clave(self):
+        return ("no", self.parte.clave())
+
+
+def evaluar_varios(indice: IndiceBitmap, predicados: dict) -> dict:
+    # Evalúa varios filtros en una sola pasada compartiendo subexpresiones;
+    # devuelve {nombre: bitmap}
+    memo = {}
+    return {nombre: predicado.evaluar(indice, memo) for nombre, predicado in predicados.items()}
+
@@ -0,0 +1,227 @@
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Métricas por petición de la API ---
+# Un middleware ASGI mide cada petición: latencia, tamaño de la respuesta
+# (contando los bytes que se envían, así también cubre las descargas en
+# streaming), código de estado y peticiones en curso por endpoint. Los
+# endpoints se etiquetan con la ruta declarada, no con la URL, para que el
+# número de series no crezca con parámetros o rutas inexistentes.
+#
+# Dentro de una petición, el código marca fases con `with fase("calculo")` o
+# `with fase("serializacion")`. Los tiempos se acumulan en un diccionario por
+# petición (contextvar). El trabajo que va a los pools de ejecucion corre
+# fuera de ese contexto, así que se ejecuta envuelto en medir(), que devuelve
+# los tiempos de sus fases junto al resultado, y el tiempo de espera en cola
+# se registra como la fase "cola".
+#
+# /metrics devuelve todo en el formato de texto de Prometheus. Con
+# API_LENTO_MS > 0 las peticiones más lentas que ese umbral se registran en el
+# log "api_analytics.lentas" con su método, ruta, parámetros, cuerpo
+# (recortado), fases y tamaño.
+
+LENTO_MS = float(os.environ.get("API_LENTO_MS", "0"))
+MAX_CUERPO_REGISTRADO = 2048
+
+# Límites de los histogramas (segundos y bytes)
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_TAMANO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+registro_lentas = logging.getLogger("api_analytics.lentas")
+
+_fases = contextvars.ContextVar("fases", default=None)
+
+
+@contextmanager
+def fase(nombre: str):
+    # Acumula la duración del bloque en la fase indicada de la petición actual
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fases = _fases.get()
+        if fases is not None:
+            fases[nombre] = fases.get(nombre, 0.0) + time.perf_counter() - inicio
+
+
+def medir(funcion, *args):
+    # Ejecuta funcion en un hilo o proceso del pool y devuelve también sus fases
+    fases = {}
+    token = _fases.set(fases)
+    inicio = time.perf_counter()
+    try:
+        resultado = funcion(*args)
+    finally:
+        _fases.reset(token)
+    return resultado, fases, time.perf_counter() - inicio
+
+
+def sumar_fases(fases: dict):
+    # Incorpora a la petición actual las fases medidas en otro hilo o proceso
+    actuales = _fases.get()
+    if actuales is not None:
+        for nombre, segundos in fases.items():
+            actuales[nombre] = actuales.get(nombre, 0.0) + segundos
+
+
+class Histograma:
+    def __init__(self, limites: tuple):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1) # La última es +Inf
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor: float):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.peticiones = {} # (endpoint, método, estado) -> cuenta
+        self.latencias = {} # (endpoint, método) -> Histograma
+        self.tamanos = {} # (endpoint,) -> Histograma
+        self.fases = {} # (endpoint, fase) -> Histograma
+        self.en_curso = {} # endpoint -> peticiones
+        self.lentas = {} # endpoint -> cuenta
+
+    def entrar(self, endpoint: str):
+        with self._lock:
+            self.en_curso[endpoint] = self.en_curso.get(endpoint, 0) + 1
+
+    def salir(self, endpoint: str, metodo: str, estado: int, segundos: float, tamano: int, fases: dict,
+              lenta: bool):
+        with self._lock:
+            self.en_curso[endpoint] -= 1
+            clave = (endpoint, metodo, estado)
+            self.peticiones[clave] = self.peticiones.get(clave, 0) + 1
+            self.latencias.setdefault((endpoint, metodo), Histograma(LIMITES_LATENCIA)).observar(segundos)
+            self.tamanos.setdefault((endpoint,), Histograma(LIMITES_TAMANO)).observar(tamano)
+            for nombre, duracion in fases.items():
+                self.fases.setdefault((endpoint, nombre), Histograma(LIMITES_LATENCIA)).observar(duracion)
+            if lenta:
+                self.lentas[endpoint] = self.lentas.get(endpoint, 0) + 1
+
+    def exponer(self, extra: list = ()) -> str:
+        # extra: [(nombre, tipo, ayuda, nombres de etiquetas, {valores de etiquetas: valor})]
+        # con métricas de otros módulos (ejecutor, cachés, dataset)
+        lineas = []
+
+        def serie(nombre, tipo, ayuda, valores: dict, etiquetas: tuple):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for clave, valor in sorted(valores.items()):
+                lineas.append(f"{nombre}{_etiquetas(etiquetas, clave)} {_numero(valor)}")
+
+        def histograma(nombre, ayuda, histogramas: dict, etiquetas: tuple):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} histogram")
+            for clave, h in sorted(histogramas.items()):
+                acumulado = 0
+                for limite, cuenta in zip(h.limites + ("+Inf",), h.cubetas):
+                    acumulado += cuenta
+                    le = 'le="' + (limite if limite == "+Inf" else _numero(float(limite))) + '"'
+                    lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, clave, le)} {acumulado}")
+                lineas.append(f"{nombre}_sum{_etiquetas(etiquetas, clave)} {_numero(h.suma)}")
+                lineas.append(f"{nombre}_count{_etiquetas(etiquetas, clave)} {h.cuenta}")
+
+        with self._lock:
+            serie("api_peticiones_total", "counter", "Peticiones atendidas", self.peticiones,
+                  ("endpoint", "metodo", "estado"))
+            serie("api_peticiones_en_curso", "gauge", "Peticiones en curso",
+                  {(e,): n for e, n in self.en_curso.items()}, ("endpoint",))
+            serie("api_peticiones_lentas_total", "counter", f"Peticiones de más de {LENTO_MS:g} ms",
+                  {(e,): n for e, n in self.lentas.items()}, ("endpoint",))
+            histograma("api_latencia_segundos", "Latencia de la petición completa", self.latencias,
+                       ("endpoint", "metodo"))
+            histograma("api_respuesta_bytes", "Tamaño del cuerpo de la respuesta", self.tamanos, ("endpoint",))
+            histograma("api_fase_segundos", "Tiempo por fase (cola, calculo, serializacion)", self.fases,
+                       ("endpoint", "fase"))
+        for nombre, tipo, ayuda, etiquetas, valores in extra:
+            serie(nombre, tipo, ayuda, valores, etiquetas)
+        return "\n".join(lineas) + "\n"
+
+
+class MiddlewareMetricas:
+    # Middleware ASGI puro: no envuelve la respuesta en otro objeto, solo
+    # observa los mensajes que pasan (las descargas siguen en streaming)
+    def __init__(self, app, metricas: Metricas, lento_ms: float = LENTO_MS):
+        self.app = app
+        self.metricas = metricas
+        self.lento_ms = lento_ms
+        self._rutas = None
+
+    def _endpoint(self, scope) -> str:
+        # Las rutas de la API no tienen parámetros: la ruta declarada es el path
+        if self._rutas is None and "app" in scope:
+            self._rutas = {r.path for r in scope["app"].routes if hasattr(r, "path")}
+        return scope["path"] if self._rutas and scope["path"] in self._rutas else "otra"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        estado = {"codigo": 500, "bytes": 0}
+        cuerpo = bytearray()
+        fases = {}
+        token = _fases.set(fases)
+        inicio = time.perf_counter()
+        self.metricas.entrar(endpoint)
+
+        async def recibir():
+            mensaje = await receive()
+            if self.lento_ms > 0 and mensaje["type"] == "http.request" and len(cuerpo) < MAX_CUERPO_REGISTRADO:
+                cuerpo.extend(mensaje.get("body", b"")[:MAX_CUERPO_REGISTRADO - len(cuerpo)])
+            return mensaje
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["codigo"] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                estado["bytes"] += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, recibir, enviar)
+        finally:
+            _fases.reset(token)
+            segundos = time.perf_counter() - inicio
+            lenta = self.lento_ms > 0 and segundos * 1000 >= self.lento_ms
+            self.metricas.salir(endpoint, scope["method"], estado["codigo"], segundos, estado["bytes"], fases,
+                                lenta)
+            if lenta:
+                registro_lentas.warning(json.dumps({
+                    "ms": round(segundos * 1000, 1),
+                    "metodo": scope["method"],
+                    "ruta": scope["path"],
+                    "parametros": scope.get("query_string", b"").decode("latin-1"),
+                    "cuerpo": cuerpo.decode("utf-8", "replace"),
+                    "estado": estado["codigo"],
+                    "bytes": estado["bytes"],
+                    "fases_ms": {nombre: round(s * 1000, 2) for nombre, s in fases.items()},
+                }, ensure_ascii=False))
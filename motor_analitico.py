@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from consultas_ventas import ejecutar_consulta
+from cubo_ventas import CuboVentas
+from datos_ventas import DECIMALES_VENTAS, RUTA_VENTAS, cargar_ventas, version_ventas
+from exportar_ventas import a_arrow
+from indices_ventas import En, Igual, IndiceBitmap, Y
+
+# --- Motor analítico compartido ---
+# Un MotorVentas reúne una versión del dataset y todo lo que se deriva de ella:
+# el índice bitmap, el cubo de agregaciones, la tabla Arrow y los resultados
+# ya calculados (estadísticas, tops). Las páginas de Streamlit y la API lo usan
+# por igual, así que en cada proceso hay una sola copia de cada estructura y lo
+# que calienta una página también lo aprovecha otra.
+#
+# Las estructuras se construyen la primera vez que se piden (la página de
+# gráficos nunca paga el índice si no lo usa); la API llama a preparar() para
+# tenerlas todas antes de publicar una versión. Un motor no se modifica nunca:
+# cuando el CSV cambia, cargar_motor devuelve uno nuevo y quien tenga el
+# anterior termina con él.
+
+MAX_RESULTADOS = 256
+
+
+def _clave_filtros(filtros: dict) -> tuple:
+    normalizados = []
+    for col, valores in sorted((filtros or {}).items()):
+        if not isinstance(valores, (list, tuple)):
+            valores = [valores]
+        normalizados.append((col, tuple(sorted(valores, key=str))))
+    return tuple(normalizados)
+
+
+class MotorVentas:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.version = version_ventas(df) or f"id-{id(df)}" # Sin versión: se identifica por objeto
+        self.cargado = time.time()
+        self._estructuras = {}
+        self._resultados = {}
+        self._lock = threading.Lock()
+
+    def _estructura(self, nombre: str, construir):
+        # Se construye una sola vez aunque la pidan varias sesiones a la vez
+        with self._lock:
+            if nombre not in self._estructuras:
+                self._estructuras[nombre] = construir(self.df)
+            return self._estructuras[nombre]
+
+    @property
+    def indice(self) -> IndiceBitmap:
+        return self._estructura("indice", IndiceBitmap)
+
+    @property
+    def cubo(self) -> CuboVentas:
+        return self._estructura("cubo", CuboVentas)
+
+    @property
+    def tabla(self):
+        return self._estructura("tabla", a_arrow)
+
+    def preparar(self) -> "MotorVentas":
+        # Construye ya todas las estructuras (la API no publica un motor a medias)
+        for nombre, construir in (("indice", IndiceBitmap), ("cubo", CuboVentas), ("tabla", a_arrow)):
+            self._estructura(nombre, construir)
+        return self
+
+    def _memo(self, clave: tuple, calcular):
+        with self._lock:
+            if clave in self._resultados:
+                return self._resultados[clave]
+        resultado = calcular()
+        with self._lock:
+            if len(self._resultados) >= MAX_RESULTADOS:
+                self._resultados.pop(next(iter(self._resultados)))
+            self._resultados[clave] = resultado
+        return resultado
+
+    # --- Consultas ---
+
+    def filas(self, predicado=None) -> np.ndarray:
+        # Posiciones de las filas que cumplen el predicado (todas si no hay)
+        if predicado is None:
+            return np.arange(len(self.df))
+        return self.indice.filas_de(predicado.evaluar(self.indice))
+
+    def top(self, n: int = 10, columna: str = 'Ventas_GLOBALES', filtros: dict = None) -> pd.DataFrame:
+        # Las n filas con más `columna`, leídas del orden precalculado del
+        # índice en vez de ordenar el dataset; filtros: {columna: valor o lista}
+        def calcular():
+            orden = self.indice.orden(columna, ascendente=False)
+            if filtros:
+                predicado = Y(*[En(col, valores) if isinstance(valores, (list, tuple)) else Igual(col, valores)
+                                for col, valores in filtros.items()])
+                marcas = np.unpackbits(predicado.evaluar(self.indice), count=len(self.df)).astype(bool)
+                orden = orden[marcas[orden]]
+            return self.df.iloc[orden[:n]]
+        return self._memo(("top", n, columna, _clave_filtros(filtros)), calcular)
+
+    def conteo(self, dimension: str) -> pd.Series:
+        # Juegos por valor de la dimensión, de más a menos (como value_counts)
+        juegos = self.cubo.total(dimension, 'Juegos').astype('int64')
+        return juegos.sort_values(ascending=False, kind="stable").rename("count")
+
+    def promedio(self, dimension: str, medida: str = 'Ventas_GLOBALES') -> pd.Series:
+        agregado = self.cubo.agregar(dimension)
+        return (agregado[medida] / agregado['Juegos']).sort_values(ascending=False, kind="stable").rename(medida)
+
+    def limites(self, columna: str):
+        return self.indice.ordenado(columna).limites()
+
+    def estadisticas(self) -> pd.DataFrame:
+        return self._memo(("estadisticas",), self.df.describe)
+
+    def ingresos_por_categoria(self) -> pd.Series:
+        # El dataset no tiene categoría ni precio: categoría = género, ingresos = ventas globales
+        return self.cubo.total('Género').round(DECIMALES_VENTAS)
+
+    def consultar(self, consulta: dict, plan: str = None):
+        # Ver consultas_ventas: devuelve (plan, milisegundos, DataFrame)
+        return ejecutar_consulta(consulta, self.df, self.indice, self.cubo, plan)
+
+
+_motores = {}
+_lock_motores = threading.Lock()
+
+
+def cargar_motor(ruta: str = RUTA_VENTAS) -> MotorVentas:
+    # Motor del dataset compartido; se reemplaza solo si el archivo cambió
+    df = cargar_ventas(ruta)
+    ruta = os.path.abspath(ruta)
+    with _lock_motores:
+        actual = _motores.get(ruta)
+        if actual is None or actual.df is not df:
+            actual = _motores[ruta] = MotorVentas(df)
+        return actual
@@ -1,5 +1,11 @@
+import math
+
 import streamlit as st
-import pandas as pd
+
+from datos_ventas import reporte_memoria
+from indices_ventas import En, EsNulo, Igual, Mayor, MayorIgual, Todos, Y, evaluar_varios
+from motor_analitico import cargar_motor
+from paginacion import tabla_paginada
 
 st.title("Proyecto integrador")
 
@@ -7,20 +13,9 @@ st.header("Descripción del proyecto")
 
 st.markdown("""En este proyecto, desvelaremos patrones y tendencias clave en la industria mediante la exploración de diversas estadísticas de ventas. Desde analizar los géneros más populares y las plataformas con mayor demanda hasta identificar los títulos más exitosos a lo largo del tiempo, utilizaremos herramientas de análisis de datos para ofrecerte una visión profunda del mercado global de videojuegos.""")
 
-df = pd.read_csv("./assets/vgsales.csv")
-
-df.rename(columns={
-    'Name': 'Nombre',
-    'Platform': 'Plataforma',
-    'Year': 'Año',
-    'Genre': 'Género',
-    'Publisher': 'Editor',
-    'NA_Sales': 'Ventas_NA',
-    'EU_Sales': 'Ventas_EU',
-    'JP_Sales': 'Ventas_JP',
-    'Other_Sales': 'Ventas_OTRAS',
-    'Global_Sales': 'Ventas_GLOBALES'
-}, inplace=True)
+motor = cargar_motor() # Compartido con las demás páginas y con la API (ver motor_analitico)
+df = motor.df
+indice = motor.indice # Bitmaps por Editor, Plataforma, Género y Año; índices ordenados por ventas y año
 
 # Mostrar tabla completa o una parte
 st.subheader("Vista previa del dataset")
@@ -38,6 +33,10 @@ st.write(df.columns.tolist())
 st.subheader("Tipos de datos por columna")
 st.write(df.dtypes)
 
+st.subheader("Uso de memoria por columna")
+if st.checkbox("Comparar esquema original (texto/float64) con el compacto (categóricas/float32)"):
+    st.dataframe(reporte_memoria(df))
+
 st.subheader("Primeros registros")
 st.write(df.head())
 
@@ -48,37 +47,38 @@ st.subheader("Cantidad total de juegos registrados")
 st.write(len(df))
 
 st.subheader("Juegos más vendidos globalmente")
-st.write(df[['Nombre', 'Ventas_GLOBALES']].sort_values('Ventas_GLOBALES', ascending=False).head(3))
+st.write(motor.top(3)[['Nombre', 'Ventas_GLOBALES']])
 
 st.subheader("Consolas (plataformas) disponibles sin repetir")
 st.write(sorted(df['Plataforma'].unique()))
 
 st.subheader("Cantidad de juegos por plataforma")
-st.write(df['Plataforma'].value_counts())
+st.write(motor.conteo('Plataforma'))
 
 st.subheader("Géneros disponibles sin repetir")
 st.write(sorted(df['Género'].unique()))
 
 st.subheader("Cantidad de juegos por género")
-st.write(df['Género'].value_counts())
+st.write(motor.conteo('Género'))
 
 st.subheader("Editoriales (publishers) más comunes")
-st.write(df['Editor'].value_counts().head(10))
+st.write(motor.conteo('Editor').head(10))
 
 st.subheader("Cantidad de juegos por editorial (top 10)")
-st.write(df['Editor'].value_counts().head(10))
+st.write(motor.conteo('Editor').head(10))
 
 st.subheader("Años con más lanzamientos")
-st.write(df['Año'].value_counts().sort_index(ascending=True).tail(10))
+st.write(motor.conteo('Año').sort_index(ascending=True).tail(10))
 
 st.subheader("Año mínimo y máximo de lanzamiento")
-st.write(f"Año mínimo: {int(df['Año'].min())}, Año máximo: {int(df['Año'].max())}")
+anio_minimo, anio_maximo = motor.limites('Año')
+st.write(f"Año mínimo: {int(anio_minimo)}, Año máximo: {int(anio_maximo)}")
 
 st.subheader("Ventas globales promedio por género")
-st.write(df.groupby('Género')['Ventas_GLOBALES'].mean().sort_values(ascending=False))
+st.write(motor.promedio('Género'))
 
 st.subheader("Ventas globales promedio por plataforma")
-st.write(df.groupby('Plataforma')['Ventas_GLOBALES'].mean().sort_values(ascending=False))
+st.write(motor.promedio('Plataforma'))
 
 st.header("Filtros del dataset")
 
@@ -91,91 +91,84 @@ if st.session_state['platform_filter']:
     st.subheader("Filtrar por plataforma")
     plataformas = df['Plataforma'].unique()  
     plataforma_seleccionada = st.selectbox("Filtrar por plataforma", opciones := sorted(plataformas))
-    df_filtrado = df[df['Plataforma'] == plataforma_seleccionada]
     st.subheader(f"Juegos para la plataforma: {plataforma_seleccionada}")
-    st.dataframe(df_filtrado)
-
-if 'mostrar_global_20m' not in st.session_state:
-    st.session_state['mostrar_global_20m'] = False
-if 'mostrar_nintendo_wii' not in st.session_state:
-    st.session_state['mostrar_nintendo_wii'] = False
-if 'mostrar_nintendo_sony' not in st.session_state:
-    st.session_state['mostrar_nintendo_sony'] = False
-if 'mostrar_accion_x360' not in st.session_state:
-    st.session_state['mostrar_accion_x360'] = False
-if 'mostrar_modernas' not in st.session_state:
-    st.session_state['mostrar_modernas'] = False
-if 'mostrar_jp_1m' not in st.session_state:
-    st.session_state['mostrar_jp_1m'] = False
-if 'mostrar_global_5m_ocultar' not in st.session_state:
-    st.session_state['mostrar_global_5m_ocultar'] = False
-if 'mostrar_anio_2010' not in st.session_state:
-    st.session_state['mostrar_anio_2010'] = False
-if 'mostrar_no_deportes_carreras' not in st.session_state:
-    st.session_state['mostrar_no_deportes_carreras'] = False
-if 'mostrar_nintendo_na_2m' not in st.session_state:
-    st.session_state['mostrar_nintendo_na_2m'] = False
-
-# Filtro 1: Ventas globales mayores a 20 millones
-if st.button("🔝 Juegos con ventas globales > 20M"):
-    st.session_state['mostrar_global_20m'] = not st.session_state['mostrar_global_20m']
-if st.session_state['mostrar_global_20m']:
-    st.dataframe(df[df['Ventas_GLOBALES'] > 20])
-
-# Filtro 2: Juegos de Nintendo en Wii
-if st.button("🎮 Juegos de Nintendo en Wii"):
-    st.session_state['mostrar_nintendo_wii'] = not st.session_state['mostrar_nintendo_wii']
-if st.session_state['mostrar_nintendo_wii']:
-    filtro = df[(df['Editor'] == 'Nintendo') & (df['Plataforma'] == 'Wii')]
-    st.dataframe(filtro)
-
-# Filtro 3: Juegos publicados por Nintendo o Sony
-if st.button("🆚 Juegos publicados por Nintendo o Sony"):
-    st.session_state['mostrar_nintendo_sony'] = not st.session_state['mostrar_nintendo_sony']
-if st.session_state['mostrar_nintendo_sony']:
-    filtro = df[(df['Editor'] == 'Nintendo') | (df['Editor'] == 'Sony Computer Entertainment')]
-    st.dataframe(filtro)
-
-# Filtro 4: Juegos de acción en Xbox 360
-if st.button("⚔️ Juegos de acción en Xbox 360"):
-    st.session_state['mostrar_accion_x360'] = not st.session_state['mostrar_accion_x360']
-if st.session_state['mostrar_accion_x360']:
-    st.dataframe(df.query("Género == 'Action' and Plataforma == 'X360'"))
-
-# Filtro 5: Juegos en plataformas modernas
-plataformas_deseadas = ['PS4', 'XOne', 'PC']
-if st.button("🖥️ Juegos en plataformas modernas (PS4, XOne, PC)"):
-    st.session_state['mostrar_modernas'] = not st.session_state['mostrar_modernas']
-if st.session_state['mostrar_modernas']:
-    st.dataframe(df[df['Plataforma'].isin(plataformas_deseadas)])
-
-# Filtro 6: Ventas en Japón mayores a 1 millón (usa where)
-if st.button("🗾 Juegos con >1M ventas en Japón"):
-    st.session_state['mostrar_jp_1m'] = not st.session_state['mostrar_jp_1m']
-if st.session_state['mostrar_jp_1m']:
-    st.dataframe(df.where(df['Ventas_JP'] > 1).dropna())
-
-# Filtro 7: Ocultar juegos con ventas globales < 5M (mask)
-if st.button("🙈 Ocultar juegos con <5M en ventas globales"):
-    st.session_state['mostrar_global_5m_ocultar'] = not st.session_state['mostrar_global_5m_ocultar']
-if st.session_state['mostrar_global_5m_ocultar']:
-    st.dataframe(df.mask(df['Ventas_GLOBALES'] < 5))
-
-# Filtro 8: Juegos desde 2010 en adelante
-if st.button("📅 Juegos lanzados desde 2010"):
-    st.session_state['mostrar_anio_2010'] = not st.session_state['mostrar_anio_2010']
-if st.session_state['mostrar_anio_2010']:
-    st.dataframe(df[df['Año'] >= 2010])
-
-# Filtro 9: Juegos que no son de deportes ni carreras
-if st.button("🚫 Juegos que NO son de deportes ni carreras"):
-    st.session_state['mostrar_no_deportes_carreras'] = not st.session_state['mostrar_no_deportes_carreras']
-if st.session_state['mostrar_no_deportes_carreras']:
-    st.dataframe(df[~df['Género'].isin(['Sports', 'Racing'])])
-
-# Filtro 10: Juegos de Nintendo con buenas ventas en NA
-if st.button("🏙️ Juegos de Nintendo con >2M ventas en Norteamerica (NA)"):
-    st.session_state['mostrar_nintendo_na_2m'] = not st.session_state['mostrar_nintendo_na_2m']
-if st.session_state['mostrar_nintendo_na_2m']:
-    filtro = df[(df['Editor'] == 'Nintendo') & (df['Ventas_NA'] > 2)]
-    st.dataframe(filtro)
\ No newline at end of file
+    tabla_paginada(df, indice.filas_de(indice.bitmap('Plataforma', plataforma_seleccionada)), key="tabla_plataforma")
+
+
+# Cada filtro se declara como un predicado sobre los índices del dataset (ver
+# indices_ventas): clave de estado, texto del botón, predicado, una
+# transformación opcional que se aplica solo a la página visible y, en los
+# filtros por umbral, el slider (columna, texto, valor inicial, paso). En esos
+# el predicado es una función del umbral elegido, que se resuelve por búsqueda
+# binaria en el índice ordenado de la columna.
+FILTROS = [
+    # Filtro 1: Ventas globales mayores a 20 millones
+    ('mostrar_global_20m', "🔝 Juegos con ventas globales > 20M",
+     lambda umbral: Mayor('Ventas_GLOBALES', umbral), None,
+     ('Ventas_GLOBALES', "Ventas globales mayores a (millones)", 20.0, 0.5)),
+    # Filtro 2: Juegos de Nintendo en Wii
+    ('mostrar_nintendo_wii', "🎮 Juegos de Nintendo en Wii",
+     Igual('Editor', 'Nintendo') & Igual('Plataforma', 'Wii'), None, None),
+    # Filtro 3: Juegos publicados por Nintendo o Sony
+    ('mostrar_nintendo_sony', "🆚 Juegos publicados por Nintendo o Sony",
+     Igual('Editor', 'Nintendo') | Igual('Editor', 'Sony Computer Entertainment'), None, None),
+    # Filtro 4: Juegos de acción en Xbox 360
+    ('mostrar_accion_x360', "⚔️ Juegos de acción en Xbox 360",
+     Igual('Género', 'Action') & Igual('Plataforma', 'X360'), None, None),
+    # Filtro 5: Juegos en plataformas modernas
+    ('mostrar_modernas', "🖥️ Juegos en plataformas modernas (PS4, XOne, PC)",
+     En('Plataforma', ['PS4', 'XOne', 'PC']), None, None),
+    # Filtro 6: Ventas en Japón mayores a 1 millón (equivale a where(...).dropna(): el año es la única columna con nulos)
+    ('mostrar_jp_1m', "🗾 Juegos con >1M ventas en Japón",
+     lambda umbral: Mayor('Ventas_JP', umbral) & ~EsNulo('Año'), None,
+     ('Ventas_JP', "Ventas en Japón mayores a (millones)", 1.0, 0.1)),
+    # Filtro 7: Ocultar juegos con ventas globales < 5M (mask, aplicado solo a la página visible)
+    ('mostrar_global_5m_ocultar', "🙈 Ocultar juegos con <5M en ventas globales",
+     Todos(), lambda pagina: pagina.mask(pagina['Ventas_GLOBALES'] < 5), None),
+    # Filtro 8: Juegos desde 2010 en adelante
+    ('mostrar_anio_2010', "📅 Juegos lanzados desde 2010",
+     lambda umbral: MayorIgual('Año', umbral), None,
+     ('Año', "Lanzados desde el año", 2010, 1)),
+    # Filtro 9: Juegos que no son de deportes ni carreras
+    ('mostrar_no_deportes_carreras', "🚫 Juegos que NO son de deportes ni carreras",
+     ~En('Género', ['Sports', 'Racing']), None, None),
+    # Filtro 10: Juegos de Nintendo con buenas ventas en NA
+    ('mostrar_nintendo_na_2m', "🏙️ Juegos de Nintendo con >2M ventas en Norteamerica (NA)",
+     lambda umbral: Igual('Editor', 'Nintendo') & Mayor('Ventas_NA', umbral), None,
+     ('Ventas_NA', "Ventas en Norteamérica mayores a (millones)", 2.0, 0.1)),
+]
+
+def alternar(clave):
+    st.session_state[clave] = not st.session_state[clave]
+
+def slider_umbral(clave, columna, etiqueta, inicial, paso):
+    # Rango del slider según el índice ordenado (mínimo y máximo de la columna)
+    minimo, maximo = indice.ordenado(columna).limites()
+    tipo = type(inicial)
+    return st.slider(etiqueta, tipo(math.floor(minimo)), tipo(math.ceil(maximo)), tipo(inicial), tipo(paso),
+                     key=f"umbral_{clave}")
+
+for clave, *_ in FILTROS:
+    if clave not in st.session_state:
+        st.session_state[clave] = False
+
+# Los botones y sliders cambian el estado antes de la nueva ejecución, así que
+# antes de dibujar se conocen todos los filtros activos (con su umbral) y se
+# evalúan juntos en una sola pasada
+activos = {}
+for clave, _, predicado, _, umbral in FILTROS:
+    if st.session_state[clave]:
+        activos[clave] = predicado(st.session_state.get(f"umbral_{clave}", umbral[2])) if umbral else predicado
+resultados = evaluar_varios(indice, activos)
+
+for clave, etiqueta, _, transformar, umbral in FILTROS:
+    st.button(etiqueta, on_click=alternar, args=(clave,))
+    if st.session_state[clave]:
+        if umbral:
+            slider_umbral(clave, *umbral)
+        tabla_paginada(df, indice.filas_de(resultados[clave]), key=f"tabla_{clave}", transformar=transformar)
+
+if len(activos) > 1 and st.checkbox("Combinar los filtros activos (juegos que cumplen todos)"):
+    combinado = Y(*activos.values()).evaluar(indice)
+    st.subheader(f"Juegos que cumplen los {len(activos)} filtros activos")
+    tabla_paginada(df, indice.filas_de(combinado), key="tabla_combinada")
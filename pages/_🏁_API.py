@@ -1,39 +1,55 @@
 import streamlit as st
-import requests
 import pandas as pd
 import plotly.express as px
 
+from clima import CIUDADES, actualizando, calentar, consultar, estado_upstream, invalidar, resumen
+
 OPENWEATHER_API_KEY = st.secrets["api"]["openweather_key"]
 
-OPENWEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
+# --- Datos del clima ---
+# Cada ciudad se guarda por separado en la caché de clima.py, compartida por
+# todas las sesiones. Se precalientan las 13 ciudades en segundo plano la
+# primera vez que el proceso abre la página de inicio o esta (si se entra
+# directo aquí, Inicio.py no se ejecuta). "Actualizar Datos" solo
+# invalida las ciudades que se están viendo: se sigue mostrando la última
+# observación mientras la nueva llega en segundo plano, y la vista se vuelve a
+# dibujar sola (cada 2 s) hasta que termina el refresco. Las peticiones tienen
+# timeouts, reintentos y un circuito que, si OpenWeatherMap no responde, deja de
+# llamarlo un rato y mantiene los últimos datos buenos; su estado y la latencia
+# del servicio se muestran debajo de los controles.
 
-# --- Función para obtener datos del clima (con cache) ---
+@st.cache_resource
+def calentar_clima(api_key: str):
+    # Una vez por proceso y clave; calentar() omite las ciudades ya vigentes
+    return calentar(api_key)
 
-@st.cache_data(ttl=60)
 def get_weather_data(city_name: str, api_key: str):
-    params = {
-        "q": city_name,
-        "appid": api_key,
-        "units": "metric", # Para obtener temperaturas
-        "lang": "es"       
-    }
-    try:
-        response = requests.get(OPENWEATHER_BASE_URL, params=params)
-        response.raise_for_status() 
-        data = response.json()
-        return data
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error al obtener datos del clima para '{city_name}': {e}")
+    observacion = consultar([city_name], api_key)[city_name]
+    if observacion.datos is None and observacion.error:
+        st.error(f"Error al obtener datos del clima para '{city_name}': {observacion.error}")
         st.error("Asegúrate de que la ciudad sea válida y tu API Key de OpenWeatherMap esté correcta y activa.")
-        return None
+    elif observacion.error:
+        st.warning(f"No se pudo actualizar '{city_name}' ({observacion.error}); se muestran los últimos datos.")
+    return observacion
+
+def hora(fecha: float) -> str:
+    return pd.to_datetime(fecha, unit='s').strftime('%H:%M:%S')
+
+def ms(valor) -> str:
+    return "—" if valor is None else f"{valor:.0f} ms"
+
+def mostrar_upstream():
+    estado = estado_upstream()
+    if estado["estado"] == "abierto":
+        st.warning(f"OpenWeatherMap no responde ({estado['ultimo_error']}). Se muestran los últimos datos buenos; "
+                   f"se volverá a intentar en {estado['reabre_en']:.0f} s.")
+    st.caption(f"OpenWeatherMap: circuito {estado['estado']} · última respuesta {ms(estado['ultima_ms'])} · "
+               f"p50 {ms(estado['p50_ms'])} · p95 {ms(estado['p95_ms'])}")
 
 st.title("☀️ Dashboard de Clima Global (Actualización Manual)")
 st.markdown("Consulta el clima actual de diversas ciudades y actualiza los datos con un botón.")
 
-cities = [
-    "Medellín", "Bogotá", "Cali", "Barranquilla", "Cartagena",
-    "Londres", "Nueva York", "París", "Tokio", "Sídney", "Buenos Aires", "Madrid", "Ciudad de México"
-]
+cities = CIUDADES
 
 # Usamos st.session_state para almacenar la última ciudad seleccionada y controlar el refresco
 if 'selected_city' not in st.session_state:
@@ -45,16 +61,58 @@ if selected_city_from_widget != st.session_state.selected_city:
     st.session_state.selected_city = selected_city_from_widget
     st.rerun() 
 
+modo = st.radio("Vista:", ["Una ciudad", "Comparar todas las ciudades"], horizontal=True, key="modo_clima")
+visibles = cities if modo == "Comparar todas las ciudades" else [st.session_state.selected_city]
 
 if st.button("Actualizar Datos"):
-    st.cache_data.clear() 
-    st.rerun()
+    # Solo las ciudades en pantalla; el resto de cachés de la app no se toca
+    invalidar(visibles, OPENWEATHER_API_KEY)
 
-if OPENWEATHER_API_KEY == "TU_API_KEY_AQUI":
-    st.warning("¡ATENCIÓN! Por favor, reemplaza 'TU_API_KEY_AQUI' en el código por tu clave real de OpenWeatherMap. "
-               "Puedes obtenerla registrándote gratuitamente en openweathermap.org.")
-elif st.session_state.selected_city: 
-    weather_data = get_weather_data(st.session_state.selected_city, OPENWEATHER_API_KEY)
+
+def comparar_ciudades():
+    observaciones = consultar(cities, OPENWEATHER_API_KEY)
+    datos = {ciudad: obs.datos for ciudad, obs in observaciones.items() if obs.datos is not None}
+    errores = {ciudad: obs.error for ciudad, obs in observaciones.items() if obs.error}
+    if errores:
+        st.warning("No se pudieron cargar: " + ", ".join(f"{ciudad} ({error})" for ciudad, error in errores.items()))
+    if datos:
+        comparacion = resumen(datos)
+        st.markdown(f"### Clima Actual en {len(comparacion)} Ciudades")
+        mas_vieja = min(obs.fecha for obs in observaciones.values() if obs.datos is not None)
+        st.info(f"Datos consultados desde las: {hora(mas_vieja)}")
+
+        st.dataframe(comparacion.drop(columns=["lat", "lon"]), hide_index=True)
+
+        fig_temperaturas = px.bar(
+            comparacion.sort_values("Temperatura (°C)"),
+            x="Temperatura (°C)",
+            y="Ciudad",
+            orientation="h",
+            color="Temperatura (°C)",
+            color_continuous_scale="RdYlBu_r",
+            title="Temperatura Actual por Ciudad",
+            template="plotly_white"
+        )
+        st.plotly_chart(fig_temperaturas, use_container_width=True)
+
+        fig_humedad = px.scatter(
+            comparacion,
+            x="Temperatura (°C)",
+            y="Humedad (%)",
+            text="Ciudad",
+            title="Temperatura vs Humedad",
+            template="plotly_white"
+        )
+        fig_humedad.update_traces(textposition="top center")
+        st.plotly_chart(fig_humedad, use_container_width=True)
+
+        st.subheader("Ciudades en el Mapa")
+        st.map(comparacion[["lat", "lon"]], zoom=1)
+
+
+def mostrar_ciudad():
+    observacion = get_weather_data(st.session_state.selected_city, OPENWEATHER_API_KEY)
+    weather_data = observacion.datos
     
     if weather_data:
         temp_celsius = weather_data['main']['temp']
@@ -75,7 +133,7 @@ elif st.session_state.selected_city:
             st.metric(label="Humedad", value=f"{humidity}%")
             st.write(f"**Condición:** {description}")
         
-        st.info(f"Datos mostrados a las: {pd.to_datetime('now').strftime('%H:%M:%S')}")
+        st.info(f"Datos obtenidos a las: {hora(observacion.fecha)}")
 
         # --- Mapa de la ciudad ---
         st.subheader("Ubicación en el Mapa")
@@ -100,4 +158,30 @@ elif st.session_state.selected_city:
         st.plotly_chart(fig_metrics, use_container_width=True)
 
     else:
-        st.warning(f"No se pudieron cargar los datos del clima para '{st.session_state.selected_city}'.")
\ No newline at end of file
+        st.warning(f"No se pudieron cargar los datos del clima para '{st.session_state.selected_city}'.")
+
+
+def vista_clima(sondeando: bool):
+    pendientes = actualizando(visibles, OPENWEATHER_API_KEY)
+    if sondeando and not pendientes:
+        st.rerun() # Ya llegaron los datos nuevos: se redibuja la página y se deja de sondear
+    mostrar_upstream()
+    if pendientes:
+        st.caption("🔄 Actualizando en segundo plano: " + ", ".join(pendientes) + ". Se muestran los últimos datos conocidos.")
+    if modo == "Comparar todas las ciudades":
+        comparar_ciudades()
+    elif st.session_state.selected_city:
+        mostrar_ciudad()
+
+
+if OPENWEATHER_API_KEY == "TU_API_KEY_AQUI":
+    st.warning("¡ATENCIÓN! Por favor, reemplaza 'TU_API_KEY_AQUI' en el código por tu clave real de OpenWeatherMap. "
+               "Puedes obtenerla registrándote gratuitamente en openweathermap.org.")
+else:
+    calentar_clima(OPENWEATHER_API_KEY) # Con la clave de ejemplo no se llama a OpenWeatherMap
+    # Aquí solo se lanzan las peticiones de las ciudades vencidas o sin dato (la
+    # espera, dentro del presupuesto, la hace el fragmento); mientras sigan en
+    # curso, el fragmento se vuelve a ejecutar solo para recoger el dato nuevo
+    consultar(visibles, OPENWEATHER_API_KEY, presupuesto=0)
+    sondear = bool(actualizando(visibles, OPENWEATHER_API_KEY))
+    st.fragment(vista_clima, run_every=2 if sondear else None)(sondear)
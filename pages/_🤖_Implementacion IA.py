@@ -2,6 +2,8 @@ import streamlit as st
 import google.generativeai as genai
 import re
 
+from cache_ia import buscar, clave_prompt, estadisticas, guardar
+
 # --- Configuración de la API de Gemini ---
 try:
     genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
@@ -53,8 +55,21 @@ def load_gemini_model(name):
 model = load_gemini_model(model_name)
 
 # --- Funciones de Generación con Gemini ---
-
-def generar_contenido_gemini(prompt, temperatura=0.7, max_salida_tokens=500): # Aumentado el default de tokens
+# Las respuestas se guardan en disco por prompt, modelo, temperatura y tokens
+# (ver cache_ia.py): repetir la misma generación no vuelve a llamar a Gemini,
+# salvo que se pidan variaciones nuevas. Devuelve (texto, si vino de la caché).
+# Solo se guarda texto que sirve: no vacío y, si se indica `validar`, que la
+# función lo acepte (p. ej. que los copys formen una lista numerada). Los
+# errores de Gemini no se guardan nunca.
+
+def generar_contenido_gemini(prompt, temperatura=0.7, max_salida_tokens=500, usar_cache=True, validar=None): # Aumentado el default de tokens
+    clave = clave_prompt(prompt, model_name, temperatura, max_salida_tokens)
+    def aprovechable(texto):
+        return bool(texto.strip()) and (validar is None or validar(texto))
+    if usar_cache:
+        texto = buscar(clave, aprovechable) # Lo guardado que ya no sirve cuenta como fallo
+        if texto is not None:
+            return texto, True
     try:
         response = model.generate_content(
             prompt,
@@ -64,10 +79,27 @@ def generar_contenido_gemini(prompt, temperatura=0.7, max_salida_tokens=500): #
                 temperature=temperatura,
             )
         )
-        return response.candidates[0].content.parts[0].text
+        texto = response.candidates[0].content.parts[0].text
     except Exception as e:
         st.error(f"Error al generar contenido con Gemini: {e}. Esto puede ocurrir si el contenido viola las políticas de seguridad o si el modelo falla. Intenta ajustar el prompt o las características.")
-        return "No se pudo generar el contenido."
+        return "No se pudo generar el contenido.", False
+    if aprovechable(texto):
+        guardar(clave, texto)
+    return texto, False
+
+def extraer_copys(texto):
+    # Elementos de la lista numerada que devuelve Gemini ("1. ...")
+    return [re.sub(r'^\s*\d+\.\s*', '', line).strip() for line in texto.split('\n') if re.match(r'^\s*\d+\.', line.strip())]
+
+def origen(desde_cache):
+    return " (desde la caché, sin llamar a Gemini)" if desde_cache else ""
+
+def mostrar_estadisticas_cache():
+    stats = estadisticas()
+    tasa = "—" if stats["tasa"] is None else f"{stats['tasa']:.0%}"
+    descartadas = f" ({stats['descartadas']} guardadas no válidas)" if stats["descartadas"] else ""
+    st.caption(f"Caché de contenido: {stats['aciertos']} aciertos de {stats['aciertos'] + stats['fallos']} consultas "
+               f"({tasa}){descartadas} · {stats['entradas']} respuestas guardadas, {stats['bytes'] / 1024:.0f} KB")
 
 # --- Interfaz de Streamlit ---
 st.title("Generador de Contenido de Marketing con IA")
@@ -111,6 +143,8 @@ tono_seleccionado = st.selectbox("Selecciona el Tono para los Copys Publicitario
 ### Cantidad y Extensión
 num_copys_generar = st.slider("Cantidad de Copys Publicitarios a Generar", 1, 5, 3)
 longitud_copys = st.radio("Longitud de los Copys:", ["Cortos (frases directas)", "Medianos (1-2 párrafos)", "Largos (2-4 párrafos, con más detalle)"])
+variaciones_nuevas = st.checkbox("Generar variaciones nuevas (no reutilizar resultados anteriores)", value=False,
+                                 help="Con los mismos datos se reutiliza el contenido ya generado. Marca esta opción para pedir a Gemini una versión distinta.")
 
 
 if st.button("Generar Contenido de Marketing", type="primary"):
@@ -135,8 +169,9 @@ if st.button("Generar Contenido de Marketing", type="primary"):
             Enfócate en cómo este producto resuelve un problema o mejora la vida del cliente.
             Asegúrate de que sea fácil de leer y escanear.
             """
-            descripcion = generar_contenido_gemini(prompt_descripcion, max_salida_tokens=400) # Más tokens para descripción
-            st.success("Descripción generada:")
+            descripcion, descripcion_en_cache = generar_contenido_gemini(prompt_descripcion, max_salida_tokens=400, # Más tokens para descripción
+                                                                         usar_cache=not variaciones_nuevas)
+            st.success(f"Descripción generada{origen(descripcion_en_cache)}:")
             st.info(descripcion)
 
         # --- Generar Copys para Anuncios ---
@@ -167,9 +202,13 @@ if st.button("Generar Contenido de Marketing", type="primary"):
             1. [Copy 1 con CTA]
             2. [Copy 2 con CTA]
             """
-            copys_texto_bruto = generar_contenido_gemini(prompt_copys, temperatura=0.9, max_salida_tokens=copy_max_tokens)
+            copys_texto_bruto, copys_en_cache = generar_contenido_gemini(prompt_copys, temperatura=0.9, max_salida_tokens=copy_max_tokens,
+                                                                         usar_cache=not variaciones_nuevas,
+                                                                         validar=lambda texto: len(extraer_copys(texto)) > 0)
+            if copys_en_cache:
+                st.caption(f"Copys{origen(copys_en_cache)}.")
 
-            copys_generados = [re.sub(r'^\s*\d+\.\s*', '', line).strip() for line in copys_texto_bruto.split('\n') if re.match(r'^\s*\d+\.', line.strip())]
+            copys_generados = extraer_copys(copys_texto_bruto)
 
             if copys_generados:
                 for i, copy_text in enumerate(copys_generados[:num_copys_generar]):
@@ -180,4 +219,6 @@ if st.button("Generar Contenido de Marketing", type="primary"):
                 st.info(f"Salida bruta de Gemini (para depuración):\n{copys_texto_bruto}")
 
     else:
-        st.warning("Por favor, ingresa toda la información del producto y el público objetivo para generar el contenido.")
\ No newline at end of file
+        st.warning("Por favor, ingresa toda la información del producto y el público objetivo para generar el contenido.")
+
+mostrar_estadisticas_cache()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from indices_ventas import clave_orden
+
+# --- Tablas paginadas ---
+# st.dataframe serializa al navegador todas las filas que recibe. Aquí los
+# filtros se representan como máscara booleana (o posiciones de filas) sobre
+# el dataset compartido: el total se obtiene contando la máscara, el orden se
+# calcula sobre una sola columna y solo las filas de la página visible se
+# convierten en DataFrame y se envían.
+
+TAMANOS_PAGINA = [25, 50, 100, 500]
+SIN_ORDEN = "(orden original)"
+
+
+def posiciones_ordenadas(df: pd.DataFrame, posiciones: np.ndarray, columna: str = None, ascendente: bool = True) -> np.ndarray:
+    if columna is None:
+        return posiciones
+    clave = clave_orden(df[columna].iloc[posiciones])
+    if not ascendente:
+        clave = -clave
+    return posiciones[np.argsort(clave, kind="stable")]
+
+
+def tabla_paginada(df: pd.DataFrame, filtro=None, key: str = "tabla", transformar=None):
+    # filtro: máscara booleana, posiciones de filas o None (todas las filas).
+    # transformar: función opcional que se aplica solo a la página visible.
+    if filtro is None:
+        posiciones = np.arange(len(df))
+    elif isinstance(filtro, (pd.Series, np.ndarray)) and np.asarray(filtro).dtype == bool:
+        posiciones = np.flatnonzero(np.asarray(filtro))
+    else:
+        posiciones = np.asarray(filtro)
+    total = len(posiciones)
+
+    col_tamano, col_orden, col_sentido, col_pagina = st.columns([1, 2, 1, 1])
+    with col_tamano:
+        tamano = st.selectbox("Filas por página", TAMANOS_PAGINA, key=f"{key}_tamano")
+    with col_orden:
+        columna = st.selectbox("Ordenar por", [SIN_ORDEN] + list(df.columns), key=f"{key}_orden")
+    with col_sentido:
+        ascendente = st.radio("Sentido", ["Ascendente", "Descendente"], key=f"{key}_sentido",
+                              horizontal=True) == "Ascendente"
+
+    paginas = max(1, math.ceil(total / tamano))
+    clave_pagina = f"{key}_pagina"
+    if st.session_state.get(clave_pagina, 1) > paginas: # El filtro cambió y ya no hay tantas páginas
+        st.session_state[clave_pagina] = paginas
+    with col_pagina:
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1, key=clave_pagina)
+
+    if columna != SIN_ORDEN:
+        posiciones = posiciones_ordenadas(df, posiciones, columna, ascendente)
+    inicio = (pagina - 1) * tamano
+    visibles = df.iloc[posiciones[inicio:inicio + tamano]]
+    if transformar is not None:
+        visibles = transformar(visibles)
+
+    st.dataframe(visibles)
+    if total:
+        st.caption(f"Filas {inicio + 1:,}–{inicio + len(visibles):,} de {total:,}")
+    else:
+        st.caption("Ningún juego cumple el filtro")
@@ -0,0 +1,47 @@
+import streamlit as st
+
+from cache_figuras import grafico_cacheado
+
+# --- Renderizado perezoso para los tableros ---
+# st.tabs y st.expander solo ocultan contenido en el navegador: el script
+# calcula y serializa todos los gráficos en cada rerun aunque estén cerrados.
+# En modo perezoso las pestañas se eligen con un selector y las secciones con
+# un interruptor, así que solo se ejecuta el código de lo que está abierto.
+# Las figuras ya construidas se reutilizan mientras no cambien sus entradas.
+
+CLAVE_MODO = "render_perezoso"
+
+
+def selector_modo(etiqueta="Renderizado perezoso (solo calcula las secciones abiertas)"):
+    return st.sidebar.toggle(etiqueta, value=True, key=CLAVE_MODO)
+
+
+def modo_perezoso() -> bool:
+    return st.session_state.get(CLAVE_MODO, True)
+
+
+def pestanas(secciones: dict, key: str):
+    # secciones: {nombre de la pestaña: función que la dibuja}
+    nombres = list(secciones)
+    if modo_perezoso():
+        seleccion = st.radio("Sección", nombres, horizontal=True, key=key, label_visibility="collapsed")
+        secciones[seleccion]()
+    else:
+        for tab, nombre in zip(st.tabs(nombres), nombres):
+            with tab:
+                secciones[nombre]()
+
+
+def seccion(titulo: str, dibujar, key: str):
+    if modo_perezoso():
+        if st.toggle(titulo, key=key):
+            with st.container(border=True):
+                dibujar()
+    else:
+        with st.expander(titulo):
+            dibujar()
+
+
+def grafico(id_grafico: str, construir, *entradas):
+    # Las figuras se reutilizan mientras no cambien sus entradas (ver cache_figuras)
+    grafico_cacheado(id_grafico, construir, *entradas)